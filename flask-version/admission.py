@@ -0,0 +1,245 @@
+"""
+Token-bucket admission control for /api/submit and /api/submit/batch.
+
+Every client (its address, or behind ADMISSION_TRUST_PROXY=N proxies the
+X-Forwarded-For entry the outermost of them appended) has a bucket of ADMISSION_CLIENT_BURST cost units
+that refills at ADMISSION_CLIENT_RATE units per second. A slider-only
+check-in costs ADMISSION_SLIDER_COST and one with a journal costs
+ADMISSION_JOURNAL_COST, since the model is most of the work. A check-in is
+charged once it has validated and claimed its dedup key (submit_dedup.py),
+so invalid bodies, replays and coalesced duplicates cost nothing; the
+declared body size is still checked before anything is read. A batch pays the slider
+cost up front and ADMISSION_BATCH_ROW_COST per row once it is parsed, so a
+big batch can't be sent as often as a check-in. ADMISSION_GLOBAL_RATE adds
+one more bucket that all clients share and that caps the whole deployment.
+It is off by default because the right number depends on the hardware.
+
+Buckets live in ADMISSION_DB, a SQLite file shared by every gunicorn worker.
+A charge there is one UPSERT ... RETURNING statement, so concurrent workers
+can't both spend the same tokens. Without the file, each worker keeps its own
+buckets in memory. Idle buckets are full again after burst / rate seconds and
+are pruned then. Client addresses are stored only as salted hashes. If the
+store fails, requests are let through (and counted), so students are never
+turned away because of the limiter.
+"""
+import hashlib
+import math
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from proc_local import LocalSqlite
+
+ADMISSION = os.getenv("ADMISSION", "1") in ("1", "true", "True")
+ADMISSION_DB = os.getenv("ADMISSION_DB", "")
+CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", "0.5"))
+CLIENT_BURST = float(os.getenv("ADMISSION_CLIENT_BURST", "12"))
+GLOBAL_RATE = float(os.getenv("ADMISSION_GLOBAL_RATE", "0"))
+GLOBAL_BURST = float(os.getenv("ADMISSION_GLOBAL_BURST", "0")) or 2 * GLOBAL_RATE
+SLIDER_COST = float(os.getenv("ADMISSION_SLIDER_COST", "1"))
+JOURNAL_COST = float(os.getenv("ADMISSION_JOURNAL_COST", "4"))
+# Number of reverse proxies in front of the app that append to X-Forwarded-For (0: use the peer address).
+_TRUST_PROXY = os.getenv("ADMISSION_TRUST_PROXY", "0")
+TRUST_PROXY = 1 if _TRUST_PROXY in ("true", "True") else int(_TRUST_PROXY or 0)
+JOURNAL_MAX_CHARS = int(os.getenv("JOURNAL_MAX_CHARS", "5000"))
+# A JSON-escaped character takes at most 6 bytes; the sliders and ids fit in 2 KB.
+SUBMIT_MAX_BYTES = JOURNAL_MAX_CHARS * 6 + 2048
+# /api/submit/batch. Bulk scoring is vectorized, so a row costs a small
+# fraction of a check-in; a JSON row with its keys is ~120 bytes, a CSV row less.
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "50000"))
+BATCH_ROW_COST = float(os.getenv("ADMISSION_BATCH_ROW_COST", "0.0002"))
+BATCH_MAX_BYTES = BATCH_MAX_ROWS * 256
+
+GLOBAL_KEY = "*"
+REASONS = ("client", "global", "body_too_large", "journal_too_long", "batch_too_large")
+PRUNE_EVERY = 1000
+
+
+class RateLimited(Exception):
+    """A duplicate's leader was turned away; carries its Retry-After seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.retry_after = retry_after
+
+
+def client_address(remote_addr, forwarded_for=None):
+    """
+    The address a client is limited by. The leftmost X-Forwarded-For entries
+    come from the client and can be forged, so with TRUST_PROXY proxies it is
+    the entry the outermost trusted proxy appended: TRUST_PROXY from the right.
+    """
+    if TRUST_PROXY and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",")]
+        if len(hops) >= TRUST_PROXY and hops[-TRUST_PROXY]:
+            return hops[-TRUST_PROXY]
+    return remote_addr or "unknown"
+
+
+# ---------- Stores
+class MemoryBuckets:
+    """Buckets kept in this process, so each gunicorn worker admits on its own."""
+
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.salt = secrets.token_bytes(16)
+
+    def take(self, key, cost, rate, burst, now):
+        """Spend `cost` if the bucket has it; returns (admitted, tokens left)."""
+        with self._lock:
+            tokens, updated = self._rows.get(key, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            admitted = tokens >= cost
+            if admitted:
+                tokens -= cost
+            self._rows[key] = (tokens, now)
+            return admitted, tokens
+
+    def prune(self, idle_before):
+        with self._lock:
+            for key in [k for k, (_, updated) in self._rows.items() if updated < idle_before and k != GLOBAL_KEY]:
+                del self._rows[key]
+
+    def fill(self, rate, burst, now):
+        """Current tokens (after refill) of every client bucket."""
+        with self._lock:
+            return [min(burst, tokens + max(0.0, now - updated) * rate)
+                    for key, (tokens, updated) in self._rows.items() if key != GLOBAL_KEY]
+
+
+class SqliteBuckets:
+    """Buckets shared by all workers; each charge is a single atomic statement."""
+
+    def __init__(self, path):
+        self.path = path
+        self._db = LocalSqlite(path, schema=(
+            "CREATE TABLE IF NOT EXISTS admission_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, "
+            "admitted INTEGER NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS admission_meta (name TEXT PRIMARY KEY, value BLOB NOT NULL)",
+        ))
+        db = self._db()
+        db.execute("INSERT OR IGNORE INTO admission_meta (name, value) VALUES ('salt', ?)",
+                   (secrets.token_bytes(16),))
+        self.salt = db.execute("SELECT value FROM admission_meta WHERE name = 'salt'").fetchone()[0]
+
+    def take(self, key, cost, rate, burst, now):
+        # Every SET expression reads the old row, so `admitted` and `tokens` agree.
+        refilled = "min(?2, tokens + max(0.0, ?4 - updated) * ?5)"
+        row = self._db().execute(
+            "INSERT INTO admission_buckets (key, tokens, updated, admitted) "
+            "VALUES (?1, CASE WHEN ?2 >= ?3 THEN ?2 - ?3 ELSE ?2 END, ?4, ?2 >= ?3) "
+            f"ON CONFLICT (key) DO UPDATE SET "
+            f"tokens = CASE WHEN {refilled} >= ?3 THEN {refilled} - ?3 ELSE {refilled} END, "
+            f"admitted = {refilled} >= ?3, updated = ?4 "
+            "RETURNING admitted, tokens",
+            (key, burst, cost, now, rate),
+        ).fetchall()[0]
+        return bool(row[0]), float(row[1])
+
+    def prune(self, idle_before):
+        self._db().execute("DELETE FROM admission_buckets WHERE updated < ? AND key != ?",
+                           (idle_before, GLOBAL_KEY))
+
+    def fill(self, rate, burst, now):
+        rows = self._db().execute(
+            "SELECT min(?1, tokens + max(0.0, ?2 - updated) * ?3) FROM admission_buckets WHERE key != ?4",
+            (burst, now, rate, GLOBAL_KEY),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+
+# ---------- Controller
+class AdmissionControl:
+    """Per-client (and optional global) token buckets plus rejection counters."""
+
+    def __init__(self, db_path=ADMISSION_DB, client_rate=CLIENT_RATE, client_burst=CLIENT_BURST,
+                 global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST):
+        self.store = SqliteBuckets(db_path) if db_path else MemoryBuckets()
+        self.shared = bool(db_path)
+        self.client_rate = client_rate
+        # A bucket smaller than the journal cost (or a full batch) would never admit one.
+        self.client_burst = max(client_burst, JOURNAL_COST, BATCH_MAX_ROWS * BATCH_ROW_COST)
+        self.global_rate = global_rate
+        self.global_burst = max(global_burst, JOURNAL_COST) if global_rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._charges = 0
+        self.admitted = 0
+        self.rejected = Counter()
+        self.store_errors = 0
+
+    def client_key(self, address):
+        return hashlib.blake2b(address.encode(), key=self.store.salt, digest_size=12).hexdigest()
+
+    def charge(self, client_key, cost, count=True):
+        """
+        Spend `cost` from the client's bucket, then the global one. Returns
+        None when admitted, else the Retry-After seconds for the 429.
+        `count=False` for a follow-up charge on an already admitted request.
+        """
+        now = time.time()
+        try:
+            ok, tokens = self.store.take(client_key, cost, self.client_rate, self.client_burst, now)
+            if not ok:
+                return self._reject("client", cost - tokens, self.client_rate)
+            if self.global_rate > 0:
+                ok, tokens = self.store.take(GLOBAL_KEY, cost, self.global_rate, self.global_burst, now)
+                if not ok:
+                    # Not the client's fault: give its tokens back.
+                    self.store.take(client_key, -cost, self.client_rate, self.client_burst, now)
+                    return self._reject("global", cost - tokens, self.global_rate)
+            self._maybe_prune(now)
+        except sqlite3.Error as e:
+            with self._lock:
+                self.store_errors += 1
+            print(f"[admission] store error, admitting: {e}")
+        if count:
+            with self._lock:
+                self.admitted += 1
+        return None
+
+    def reject(self, reason):
+        """Count a request turned away for something other than its bucket (size limits)."""
+        with self._lock:
+            self.rejected[reason] += 1
+
+    def _reject(self, reason, deficit, rate):
+        self.reject(reason)
+        return max(1, math.ceil(deficit / rate)) if rate > 0 else 60
+
+    def _maybe_prune(self, now):
+        with self._lock:
+            self._charges += 1
+            if self._charges % PRUNE_EVERY:
+                return
+        # An idle bucket is full again after burst / rate seconds; dropping it changes nothing.
+        if self.client_rate > 0:
+            self.store.prune(now - self.client_burst / self.client_rate)
+
+    def stats(self):
+        now = time.time()
+        try:
+            fill = self.store.fill(self.client_rate, self.client_burst, now)
+            global_tokens = self.store.take(GLOBAL_KEY, 0, self.global_rate, self.global_burst, now)[1] \
+                if self.global_rate > 0 else 0.0
+        except sqlite3.Error:
+            fill, global_tokens = [], 0.0
+        with self._lock:
+            return {
+                "shared": self.shared,
+                "client_rate": self.client_rate,
+                "client_burst": self.client_burst,
+                "global_rate": self.global_rate,
+                "global_burst": self.global_burst,
+                "admitted": self.admitted,
+                "rejected": {reason: self.rejected[reason] for reason in REASONS},
+                "store_errors": self.store_errors,
+                "clients_tracked": len(fill),
+                "clients_fill": round(sum(fill) / len(fill) / self.client_burst, 4) if fill else 1.0,
+                "clients_below_journal_cost": sum(1 for tokens in fill if tokens < JOURNAL_COST),
+                "global_fill": round(global_tokens / self.global_burst, 4) if self.global_rate > 0 else None,
+            }
@@ -1,407 +1,706 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
-import re
+import csv
+import io
 import os
-import hashlib
-from datetime import date
+import json
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from admission import (ADMISSION, BATCH_MAX_BYTES, BATCH_MAX_ROWS, BATCH_ROW_COST, JOURNAL_COST,
+                       JOURNAL_MAX_CHARS, SLIDER_COST, SUBMIT_MAX_BYTES,
+                       AdmissionControl, RateLimited, client_address)
+from emotion import (CHUNK_STATS, MicroBatcher, QueueSaturated, negation_override,
+                     warm_up, model_status, process_memory)
+from emotion_cache import EmotionCache
+from emotion_cascade import load_cascade
+from circuit_breaker import EMOTION_TIMEOUT_MS, STATES, CircuitBreaker
+from cohort_stats import GRAINS, CohortStats
+from feedback_rules import RULES
+from feedback_table import FeedbackTable
+from inference_pool import PoolClient
+from metrics import METRICS, NULL_TIMER
+from static_cache import API_MAX_AGE_S, STATIC_CACHE, Prebuilt, StaticAssets
+from submit_dedup import DEDUP_WAIT_S, SUBMIT_DEDUP, KeyReused, SingleFlight, submit_key
+from wellness import EMOJIS, calculate_wellness_score, get_burnout_level
 
-EMOTION_PIPELINE = None
 USE_EMOTION = os.getenv("USE_EMOTION", "0") in ("1", "true", "True")
+# Load + warm the model at import; with gunicorn.conf.py's preload_app this runs
+# once in the master so workers share the weights copy-on-write.
+EMOTION_PRELOAD = os.getenv("EMOTION_PRELOAD", "1") in ("1", "true", "True")
+# Fill all 5^8 feedback/resource slots at import instead of on first use.
+FEEDBACK_TABLE_PREBUILD = os.getenv("FEEDBACK_TABLE_PREBUILD", "0") in ("1", "true", "True")
+# Live cohort counts/averages for /api/stats (no per-student data).
+COHORT_STATS = os.getenv("COHORT_STATS", "1") in ("1", "true", "True")
+# Send inference to the shared pool (inference_pool.py) instead of a model in this worker.
+EMOTION_POOL_SOCKET = os.getenv("EMOTION_POOL_SOCKET", "")
+# When the inference queue is full: "skip" answers without emotion, "503" rejects the check-in.
+EMOTION_SHED = os.getenv("EMOTION_SHED", "skip")
 
 app = Flask(__name__)
 CORS(app)
 
-# ---------- Constants
-VANDAL_LINKS = {
-    "athletics": "https://govandals.com",
-    "swim": "https://www.uidaho.edu/recreation/swim-center",
-    "rec": "https://www.uidaho.edu/recreation/rec-center",
-}
-
-# Emoji mappings for different wellness metrics
-EMOJIS = {
-    "mood": {1: "😞", 2: "🙁", 3: "😐", 4: "🙂", 5: "😄"},
-    "stress": {1: "😌", 2: "😕", 3: "😟", 4: "😣", 5: "😫"},
-    "focus": {1: "😵", 2: "😕", 3: "😐", 4: "🙂", 5: "😎"},
-    "sleep": {1: "😴", 2: "🥱", 3: "😐", 4: "🙂", 5: "😌"},
-    "motivation": {1: "🥀", 2: "😕", 3: "😐", 4: "🙂", 5: "🚀"},
-    "anxiety": {1: "😌", 2: "😯", 3: "😬", 4: "😰", 5: "😱"},
-    "appetite": {1: "🥄", 2: "🍽️", 3: "😐", 4: "🥗", 5: "🍱"},
-    "food_security": {1: "🍽️", 2: "🥪", 3: "🙂", 4: "🧺", 5: "💳"},
-}
-
-# ---------- Helpers for varied text
-def _pick(items, seed_key):
-    """Deterministic picker for variety (stable per day + payload)."""
-    if not items:
-        return ""
-    seed = int(hashlib.md5(seed_key.encode()).hexdigest(), 16)
-    return items[seed % len(items)]
-
-def _has(txt, *words):
-    low = (txt or "").lower()
-    return any(w in low for w in words)
-
-# ---------- Scoring
-def calculate_wellness_score(data):
-    """Calculate overall wellness score from user inputs (average of 8 metrics)."""
-    mood = data['mood']
-    stress = data['stress']
-    focus = data['focus']
-    sleep = data['sleep']
-    motivation = data['motivation']
-    anxiety = data['anxiety']
-    appetite = data['appetite']
-    food_security = data.get('food_security', 3)
-
-    # Reverse scoring for negative metrics
-    stress_score = 6 - stress
-    anxiety_score = 6 - anxiety
-    # Appetite: center at 3 is best → 0..3 scale
-    appetite_score = 3 - abs(appetite - 3)
-
-    wellness_score = (
-        mood + stress_score + focus + sleep +
-        motivation + anxiety_score + appetite_score + food_security
-    ) / 8
-
-    return wellness_score
-
-def get_burnout_level(wellness_score):
-    """Determine burnout risk level based on wellness score."""
-    if wellness_score >= 4.0:
-        return "Low"
-    elif wellness_score >= 2.5:
-        return "Moderate"
+# Per-call deadline and circuit breaker around the model (circuit_breaker.py).
+EMOTION_BREAKER = CircuitBreaker()
+EMOTION_TIMEOUT_S = EMOTION_TIMEOUT_MS / 1000.0 if EMOTION_TIMEOUT_MS > 0 else None
+# Shared by all request threads in this worker; started on first journal. The
+# pool drops batches still queued past the deadline.
+EMOTION_POOL = PoolClient(EMOTION_POOL_SOCKET, deadline_s=EMOTION_TIMEOUT_S) if EMOTION_POOL_SOCKET else None
+EMOTION_ENGINE = MicroBatcher(infer=EMOTION_POOL.classify_batch) if EMOTION_POOL else MicroBatcher()
+EMOTION_CACHE = EmotionCache()
+# Cheap-first local classifier (EMOTION_CASCADE_MODEL); None sends every journal to the model.
+EMOTION_CASCADE = load_cascade() if USE_EMOTION else None
+FEEDBACK_TABLE = FeedbackTable()
+# Opt-in per-student history (CHECKIN_HISTORY_DIR); off by default. history_store
+# needs numpy, so it is only imported when history is on.
+HISTORY_DIR = os.getenv("CHECKIN_HISTORY_DIR", "")
+HISTORY = None
+if HISTORY_DIR:
+    from history_store import HistoryStore
+    HISTORY = HistoryStore(HISTORY_DIR)
+COHORT = CohortStats() if COHORT_STATS else None
+# Duplicate submits (double-clicks, retries) share one computation / replay it.
+DEDUP = SingleFlight() if SUBMIT_DEDUP else None
+# Token buckets per client (and optionally global) in front of /api/submit.
+ADMISSION_CONTROL = AdmissionControl() if ADMISSION else None
+# Page shell, /api/emojis and static files serialized + compressed once (static_cache.py).
+STATIC_ASSETS = StaticAssets(app.static_folder) if STATIC_CACHE else None
+if FEEDBACK_TABLE_PREBUILD:
+    FEEDBACK_TABLE.build_all()
+
+if USE_EMOTION and not EMOTION_POOL:
+    if EMOTION_PRELOAD:
+        warm_up()
     else:
-        return "High"
-
-# ---------- Resources
-def get_resources(burnout_level, data=None):
-    VANDAL_LINKS = {
-        "athletics": "https://govandals.com",
-        "swim": "https://www.uidaho.edu/recreation/swim-center",
-        "rec": "https://www.uidaho.edu/recreation/rec-center"
+        threading.Thread(target=warm_up, name="emotion-warmup", daemon=True).start()
+
+# ---------- Optional journal emotion
+def analyze_journal_emotion(journal_text, timer=NULL_TIMER):
+    """Emotion analysis with simple negation overrides; model runs in micro-batches."""
+    txt = (journal_text or "").strip()
+    if not txt or not USE_EMOTION:
+        return None
+    with timer.stage('emotion') as stage:
+        try:
+            stage.path = 'regex'
+            override = negation_override(txt)
+            if override:
+                return override
+            stage.path = 'cache'
+            cached = EMOTION_CACHE.get(txt)
+            if cached:
+                return cached
+            if EMOTION_CASCADE:
+                stage.path = 'cascade'
+                result = EMOTION_CASCADE.classify(txt)
+                if result:
+                    return result
+            if not EMOTION_BREAKER.allow():
+                # Model is timing out or failing: answer without it until a probe succeeds.
+                stage.path = 'breaker'
+                return None
+            stage.path = 'model'
+            try:
+                result = EMOTION_ENGINE.submit(txt, timeout=EMOTION_TIMEOUT_S)
+            except QueueSaturated:
+                EMOTION_BREAKER.cancel()
+                raise
+            except TimeoutError:
+                EMOTION_BREAKER.failure('timeout')
+                stage.path = 'timeout'
+                print(f"[emotion] no result within {EMOTION_TIMEOUT_MS:.0f} ms, skipping model")
+                return None
+            except Exception:
+                EMOTION_BREAKER.failure('error')
+                raise
+            EMOTION_BREAKER.success()
+            EMOTION_CACHE.put(txt, result)
+            return result
+        except QueueSaturated:
+            # Overrides already checked above; skip the model rather than queue forever.
+            stage.path = 'shed'
+            print("[emotion] queue saturated, skipping model")
+            if EMOTION_SHED == "503":
+                raise
+            return None
+        except Exception as e:
+            stage.path = 'error'
+            METRICS.error('emotion')
+            print(f"[emotion] error: {e}")
+            return None
+
+# ---------- Prebuilt responses
+def prebuilt_response(entry, cache_control=None):
+    """Serve a static_cache.Prebuilt body: negotiated encoding, ETag, 304 on If-None-Match."""
+    status, headers, body = entry.respond(request.headers.get('Accept-Encoding'),
+                                          request.headers.get('If-None-Match'), cache_control)
+    return Response(body, status=status, headers=headers)
+
+def fingerprint_static(endpoint, values):
+    """url_for('static', filename='css/style.css') -> /static/css/style.<hash>.css"""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = STATIC_ASSETS.url_name(values['filename'])
+
+def serve_static(filename):
+    found = STATIC_ASSETS.get(filename)
+    if found is None:
+        return app.send_static_file(filename)
+    return prebuilt_response(*found)
+
+def prebuild_pages():
+    """Render the page shell and /api/emojis once; neither depends on the request."""
+    with app.test_request_context('/'):
+        index_page = Prebuilt(render_template('index.html', journal_max_chars=JOURNAL_MAX_CHARS,
+                           history_enabled=HISTORY is not None).encode(),
+                              'text/html; charset=utf-8')
+        emojis = Prebuilt(app.json.response(EMOJIS).get_data(), 'application/json',
+                          f'public, max-age={API_MAX_AGE_S}')
+    return index_page, emojis
+
+if STATIC_ASSETS:
+    app.url_defaults(fingerprint_static)
+    app.view_functions['static'] = serve_static
+    INDEX_PAGE, EMOJIS_PAGE = prebuild_pages()
+    print(f"[static] prebuilt {STATIC_ASSETS.stats()}")
+else:
+    INDEX_PAGE = EMOJIS_PAGE = None
+
+# ---------- Routes
+@app.route('/')
+def index():
+    if INDEX_PAGE:
+        return prebuilt_response(INDEX_PAGE)
+    return render_template('index.html', journal_max_chars=JOURNAL_MAX_CHARS,
+                           history_enabled=HISTORY is not None)
+
+REQUIRED_FIELDS = ['mood', 'stress', 'focus', 'sleep', 'motivation', 'anxiety', 'appetite', 'food_security']
+
+def validate_checkin(data):
+    """Return (error_body, status) if the check-in can't be scored, else None."""
+    # Validate required fields
+    for field in REQUIRED_FIELDS:
+        if field not in data:
+            return {'error': f'Missing field: {field}'}, 400
+
+    # Reject all-default (3) submissions
+    if all(data[field] == 3 for field in REQUIRED_FIELDS):
+        return {
+            'error': "It looks like you haven't updated any inputs. Please adjust them to reflect your current state.",
+            'type': 'validation'
+        }, 400
+
+    journal = data.get('journal')
+    if isinstance(journal, str) and len(journal) > JOURNAL_MAX_CHARS:
+        if ADMISSION_CONTROL:
+            ADMISSION_CONTROL.reject('journal_too_long')
+        return {'error': f'Journal entries are limited to {JOURNAL_MAX_CHARS} characters.', 'type': 'validation'}, 413
+    return None
+
+def journal_text(data):
+    """The journal entry if one was written, else None."""
+    if 'journal' in data and (data['journal'] or '').strip():
+        return data['journal']
+    return None
+
+def build_checkin_response(data, emotion_analysis, timer=NULL_TIMER, rules=None):
+    """Score, feedback and resources for a validated check-in, all from one ruleset."""
+    rules = rules or RULES.current()
+    # Calculate core metrics
+    with timer.stage('score'):
+        wellness_score = calculate_wellness_score(data)
+        burnout_level = get_burnout_level(wellness_score)
+
+    # Personalized feedback + resources
+    with timer.stage('feedback'):
+        feedback = FEEDBACK_TABLE.feedback(data, emotion=emotion_analysis, rules=rules)
+    with timer.stage('resources'):
+        resources = FEEDBACK_TABLE.resources(data, rules=rules)
+
+    return {
+        'success': True,
+        'wellness_score': round(wellness_score, 2),
+        'burnout_level': burnout_level,
+        'resources': resources,
+        'feedback': feedback,
+        'emotion_analysis': emotion_analysis
     }
 
-    resources = {"title": "🎯 Suggested Campus Resources", "items": []}
-
-    if burnout_level == "High":
-        resources["items"].extend([
-            {"name": "🧠 Counseling Services", "url": "https://www.uidaho.edu/current-students/cmhc",
-             "description": "Free short-term counseling and mental health support."},
-            {"name": "📘 TRIO Student Support Services", "url": "https://www.uidaho.edu/current-students/academic-support/asp/sss",
-             "description": "Academic advising, tutoring, and life coaching for eligible students."},
-            {"name": "🏛️ Vandal Success Center", "url": "https://www.uidaho.edu/current-students/academic-support/asp",
-             "description": "Tutoring, time management, and academic skills help."},
-        ])
-
-    elif burnout_level == "Moderate":
-        # Conditional adds
-        if data:
-            if data.get("stress", 3) >= 4 or data.get("anxiety", 3) >= 4:
-                resources["items"].append({"name": "🧘 Mindfulness Workshops",
-                                           "description": "Practical tools for stress & anxiety."})
-            if data.get("focus", 3) <= 2 or data.get("sleep", 3) <= 2:
-                resources["items"].append({"name": "📎 Tutoring Services",
-                                           "description": "Extra support for challenging classes."})
-            if data.get("motivation", 3) <= 2:
-                resources["items"].append({"name": "📚 Academic Coaching",
-                                           "description": "Accountability and strategies for staying on track."})
-
-        # Add positive engagement
-        resources["items"].extend([
-            {"name": "🏋️ Student Rec Center", "url": VANDAL_LINKS["rec"],
-             "description": "Gym, sports courts, and rock climbing wall."},
-            {"name": "🏊 Swim Center (free with student ID)", "url": VANDAL_LINKS["swim"],
-             "description": "Refresh yourself at open swim hours."}
-        ])
-
-    elif burnout_level == "Low":
-        resources["items"].extend([
-            {"name": "🎉 Keep up the great work!", "description": "Stay balanced and enjoy yourself."},
-            {"name": "🏈 Vandal Athletics", "url": VANDAL_LINKS["athletics"],
-             "description": "Check schedules for football, basketball, volleyball and more."},
-            {"name": "🤝 Peer Mentoring", "description": "Support others and build connections."},
-            {"name": "🏋️ Student Rec Center", "url": VANDAL_LINKS["rec"],
-             "description": "Stay active with gym, games, or climbing."},
-        ])
-
-    # Food support if needed
-    if data and data.get("food_security", 3) <= 2:
-        resources["items"].insert(0, {
-            "name": "🍽️ Vandal Food Pantry & Food Resources",
-            "url": "https://www.uidaho.edu/current-students/dean-of-students/student-care/food-insecurity",
-            "description": "Free groceries and support if money/food is tight."
-        })
-
-    # Cap at 4 items → keep it short and relevant
-    resources["items"] = resources["items"][:4]
-
-    return resources
-
-
-# ---------- Feedback
-def generate_advanced_feedback(data, emotion=None):
+SHED_RETRY_AFTER = "1"
+
+def busy_response():
+    """503 for a check-in shed under EMOTION_SHED=503."""
+    response = jsonify({'error': 'The server is busy, please try again in a moment.', 'type': 'busy'})
+    response.headers['Retry-After'] = SHED_RETRY_AFTER
+    return response, 503
+
+def rate_limited(retry_after):
+    return ({'error': 'Too many check-ins from this device. Please wait a moment and try again.',
+             'type': 'rate_limited'}, 429, retry_after)
+
+def submit_too_large(content_length=None):
+    """The check made before the body is read: its declared size. None or (error_body, status, retry_after)."""
+    if content_length is not None and content_length > SUBMIT_MAX_BYTES:
+        if ADMISSION_CONTROL:
+            ADMISSION_CONTROL.reject('body_too_large')
+        return {'error': 'Check-in is too large.', 'type': 'validation'}, 413, None
+    return None
+
+def admit_checkin(address, data, key, claimed):
     """
-    Build short, varied, targeted feedback based on slider signals + journal.
-    Returns 2–4 sentences, plus Farmers Market suggestion when appetite is low.
+    Charge a validated check-in once it has claimed its dedup key: the
+    journal cost if it has one, else the slider cost. Replays and coalesced
+    duplicates aren't charged. A rejected leader releases its claim, so
+    waiting duplicates get the same 429. None or a rejection.
     """
-    mood = data['mood']
-    stress = data['stress']
-    focus = data['focus']
-    sleep = data['sleep']
-    motivation = data['motivation']
-    anxiety = data['anxiety']
-    appetite = data['appetite']
-    food_security = data.get('food_security', 3)
-    journal = (data.get('journal') or "").strip()
-
-    hi = lambda v: v >= 4
-    lo = lambda v: v <= 2
-    ok = lambda v: v == 3
-
-    signals = {
-        "mood_hi": hi(mood), "mood_lo": lo(mood),
-        "stress_hi": hi(stress), "stress_lo": lo(stress),
-        "focus_hi": hi(focus), "focus_lo": lo(focus),
-        "sleep_hi": hi(sleep), "sleep_lo": lo(sleep),
-        "motivation_hi": hi(motivation), "motivation_lo": lo(motivation),
-        "anxiety_hi": hi(anxiety), "anxiety_lo": lo(anxiety),
-        "appetite_hi": hi(appetite), "appetite_lo": lo(appetite), "appetite_ok": ok(appetite),
-        "food_low": food_security <= 2,
-    }
+    how, value = claimed
+    if ADMISSION_CONTROL is None or how != 'leader':
+        return None
+    cost = JOURNAL_COST if journal_text(data) else SLIDER_COST
+    retry_after = ADMISSION_CONTROL.charge(ADMISSION_CONTROL.client_key(address), cost)
+    if not retry_after:
+        return None
+    if value is not None:
+        DEDUP.settle(key, value, error=RateLimited(retry_after))
+    return rate_limited(retry_after)
 
-    # Priority care if multiple core areas low
-    core = [mood, focus, sleep, motivation]
-    priority = []
-    if sum(1 for v in core if v <= 2) >= 3:
-        priority.append(_pick([
-            "🚩 Several areas look tough today. Consider reaching out to a counselor or a trusted person—support can make things lighter.",
-            "🚩 You flagged a few low spots. A quick check-in with campus support or a friend could really help right now."
-        ], f"{date.today()}-priority"))
-
-    # Combo tips
-    combos = []
-    if signals["stress_hi"] and signals["sleep_lo"]:
-        combos.append(_pick([
-            "High stress + poor sleep—try a gentle wind-down tonight and limit screens 60 minutes before bed.",
-            "Stress and sleep are clashing—short breathing sets and a set lights-out time can help."
-        ], f"{date.today()}-combo1"))
-
-    if signals["mood_hi"] and signals["focus_lo"]:
-        combos.append(_pick([
-            "Mood is good but focus is off—try a 20-minute distraction-free block to get rolling.",
-            "Feeling upbeat but unfocused—set one tiny, clear task and start there."
-        ], f"{date.today()}-combo2"))
-
-    if signals["motivation_lo"] and signals["appetite_lo"]:
-        combos.append(_pick([
-            "Motivation and appetite are low—take it easy and aim for small, regular snacks.",
-            "Low drive + low appetite—be kind to yourself; quick, simple nutrition can help your energy."
-        ], f"{date.today()}-combo3"))
-
-    if signals["appetite_lo"] and signals["stress_hi"]:
-        combos.append("Poor appetite with high stress—schedule small snacks and hydration breaks.")
-    if signals["anxiety_hi"] and signals["sleep_lo"]:
-        combos.append("High anxiety and rough sleep—try a calming routine before bed (dim lights, slow breaths).")
-    if signals["motivation_lo"] and signals["mood_lo"]:
-        combos.append("Motivation and mood are both low—pick a super-small win to start momentum.")
-    if signals["stress_hi"] and signals["anxiety_hi"]:
-        combos.append("Stress and anxiety are high—2–3 minutes of paced breathing can help ground you.")
-    if signals["mood_hi"] and signals["stress_hi"]:
-        combos.append("Good mood under stress—keep leaning on the coping skills that are working.")
-
-    # Single-slider tips (short + positive)
-    singles = []
-    if signals["mood_lo"]:
-        singles.append("Mood is low—tiny pleasures or a quick chat with a friend can help.")
-    elif signals["mood_hi"]:
-        singles.append("Great mood—keep feeding it with things that feel good.")
-    if signals["stress_hi"]:
-        singles.append("Stress is high—take a 5-minute breathing or stretch break.")
-    elif signals["stress_lo"]:
-        singles.append("Low stress—nice work pacing your workload.")
-    if signals["focus_lo"]:
-        singles.append("Focus is low—try a Pomodoro block with notifications off.")
-    elif signals["focus_hi"]:
-        singles.append("Focus looks strong—tackle a priority while the groove is there.")
-    if signals["sleep_lo"]:
-        singles.append("Sleep was rough—if possible, plan a wind-down and protect tonight’s rest.")
-    elif signals["sleep_hi"]:
-        singles.append("Great sleep—everything benefits from that.")
-    if signals["motivation_lo"]:
-        singles.append("Motivation is low—set a 2-minute starter task.")
-    elif signals["motivation_hi"]:
-        singles.append("Motivation is high—aim it at your most important task.")
-    if signals["anxiety_hi"]:
-        singles.append("Anxiety is high—try a short grounding exercise (5-4-3-2-1).")
-    elif signals["anxiety_lo"]:
-        singles.append("Low anxiety—keep up what’s helping you stay calm.")
-    if signals["appetite_lo"]:
-        singles.append("Appetite is low—don’t skip meals; light, regular snacks help.")
-    elif signals["appetite_hi"]:
-        singles.append("Strong appetite—lean into nourishing, balanced meals.")
-    elif signals["appetite_ok"]:
-        singles.append("Balanced appetite—good sign for steady energy.")
-
-    # Journal-aware nudges
-    journal_lines = []
-    low = journal.lower()
-    if _has(low, "exam", "midterm", "final", "quiz", "deadline", "assignment", "paper"):
-        journal_lines.append("Deadlines ahead—map the next small step and a short, focused block.")
-    if _has(low, "money", "rent", "bills", "food", "groceries"):
-        journal_lines.append("Money stress is heavy—if food feels tight, campus resources can help.")
-    if _has(low, "roommate", "conflict", "fight", "argue"):
-        journal_lines.append("Roommate tension—try a calm check-in or ask a neutral friend/RA for perspective.")
-    if _has(low, "homesick", "lonely", "alone"):
-        journal_lines.append("Homesick happens—brief social time or a familiar routine can help.")
-
-    # Emotion tone softener
-    if emotion and emotion.get("emotion") in {"sadness", "fear", "anger", "anxiety"} and emotion.get("confidence", 0) > 0.7:
-        journal_lines.append("Thanks for sharing—what you're feeling makes sense. Small steps count.")
-
-    # Risk-gated campus suggestion
-    wellness_score = calculate_wellness_score(data)
-    level = get_burnout_level(wellness_score)
-    campus = []
-    if level in ("Low", "Moderate"):
-        campus_pools = [
-            f"Recharge with something fun—check Vandal Athletics at <a href='{VANDAL_LINKS['athletics']}' target='_blank' rel='noopener'>govandals.com</a> and catch a game.",
-            f"Swim is free for students during public hours—see <a href='{VANDAL_LINKS['swim']}' target='_blank' rel='noopener'>Swim Center</a> info.",
-            f"Drop by the Student Rec Center—gym, courts, even climbing: <a href='{VANDAL_LINKS['rec']}' target='_blank' rel='noopener'>Rec Center</a>."
-        ]
-        campus.append(_pick(campus_pools, f"{date.today()}-campus"))
-
-    # Food security mention
-    food_lines = []
-    if signals["food_low"]:
-        food_lines.append("If meals are tight, you’re not alone—campus and local options can help with groceries.")
-
-    # Assemble final 2–4 sentences (priority → one combo → one single → maybe journal → maybe campus → maybe food)
-    seed_key = f"{date.today()}-{mood}{stress}{focus}{sleep}{motivation}{anxiety}{appetite}{food_security}-{journal[:40]}"
-    lines = []
-    if priority:
-        lines.append(priority[0])
-    if combos:
-        lines.append(combos[0])
-    if singles:
-        lines.append(_pick(singles, seed_key))
-    if journal_lines:
-        lines.append(_pick(journal_lines, seed_key))
-    if campus:
-        lines.append(campus[0])
-    if food_lines:
-        lines.append(food_lines[0])
-
-    # Farmers Market add-on if appetite low
-    farmers_market_message = None
-    if appetite <= 2:
-        farmers_market_message = (
-            "🍎 To gently spark appetite, try the "
-            "<a href='https://www.ci.moscow.id.us/197/Community-Events-Moscow-Farmers-Market' "
-            "target='_blank' rel='noopener'>Moscow Farmers Market</a> on Saturdays (May–Oct, 8am–1pm)."
-        )
-
-    # De-dupe, trim
-    seen = set(); final = []
-    for s in lines:
-        if s and s not in seen:
-            final.append(s); seen.add(s)
-    final = final[:4]
-    if not final:
-        final = ["Your responses look balanced today. Keep prioritizing your well-being!"]
-    if farmers_market_message:
-        final.append(farmers_market_message)
-
-    return " ".join(final)
+def batch_too_large():
+    if ADMISSION_CONTROL:
+        ADMISSION_CONTROL.reject('batch_too_large')
+    return {'error': f'Batches are limited to {BATCH_MAX_ROWS} rows.', 'type': 'validation'}, 413, None
 
-# ---------- Optional journal emotion
-def analyze_journal_emotion(journal_text):
-    """Emotion analysis with simple negation overrides; lazily load transformer."""
-    txt = (journal_text or "").strip()
-    if not txt or not USE_EMOTION:
+def admit_batch(address, content_length):
+    """
+    Checks made before a batch is read: its declared size, then the
+    slider-only charge. Returns (client_key, rejection).
+    """
+    if content_length is not None and content_length > BATCH_MAX_BYTES:
+        return None, batch_too_large()
+    if ADMISSION_CONTROL is None:
+        return None, None
+    client = ADMISSION_CONTROL.client_key(address)
+    retry_after = ADMISSION_CONTROL.charge(client, SLIDER_COST)
+    return client, (rate_limited(retry_after) if retry_after else None)
+
+def admit_rows(client, rows):
+    """The rest of a batch's cost, BATCH_ROW_COST per row, once it is parsed; None or a rejection."""
+    cost = rows * BATCH_ROW_COST - SLIDER_COST
+    if client is None or cost <= 0:
         return None
+    retry_after = ADMISSION_CONTROL.charge(client, cost, count=False)
+    return rate_limited(retry_after) if retry_after else None
+
+def rejection_response(rejection):
+    body, status, retry_after = rejection
+    response = jsonify(body)
+    if retry_after:
+        response.headers['Retry-After'] = str(retry_after)
+    return response, status
+
+ANON_ID_MAX_LEN = 128
+
+def anon_id_ok(anon_id):
+    return isinstance(anon_id, str) and 0 < len(anon_id) <= ANON_ID_MAX_LEN
+
+def record_checkin(data, response):
+    """Feed a scored check-in to the cohort aggregates and, with an anonymous id, the history log."""
+    if COHORT is None and HISTORY is None:
+        return
+    score = calculate_wellness_score(data)
+    if COHORT is not None:
+        COHORT.add(data, score, response['burnout_level'])
+    if HISTORY is not None and anon_id_ok(data.get('anon_id')):
+        HISTORY.append(data['anon_id'], data, score,
+                       response['burnout_level'], response['emotion_analysis'])
+
+def process_checkin(data, timer=NULL_TIMER):
+    """Emotion, response and recording for a validated check-in; returns (response, complete)."""
+    # Emotion (if any) BEFORE feedback so we can use it
+    emotion_analysis = None
+    journal = journal_text(data)
+    if journal:
+        emotion_analysis = analyze_journal_emotion(journal, timer)
+
+    response = build_checkin_response(data, emotion_analysis, timer)
+    record_checkin(data, response)
+    # Emotion skipped under load: fine for duplicates already waiting, not worth replaying.
+    complete = not (journal and USE_EMOTION and emotion_analysis is None)
+    return response, complete
+
+def slider_result(data, timer=NULL_TIMER, rules=None):
+    """
+    The response without emotion (complete for a check-in without a journal)
+    and the journal still to analyze, if any. First half of a streamed submit.
+    """
+    journal = journal_text(data) if USE_EMOTION else None
+    return build_checkin_response(data, None, timer, rules), journal
+
+def finish_checkin(data, first, journal, emotion_analysis, timer=NULL_TIMER, rules=None):
+    """
+    Fold the journal's emotion into slider_result's response and record it;
+    returns (response, complete). Pass slider_result's ruleset so a reload in
+    between can't mix versions.
+    """
+    response = first
+    if journal:
+        with timer.stage('feedback'):
+            feedback = FEEDBACK_TABLE.feedback(data, emotion=emotion_analysis, rules=rules)
+        response = {**first, 'feedback': feedback, 'emotion_analysis': emotion_analysis}
+    record_checkin(data, response)
+    return response, not (journal and emotion_analysis is None)
+
+def result_event(response, pending, how='leader'):
+    """First line of a streamed submit: the whole response shape, emotion_analysis still null if pending."""
+    event = {'event': 'result', **response, 'emotion_pending': pending}
+    if how != 'leader':
+        event['replay'] = how
+    return event
+
+def emotion_event(response):
+    """Second line: the emotion and the feedback it softened, replacing the first line's feedback."""
+    return {'event': 'emotion', 'emotion_analysis': response['emotion_analysis'], 'feedback': response['feedback']}
+
+def error_event(error):
+    if isinstance(error, (QueueSaturated, FutureTimeout)):
+        return {'event': 'error', 'error': 'The server is busy, please try again in a moment.', 'type': 'busy'}
+    METRICS.error('submit')
+    return {'event': 'error', 'error': str(error)}
+
+def ndjson_line(event):
+    return app.json.dumps(event) + '\n'
+
+def stream_checkin(data, key, timer, claimed):
+    """
+    NDJSON lines for a streamed submit: slider_result as soon as it's ready,
+    then, for a journal, the emotion once inference finishes. Duplicates of
+    an in-flight or recent check-in get the finished response in one line.
+    `claimed` is claim_submit(key), taken before the response starts.
+    """
+    how, value = claimed
+    try:
+        if how != 'leader':
+            response = value if how == 'replayed' else value.result(timeout=DEDUP_WAIT_S)
+            yield ndjson_line(result_event(response, False, how))
+            return
+        rules = RULES.current()
+        first, journal = slider_result(data, timer, rules)
+        yield ndjson_line(result_event(first, bool(journal)))
+        emotion_analysis = analyze_journal_emotion(journal, timer) if journal else None
+        response, complete = finish_checkin(data, first, journal, emotion_analysis, timer, rules)
+    except GeneratorExit:
+        # Client went away between lines; waiters retry rather than hang.
+        if value is not None and how == 'leader':
+            DEDUP.settle(key, value, error=ConnectionAbortedError('client disconnected'))
+        raise
+    except Exception as e:
+        if value is not None and how == 'leader':
+            DEDUP.settle(key, value, error=e)
+        yield ndjson_line(error_event(e))
+        return
+    if value is not None:
+        DEDUP.settle(key, value, response, store=complete)
+    if journal:
+        yield ndjson_line(emotion_event(response))
+    timer.finish()
+
+def wants_stream(accept):
+    return 'application/x-ndjson' in (accept or '')
+
+def claim_submit(key):
+    """DEDUP.claim(key), or a leader with nothing to settle when the submit isn't deduplicated."""
+    return DEDUP.claim(key) if key is not None else ('leader', None)
+
+def single_flight(key, claimed, compute):
+    """compute() once per dedup key; returns (response, how) with how = leader, coalesced or replayed."""
+    how, value = claimed
+    if value is None:
+        return compute()[0], 'leader'
+    if how == 'replayed':
+        return value, how
+    if how == 'coalesced':
+        return value.result(timeout=DEDUP_WAIT_S), how
     try:
-        low = txt.lower()
-        if re.search(r"not[\s\w]*sad", low):
-            return {"emotion": "neutral", "confidence": 1.0}
-        if re.search(r"not[\s\w]*(happy|good)", low):
-            return {"emotion": "sadness", "confidence": 0.9}
-        if re.search(r"not[\s\w]*stressed", low):
-            return {"emotion": "calm", "confidence": 0.95}
-
-        global EMOTION_PIPELINE
-        if EMOTION_PIPELINE is None:
-            from transformers import pipeline
-            EMOTION_PIPELINE = pipeline(
-                "text-classification",
-                model="bhadresh-savani/distilbert-base-uncased-emotion",
-                return_all_scores=True
-            )
-        result = EMOTION_PIPELINE(txt)[0]
-        top = max(result, key=lambda x: x['score'])
-        return {"emotion": top['label'], "confidence": float(top['score'])}
+        response, complete = compute()
     except Exception as e:
-        print(f"[emotion] error: {e}")
-        return {"emotion": "neutral", "confidence": 0.5}
+        DEDUP.settle(key, value, error=e)
+        raise
+    DEDUP.settle(key, value, response, store=complete)
+    return response, how
 
-# ---------- Routes
-@app.route('/')
-def index():
-    return render_template('index.html')
+KEY_REUSED = {'error': 'This Idempotency-Key was already used for a different check-in.', 'type': 'idempotency'}
+
+def with_server_timing(response, timer):
+    """Record the request's stage timings and expose them as a Server-Timing header."""
+    header = timer.finish()
+    if header:
+        response.headers['Server-Timing'] = header
+    return response
 
 @app.route('/api/submit', methods=['POST'])
 def submit_checkin():
     """Process wellness check-in submission."""
+    timer = METRICS.timer()
     try:
-        data = request.get_json()
-
-        # Validate required fields
-        required_fields = ['mood', 'stress', 'focus', 'sleep', 'motivation', 'anxiety', 'appetite', 'food_security']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing field: {field}'}), 400
-
-        # Reject all-default (3) submissions
-        if all(data[field] == 3 for field in required_fields):
-            return jsonify({
-                'error': "It looks like you haven't updated any inputs. Please adjust them to reflect your current state.",
-                'type': 'validation'
-            }), 400
-
-        # Calculate core metrics
-        wellness_score = calculate_wellness_score(data)
-        burnout_level = get_burnout_level(wellness_score)
-
-        # Emotion (if any) BEFORE feedback so we can use it
-        emotion_analysis = None
-        if 'journal' in data and (data['journal'] or '').strip():
-            emotion_analysis = analyze_journal_emotion(data['journal'])
-
-        # Personalized feedback + resources
-        feedback = generate_advanced_feedback(data, emotion=emotion_analysis)
-        resources = get_resources(burnout_level, data)
-
-        response = {
-            'success': True,
-            'wellness_score': round(wellness_score, 2),
-            'burnout_level': burnout_level,
-            'resources': resources,
-            'feedback': feedback,
-            'emotion_analysis': emotion_analysis
-        }
-        return jsonify(response)
-
+        rejected = submit_too_large(request.content_length)
+        if rejected:
+            return rejection_response(rejected)
+        with timer.stage('validate'):
+            data = request.get_json()
+            invalid = validate_checkin(data)
+        if invalid:
+            return with_server_timing(jsonify(invalid[0]), timer), invalid[1]
+
+        key = submit_key(data, request.headers.get('Idempotency-Key')) if DEDUP else None
+        claimed = claim_submit(key)
+        rejected = admit_checkin(client_address(request.remote_addr, request.headers.get('X-Forwarded-For')),
+                                 data, key, claimed)
+        if rejected:
+            return rejection_response(rejected)
+        if wants_stream(request.headers.get('Accept')):
+            return Response(stream_checkin(data, key, timer, claimed), mimetype='application/x-ndjson',
+                            headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+        response, how = single_flight(key, claimed, lambda: process_checkin(data, timer))
+        with timer.stage('serialize'):
+            body = jsonify(response)
+        if how != 'leader':
+            body.headers['Idempotent-Replay'] = how
+        return with_server_timing(body, timer)
+
+    except KeyReused:
+        return jsonify(KEY_REUSED), 422
+    except RateLimited as e:
+        return rejection_response(rate_limited(e.retry_after))
+    except (QueueSaturated, FutureTimeout):
+        return busy_response()
     except Exception as e:
+        METRICS.error('submit')
         return jsonify({'error': str(e)}), 500
 
+BATCH_CHUNK_ROWS = 5000
+
+@app.route('/api/submit/batch', methods=['POST'])
+def submit_batch():
+    """
+    Score a columnar batch of check-ins (JSON columns, JSON rows or CSV) and
+    stream back one result per row as NDJSON (default) or CSV (?format=csv).
+    """
+    client, rejected = admit_batch(client_address(request.remote_addr, request.headers.get('X-Forwarded-For')),
+                                   request.content_length)
+    if rejected:
+        return rejection_response(rejected)
+    # numpy loads with the first batch, not at startup (lite deployments).
+    from bulk_scoring import BatchError, read_csv, score_batch, to_matrix
+    try:
+        if (request.mimetype or '') == 'text/csv':
+            batch = read_csv(request.get_data(as_text=True))
+        else:
+            batch = request.get_json()
+            if isinstance(batch, dict) and 'rows' in batch:
+                batch = batch['rows']
+        ids = None
+        if isinstance(batch, dict) and 'id' in batch:
+            ids = list(batch['id'])
+        elif hasattr(batch, 'columns') and 'id' in batch.columns:
+            ids = batch['id'].tolist()
+        elif isinstance(batch, list):
+            ids = [row.get('id') for row in batch] if any('id' in row for row in batch) else None
+        matrix = to_matrix(batch)
+    except (BatchError, AttributeError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    if len(matrix) > BATCH_MAX_ROWS:
+        return rejection_response(batch_too_large())
+    if ids is not None and len(ids) != len(matrix):
+        return jsonify({'error': f'id has {len(ids)} values for {len(matrix)} rows'}), 400
+    rejected = admit_rows(client, len(matrix))
+    if rejected:
+        return rejection_response(rejected)
+    scores, levels = score_batch(matrix)
+
+    as_csv = request.args.get('format') == 'csv'
+
+    def generate_csv():
+        # csv.writer quotes ids that contain commas, quotes or newlines.
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(['id', 'wellness_score', 'burnout_level'] if ids else ['wellness_score', 'burnout_level'])
+        for start in range(0, len(scores), BATCH_CHUNK_ROWS):
+            end = min(start + BATCH_CHUNK_ROWS, len(scores))
+            rounded = [round(float(s), 2) for s in scores[start:end]]
+            writer.writerows(zip(ids[start:end], rounded, levels[start:end]) if ids
+                             else zip(rounded, levels[start:end]))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    def generate():
+        for start in range(0, len(scores), BATCH_CHUNK_ROWS):
+            out = []
+            for i in range(start, min(start + BATCH_CHUNK_ROWS, len(scores))):
+                row = {'wellness_score': round(float(scores[i]), 2), 'burnout_level': levels[i]}
+                if ids:
+                    row = {'id': ids[i], **row}
+                out.append(json.dumps(row, ensure_ascii=False))
+            yield "\n".join(out) + "\n"
+
+    if as_csv:
+        return Response(generate_csv(), mimetype='text/csv')
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/api/emojis')
 def get_emojis():
+    if EMOJIS_PAGE:
+        return prebuilt_response(EMOJIS_PAGE)
     return jsonify(EMOJIS)
 
+@app.route('/api/history')
+def history():
+    """Rolling 7/30-day averages and trend for one anonymous id (?anon_id=...)."""
+    if HISTORY is None:
+        return jsonify({'error': 'Check-in history is not enabled'}), 404
+    anon_id = request.args.get('anon_id', '')
+    if not anon_id_ok(anon_id):
+        return jsonify({'error': 'Missing or invalid anon_id'}), 400
+    return jsonify({'success': True, **HISTORY.trends(anon_id)})
+
+@app.route('/api/stats')
+def cohort_stats():
+    """Cohort burnout counts, averages and score histogram per minute/hour/day bucket."""
+    if COHORT is None:
+        return jsonify({'error': 'Cohort stats are not enabled'}), 404
+    grain = request.args.get('grain', 'day')
+    if grain not in GRAINS:
+        return jsonify({'error': f"grain must be one of {', '.join(GRAINS)}"}), 400
+    buckets = request.args.get('buckets', 7, type=int)
+    return jsonify(COHORT.query(grain, buckets))
+
+@app.route('/api/emotion/stats')
+def emotion_stats():
+    stats = {"enabled": USE_EMOTION, "batcher": EMOTION_ENGINE.stats(),
+             "cache": EMOTION_CACHE.stats(), "model": model_status(),
+             "chunking": dict(CHUNK_STATS), "memory": process_memory(),
+             "breaker": EMOTION_BREAKER.stats()}
+    if EMOTION_POOL:
+        stats["pool"] = EMOTION_POOL.stats()
+    if EMOTION_CASCADE:
+        stats["cascade"] = EMOTION_CASCADE.stats()
+    return jsonify(stats)
+
+@app.route('/api/feedback/stats')
+def feedback_stats():
+    """Loaded feedback rules version and reloads, and the feedback table for this worker."""
+    return jsonify({"rules": RULES.stats(), "table": FEEDBACK_TABLE.stats()})
+
+def app_metrics():
+    """Scrape-time gauges and counters for /metrics."""
+    status = model_status()
+    cache = EMOTION_CACHE.stats()
+    batcher = EMOTION_ENGINE.stats()
+    breaker = EMOTION_BREAKER.stats()
+    table = FEEDBACK_TABLE.stats()
+    rules = RULES.stats()
+    families = [
+        ("mindguard_emotion_enabled", "gauge", "1 when journal emotion analysis is on.",
+         [({}, int(USE_EMOTION))]),
+        ("mindguard_model_ready", "gauge", "1 once the emotion model is loaded and warm.",
+         [({"backend": status["backend"]}, int(status["ready"]))]),
+        ("mindguard_model_load_seconds", "gauge", "Time taken to load the emotion model.",
+         [({"backend": status["backend"]}, status["load_seconds"])]),
+        ("mindguard_model_warmup_seconds", "gauge", "Time taken by the warm-up inference.",
+         [({"backend": status["backend"]}, status["warmup_seconds"])]),
+        ("mindguard_emotion_cache_lookups_total", "counter", "Emotion cache lookups by result.",
+         [({"result": "hit"}, cache["hits"]), ({"result": "disk_hit"}, cache["disk_hits"]),
+          ({"result": "miss"}, cache["misses"])]),
+        ("mindguard_emotion_cache_hit_ratio", "gauge", "Share of emotion cache lookups served from cache.",
+         [({}, cache["hit_rate"])]),
+        ("mindguard_emotion_cache_errors_total", "counter", "SQLite emotion cache errors.",
+         [({}, cache["disk_errors"])]),
+        ("mindguard_emotion_queue_depth", "gauge", "Journals waiting for the micro-batcher.",
+         [({}, batcher["queue_depth"])]),
+        ("mindguard_emotion_batcher_events_total", "counter",
+         "Journals shed on a full queue, dropped after their caller timed out, and failed batches.",
+         [({"event": "saturated"}, batcher["saturated"]), ({"event": "expired"}, batcher["expired"]),
+          ({"event": "error"}, batcher["errors"])]),
+        ("mindguard_emotion_breaker_state", "gauge", "Emotion circuit breaker state (1 for the current one).",
+         [({"state": state}, int(breaker["state"] == state)) for state in STATES]),
+        ("mindguard_emotion_breaker_trips_total", "counter", "Times the emotion circuit breaker opened.",
+         [({}, breaker["trips"])]),
+        ("mindguard_emotion_inference_failures_total", "counter",
+         "Model calls past EMOTION_TIMEOUT_MS or raising an error.",
+         [({"kind": "timeout"}, breaker["timeouts"]), ({"kind": "error"}, breaker["errors"])]),
+        ("mindguard_emotion_breaker_short_circuited_total", "counter",
+         "Journals answered without the model because the breaker was open.",
+         [({}, breaker["short_circuited"])]),
+        ("mindguard_feedback_table_lookups_total", "counter", "Feedback table lookups by result.",
+         [({"result": "hit"}, table["hits"]), ({"result": "miss"}, table["misses"]),
+          ({"result": "fallback"}, table["fallbacks"])]),
+        ("mindguard_feedback_rules_info", "gauge", "Version (content hash) of the loaded feedback rules.",
+         [({"version": rules["version"]}, 1)]),
+        ("mindguard_feedback_rules_reloads_total", "counter",
+         "Feedback rules file reloads: swapped in (ok) or rejected and kept the old rules (error).",
+         [({"result": "ok"}, rules["reloads"]), ({"result": "error"}, rules["reload_errors"])]),
+    ]
+    if DEDUP:
+        dedup = DEDUP.stats()
+        families += [
+            ("mindguard_submit_dedup_total", "counter",
+             "Check-ins computed vs. served from a duplicate's computation (coalesced) or replayed, or refused "
+             "because their Idempotency-Key was used for a different check-in (rejected).",
+             [({"outcome": "computed"}, dedup["computed"]), ({"outcome": "coalesced"}, dedup["coalesced"]),
+              ({"outcome": "replayed"}, dedup["replayed"]), ({"outcome": "failed"}, dedup["failed"]),
+              ({"outcome": "rejected"}, dedup["rejected"])]),
+            ("mindguard_submit_dedup_stored", "gauge", "Check-in results kept for replay.",
+             [({}, dedup["stored"])]),
+        ]
+    if ADMISSION_CONTROL:
+        admission = ADMISSION_CONTROL.stats()
+        fill = [({"bucket": "clients_mean"}, admission["clients_fill"])]
+        if admission["global_fill"] is not None:
+            fill.append(({"bucket": "global"}, admission["global_fill"]))
+        families += [
+            ("mindguard_admission_admitted_total", "counter", "Submits past the pre-parse admission check.",
+             [({}, admission["admitted"])]),
+            ("mindguard_admission_rejected_total", "counter",
+             "Submits turned away: out of tokens (client/global) or over the size limits.",
+             [({"reason": reason}, n) for reason, n in admission["rejected"].items()]),
+            ("mindguard_admission_bucket_fill_ratio", "gauge",
+             "Token bucket fill (1 = full): mean over tracked clients, and the global bucket.", fill),
+            ("mindguard_admission_clients_tracked", "gauge", "Clients with a bucket that isn't full yet.",
+             [({}, admission["clients_tracked"])]),
+            ("mindguard_admission_clients_limited", "gauge",
+             "Clients without enough tokens left for a journal check-in.",
+             [({}, admission["clients_below_journal_cost"])]),
+            ("mindguard_admission_store_errors_total", "counter", "Admission store errors (requests let through).",
+             [({}, admission["store_errors"])]),
+        ]
+    if EMOTION_CASCADE:
+        cascade = EMOTION_CASCADE.stats()
+        families += [
+            ("mindguard_emotion_cascade_total", "counter",
+             "Journals the local classifier answered vs. escalated to the model.",
+             [({"outcome": "answered"}, cascade["answered"]), ({"outcome": "escalated"}, cascade["escalated"])]),
+            ("mindguard_emotion_cascade_escalated_ratio", "gauge",
+             "Share of journals reaching the cascade that escalated to the model.",
+             [({"threshold": str(cascade["threshold"])}, cascade["escalated_fraction"])]),
+        ]
+    return families
+
+METRICS.add_collector(app_metrics)
+
+@app.route('/metrics')
+def metrics():
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health')
 def health():
+    # Only report ready once the emotion model is loaded and warm.
+    if USE_EMOTION and EMOTION_POOL:
+        pool = EMOTION_POOL.stats()
+        ok = pool.get("ready_procs", 0) > 0
+        return jsonify({"ok": ok, "pool": pool}), 200 if ok else 503
+    if USE_EMOTION:
+        status = model_status()
+        if not status["ready"]:
+            return jsonify({"ok": False, "model": status}), 503
+        return jsonify({"ok": True, "model": status}), 200
     return jsonify({"ok": True}), 200
 
 if __name__ == '__main__':
@@ -0,0 +1,282 @@
+"""
+Async (ASGI) serving mode, alongside the sync `gunicorn app:app`:
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+/api/submit (including its streamed NDJSON variant), /api/emojis, /health,
+the prebuilt page shell and static files (static_cache.py) are handled on
+the event loop: scoring and feedback run inline (microseconds), while
+journal emotion inference is offloaded to a bounded thread pool with the
+same EMOTION_TIMEOUT_MS deadline as the sync mode (circuit_breaker.py). If
+the pool is full or the deadline passes, the response is sent without
+`emotion_analysis` instead of stalling. The admission charge and recording
+(SQLite, history appends) can block on disk or a lock, so they run on the
+loop's default executor. A body larger than SUBMIT_MAX_BYTES gets a 413. Every other route is passed through
+to the Flask app, so behaviour and templates are shared.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as flask_app
+
+EMOTION_WORKERS = int(os.getenv("ASYNC_EMOTION_WORKERS", "8"))
+# In-flight emotion calls allowed beyond the worker threads before new ones are skipped.
+EMOTION_PENDING_MAX = int(os.getenv("ASYNC_EMOTION_PENDING_MAX", "64"))
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=EMOTION_WORKERS, thread_name_prefix="emotion-offload")
+_wsgi = WsgiToAsgi(flask_app.app)
+
+STATS = {"offloaded": 0, "timeouts": 0, "skipped_busy": 0, "in_flight": 0}
+
+
+def _dumps(body):
+    # Same serializer settings as Flask's jsonify, so both modes return identical JSON.
+    return flask_app.app.json.dumps(body).encode()
+
+
+async def _send_json(send, body, status=200, headers=()):
+    await _send_payload(send, _dumps(body), status, headers)
+
+
+async def _send_payload(send, payload, status=200, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            (b"access-control-allow-origin", b"*"),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def _send_prebuilt(scope, send, entry, cache_control=None):
+    status, headers, body = entry.respond(_header(scope, b"accept-encoding"), _header(scope, b"if-none-match"),
+                                          cache_control)
+    headers = [(name.lower().encode(), value.encode()) for name, value in headers]
+    headers.append((b"access-control-allow-origin", b"*"))
+    if status != 304:
+        headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+class BodyTooLarge(ValueError):
+    """The body went past the limit while it was being read (no or a wrong Content-Length)."""
+
+    def __init__(self, size):
+        super().__init__("Request body too large")
+        self.size = size
+
+
+async def _read_body(receive, limit):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge(size)
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _off_loop(fn, *args):
+    """Run a blocking call on the loop's default executor (not the emotion pool)."""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+async def analyze_offloaded(journal, timer):
+    """Run analyze_journal_emotion on the pool; None if busy or past the deadline."""
+    if STATS["in_flight"] >= EMOTION_WORKERS + EMOTION_PENDING_MAX:
+        STATS["skipped_busy"] += 1
+        return None
+    loop = asyncio.get_running_loop()
+    STATS["offloaded"] += 1
+    STATS["in_flight"] += 1
+    future = loop.run_in_executor(_EXECUTOR, flask_app.analyze_journal_emotion, journal, timer)
+    future.add_done_callback(lambda _: STATS.__setitem__("in_flight", STATS["in_flight"] - 1))
+    try:
+        # shield: a timed-out call keeps running and still fills the emotion cache.
+        return await asyncio.wait_for(asyncio.shield(future), flask_app.EMOTION_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        STATS["timeouts"] += 1
+        return None
+
+
+def _timing_headers(timer):
+    header = timer.finish()
+    return [(b"server-timing", header.encode())] if header else []
+
+
+async def process_checkin(data, timer):
+    """Async twin of app.process_checkin: emotion offloaded, returns (response, complete)."""
+    emotion_analysis = None
+    journal = flask_app.journal_text(data)
+    if journal and flask_app.USE_EMOTION:
+        emotion_analysis = await analyze_offloaded(journal, timer)
+    response = flask_app.build_checkin_response(data, emotion_analysis, timer)
+    await _off_loop(flask_app.record_checkin, data, response)
+    return response, not (journal and flask_app.USE_EMOTION and emotion_analysis is None)
+
+
+async def single_flight(key, claimed, data, timer):
+    """Async twin of app.single_flight, sharing the same SingleFlight table."""
+    how, value = claimed
+    if value is None:
+        return (await process_checkin(data, timer))[0], "leader"
+    if how == "replayed":
+        return value, how
+    if how == "coalesced":
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(value)), flask_app.DEDUP_WAIT_S), how
+    try:
+        response, complete = await process_checkin(data, timer)
+    except Exception as e:
+        flask_app.DEDUP.settle(key, value, error=e)
+        raise
+    flask_app.DEDUP.settle(key, value, response, store=complete)
+    return response, how
+
+
+async def _send_line(send, event):
+    await send({"type": "http.response.body", "body": flask_app.ndjson_line(event).encode(), "more_body": True})
+
+
+async def stream_checkin(send, data, key, timer, claimed):
+    """Async twin of app.stream_checkin, with the emotion offloaded as in process_checkin."""
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/x-ndjson"), (b"cache-control", b"no-store"),
+                    (b"access-control-allow-origin", b"*")],
+    })
+    how, value = claimed
+    try:
+        if how != "leader":
+            if how == "coalesced":
+                value = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(value)), flask_app.DEDUP_WAIT_S)
+            await _send_line(send, flask_app.result_event(value, False, how))
+        else:
+            rules = flask_app.RULES.current()
+            first, journal = flask_app.slider_result(data, timer, rules)
+            await _send_line(send, flask_app.result_event(first, bool(journal)))
+            emotion_analysis = await analyze_offloaded(journal, timer) if journal else None
+            response, complete = await _off_loop(flask_app.finish_checkin, data, first, journal, emotion_analysis,
+                                                 timer, rules)
+            if value is not None:
+                flask_app.DEDUP.settle(key, value, response, store=complete)
+                value = None
+            if journal:
+                await _send_line(send, flask_app.emotion_event(response))
+            timer.finish()
+    except asyncio.CancelledError:
+        if how == "leader" and value is not None:
+            flask_app.DEDUP.settle(key, value, error=ConnectionAbortedError("client disconnected"))
+        raise
+    except Exception as e:
+        if how == "leader" and value is not None:
+            flask_app.DEDUP.settle(key, value, error=e)
+        await _send_line(send, flask_app.error_event(e))
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _header(scope, name):
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _send_rejection(send, rejection):
+    body, status, retry_after = rejection
+    await _send_json(send, body, status, [(b"retry-after", str(retry_after).encode())] if retry_after else [])
+
+
+async def submit_checkin(scope, receive, send):
+    timer = flask_app.METRICS.timer()
+    try:
+        length = _header(scope, b"content-length")
+        rejected = flask_app.submit_too_large(int(length) if length and length.isdigit() else None)
+        if rejected:
+            return await _send_rejection(send, rejected)
+        body = await _read_body(receive, flask_app.SUBMIT_MAX_BYTES)
+        if body is None:
+            return
+        with timer.stage('validate'):
+            data = json.loads(body or b"null")
+            invalid = flask_app.validate_checkin(data)
+        if invalid:
+            return await _send_json(send, invalid[0], invalid[1], _timing_headers(timer))
+
+        key = flask_app.submit_key(data, _header(scope, b"idempotency-key")) if flask_app.DEDUP else None
+        claimed = flask_app.claim_submit(key)
+        address = flask_app.client_address((scope.get("client") or ("",))[0], _header(scope, b"x-forwarded-for"))
+        rejected = await _off_loop(flask_app.admit_checkin, address, data, key, claimed)
+        if rejected:
+            return await _send_rejection(send, rejected)
+        if flask_app.wants_stream(_header(scope, b"accept")):
+            return await stream_checkin(send, data, key, timer, claimed)
+        response, how = await single_flight(key, claimed, data, timer)
+        with timer.stage('serialize'):
+            payload = _dumps(response)
+        replay = [(b"idempotent-replay", how.encode())] if how != "leader" else []
+        await _send_payload(send, payload, 200, replay + _timing_headers(timer))
+    except BodyTooLarge as e:
+        await _send_rejection(send, flask_app.submit_too_large(e.size))
+    except flask_app.KeyReused:
+        await _send_json(send, flask_app.KEY_REUSED, 422)
+    except flask_app.RateLimited as e:
+        await _send_rejection(send, flask_app.rate_limited(e.retry_after))
+    except (flask_app.QueueSaturated, asyncio.TimeoutError):
+        await _send_json(send, {'error': 'The server is busy, please try again in a moment.', 'type': 'busy'}, 503,
+                         [(b"retry-after", flask_app.SHED_RETRY_AFTER.encode())])
+    except Exception as e:
+        flask_app.METRICS.error('submit')
+        await _send_json(send, {'error': str(e)}, 500)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            _EXECUTOR.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] == "http":
+        path, method = scope["path"], scope["method"]
+        if path == "/api/submit" and method == "POST":
+            return await submit_checkin(scope, receive, send)
+        if path == "/api/emojis" and method == "GET":
+            if flask_app.EMOJIS_PAGE:
+                return await _send_prebuilt(scope, send, flask_app.EMOJIS_PAGE)
+            return await _send_json(send, flask_app.EMOJIS)
+        if flask_app.STATIC_ASSETS and method in ("GET", "HEAD"):
+            if path == "/":
+                return await _send_prebuilt(scope, send, flask_app.INDEX_PAGE)
+            found = path.startswith("/static/") and flask_app.STATIC_ASSETS.get(path[len("/static/"):])
+            if found:
+                return await _send_prebuilt(scope, send, *found)
+        if path == "/health" and method == "GET":
+            with flask_app.app.app_context():
+                response, status = flask_app.health()
+            body = response.get_json()
+            body["async"] = dict(STATS)
+            return await _send_json(send, body, status)
+    return await _wsgi(scope, receive, send)
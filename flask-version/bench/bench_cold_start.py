@@ -0,0 +1,211 @@
+"""
+Cold start of the service for the lite profile (requirements-lite.txt,
+USE_EMOTION=0) and the full one (requirements.txt, USE_EMOTION=1).
+
+For each profile:
+  - `python -X importtime -c "import app"`: total import time, the slowest
+    top-level packages and any heavy package (torch, transformers, pandas,
+    scikit-learn, numpy, matplotlib, seaborn, ...) in the import graph;
+  - `gunicorn app:app`, the render.yaml start command, from exec to the first
+    /health response of any status and to the first 200, plus the RSS of the
+    master and its workers once it answers;
+  - the on-disk size of the installed distributions the requirements file
+    pulls in (with their dependencies), standing in for the image size.
+
+Exits 1 when the lite profile imports a heavy package or its median time to
+the first /health response is over --budget-ms, so CI catches a regression.
+The full profile loads the model from the Hub unless it is cached or
+EMOTION_MODEL_DIR is set; offline, it reports the time to a 503 /health
+after torch and transformers are imported and the load has failed.
+
+    python bench/bench_cold_start.py [--runs 5] [--budget-ms 1500] [--json cold_start.json]
+"""
+import argparse
+import http.client
+import importlib.metadata
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchlib import environment, write_report  # noqa: E402
+from load_submit import free_port  # noqa: E402
+
+HEAVY = ("torch", "transformers", "tokenizers", "pandas", "sklearn", "scipy", "joblib", "numpy",
+         "matplotlib", "seaborn", "onnxruntime")
+PROFILES = {
+    "lite": ("requirements-lite.txt", {"USE_EMOTION": "0"}),
+    "full": ("requirements.txt", {"USE_EMOTION": "1", "HF_HUB_OFFLINE": os.getenv("HF_HUB_OFFLINE", "1")}),
+}
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_profile(env):
+    """Import time of app (ms), self time per top-level package and the heavy packages imported."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=env,
+                         capture_output=True, text=True, timeout=300).stderr
+    total_us, packages = 0, {}
+    for self_us, cumulative_us, indent, name in IMPORT_LINE.findall(out):
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + int(self_us)
+        if name == "app" and not indent:
+            total_us = int(cumulative_us)
+    slowest = sorted(packages.items(), key=lambda kv: -kv[1])[:8]
+    return {
+        "import_app_ms": round(total_us / 1e3, 1),
+        "slowest_packages_ms": {name: round(us / 1e3, 1) for name, us in slowest},
+        "heavy_imported": sorted(name for name in packages if name in HEAVY),
+    }
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            return int(next(line for line in fh if line.startswith("VmRSS")).split()[1]) / 1024
+    except (OSError, StopIteration):
+        return 0.0
+
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as fh:
+            return [int(child) for child in fh.read().split()]
+    except OSError:
+        return []
+
+
+def start_once(env, timeout):
+    """ms from exec to the first /health response and to the first 200; RSS when it first answers."""
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(["gunicorn", "app:app"], cwd=ROOT, env={**env, "PORT": str(port)},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first = ready = None
+    memory = {}
+    try:
+        while time.perf_counter() - start < timeout and proc.poll() is None:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+                conn.request("GET", "/health")
+                status = conn.getresponse().status
+                conn.close()
+            except OSError:
+                time.sleep(0.005)
+                continue
+            elapsed = (time.perf_counter() - start) * 1e3
+            if first is None:
+                first = elapsed
+                workers = children(proc.pid)
+                memory = {"master_rss_mb": round(rss_mb(proc.pid), 1),
+                          "total_rss_mb": round(rss_mb(proc.pid) + sum(rss_mb(w) for w in workers), 1)}
+            if status == 200:
+                ready = elapsed
+                break
+            if ready is None and elapsed > first + 2000:
+                break  # answering, but not getting ready (e.g. no model offline)
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait(30)
+    return first, ready, memory
+
+
+def requirement_names(path):
+    names = []
+    with open(os.path.join(ROOT, path)) as fh:
+        for line in fh:
+            line = line.split("#")[0].strip()
+            if line:
+                names.append(re.split(r"[<>=!~\[; ]", line, maxsplit=1)[0])
+    return names
+
+
+def install_size(path):
+    """MB on disk of the installed distributions `path` needs (recursively), and the ones not installed."""
+    from packaging.requirements import Requirement
+    seen, missing, size = set(), [], 0
+    todo = requirement_names(path)
+    while todo:
+        name = todo.pop().lower().replace("_", "-")
+        if name in seen:
+            continue
+        seen.add(name)
+        try:
+            dist = importlib.metadata.distribution(name)
+        except importlib.metadata.PackageNotFoundError:
+            missing.append(name)
+            continue
+        for file in dist.files or ():
+            try:
+                size += os.path.getsize(file.locate())
+            except OSError:
+                pass
+        for spec in dist.requires or ():
+            req = Requirement(spec)
+            if req.marker is None or req.marker.evaluate({"extra": ""}):
+                todo.append(req.name)
+    return {"install_mb": round(size / 2**20, 1), "distributions": len(seen) - len(missing),
+            "not_installed": sorted(missing)}
+
+
+def measure(requirements, overrides, runs, timeout):
+    env = {**os.environ, "WEB_CONCURRENCY": "1", **overrides}
+    result = import_profile(env)
+    starts = [start_once(env, timeout) for _ in range(runs)]
+    firsts = [s[0] for s in starts if s[0] is not None]
+    readies = [s[1] for s in starts if s[1] is not None]
+    result.update({
+        "first_response_ms": round(statistics.median(firsts), 1) if firsts else None,
+        "ready_ms": round(statistics.median(readies), 1) if len(readies) == len(starts) else None,
+        **starts[-1][2],
+        **install_size(requirements),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="server starts per profile (median reported)")
+    parser.add_argument("--budget-ms", type=float, default=1500.0,
+                        help="max median ms from exec to the first /health response, lite profile")
+    parser.add_argument("--profiles", default="lite,full")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for a server")
+    parser.add_argument("--json", help="write the report here")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.profiles.split(","):
+        requirements, overrides = PROFILES[name]
+        results[name] = measure(requirements, overrides, args.runs, args.timeout)
+
+    print(f"{'profile':<8} {'import ms':>9} {'1st /health ms':>14} {'ready ms':>9} {'RSS MB':>7} "
+          f"{'install MB':>10}  heavy imports")
+    for name, r in results.items():
+        print(f"{name:<8} {r['import_app_ms']:>9} {str(r['first_response_ms']):>14} {str(r['ready_ms']):>9} "
+              f"{r.get('total_rss_mb', '-'):>7} {r['install_mb']:>10}  {', '.join(r['heavy_imported']) or '-'}")
+        print(f"{'':<8} slowest: {', '.join(f'{k} {v}' for k, v in r['slowest_packages_ms'].items())}")
+        if r["not_installed"]:
+            print(f"{'':<8} not installed here (not counted): {', '.join(r['not_installed'])}")
+
+    failures = []
+    lite = results.get("lite")
+    if lite:
+        if lite["heavy_imported"]:
+            failures.append(f"lite profile imports {', '.join(lite['heavy_imported'])} at startup")
+        if lite["first_response_ms"] is None or lite["first_response_ms"] > args.budget_ms:
+            failures.append(f"lite cold start {lite['first_response_ms']} ms is over the {args.budget_ms:.0f} ms budget")
+    if args.json:
+        write_report({"suite": "cold_start", "environment": environment(), "budget_ms": args.budget_ms,
+                      "results": results}, args.json)
+    for message in failures:
+        print("FAIL", message)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-request CPU time of the feedback + resources path: direct wellness
+functions vs. the precompiled FeedbackTable (cold and warm).
+
+    python bench/bench_feedback.py [--requests 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feedback_table import SLIDERS, FeedbackTable
+from wellness import (
+    calculate_wellness_score, generate_advanced_feedback,
+    get_burnout_level, get_resources,
+)
+
+JOURNALS = ["", "", "", "Stressed about my midterm and rent is due", "Feeling lonely this week"]
+
+
+def payloads(n, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        data = {name: rng.randint(1, 5) for name in SLIDERS}
+        data["journal"] = rng.choice(JOURNALS)
+        out.append(data)
+    return out
+
+
+def direct(data):
+    level = get_burnout_level(calculate_wellness_score(data))
+    return generate_advanced_feedback(data), get_resources(level, data)
+
+
+def run(label, fn, items):
+    start = time.process_time()
+    for data in items:
+        fn(data)
+    per_req = (time.process_time() - start) / len(items) * 1e6
+    print(f"{label:24s} {per_req:8.2f} us/request CPU")
+    return per_req
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    items = payloads(args.requests)
+
+    base = run("direct functions", direct, items)
+    table = FeedbackTable()
+    lookup = lambda data: (table.feedback(data), table.resources(data))
+    run("table (cold, lazy fill)", lookup, items)
+    warm = run("table (warm)", lookup, items)
+    no_journal = [dict(d, journal="") for d in items]
+    run("direct, no journal", direct, no_journal)
+    run("table warm, no journal", lookup, no_journal)
+    print(f"speedup (warm, mixed journals): {base / warm:.1f}x")
+
+    start = time.perf_counter()
+    FeedbackTable().build_all()
+    print(f"full prebuild of {5 ** len(SLIDERS)} slots: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
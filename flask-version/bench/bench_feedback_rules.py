@@ -0,0 +1,130 @@
+"""
+Evaluation cost of the compiled feedback rules (feedback_rules.py) against
+the hard-coded if-chains they replaced (scripts/legacy_feedback.py).
+
+  - slider feedback parts and resources per check-in: legacy functions vs.
+    the wellness functions on the compiled ruleset (lookup tables and
+    bitmasks), and the same check-ins with an off-grid slider such as 2.5
+    (interpreted path);
+  - the rule evaluation alone (Ruleset.slider_sections + resources);
+  - compiling feedback_rules.json, and a hot reload from file change to the
+    new ruleset being served.
+
+    python bench/bench_feedback_rules.py [--requests 20000] [--json rules.json]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import legacy_feedback  # noqa: E402
+import wellness  # noqa: E402
+from benchlib import environment, summarize, write_report  # noqa: E402
+from feedback_rules import RULES_FILE, SLIDERS, FeedbackRules, Ruleset  # noqa: E402
+
+
+def payloads(n, off_grid=False, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        data = {name: rng.randint(1, 5) for name in SLIDERS}
+        if off_grid:
+            data["mood"] -= 0.5
+        out.append(data)
+    return out
+
+
+def run(label, fn, items, repeats=5):
+    """Best of `repeats` passes, in CPU us per check-in."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.process_time()
+        for data in items:
+            fn(data)
+        best = min(best, (time.process_time() - start) / len(items) * 1e6)
+    print(f"{label:34s} {best:8.2f} us/check-in CPU")
+    return round(best, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5, help="passes per variant (best reported)")
+    parser.add_argument("--reloads", type=int, default=50)
+    parser.add_argument("--json", help="write the report here")
+    args = parser.parse_args()
+    today = date.today()
+    rules = Ruleset.from_file(RULES_FILE)
+
+    def level_of(data):
+        return wellness.get_burnout_level(wellness.calculate_wellness_score(data))
+
+    def legacy(data):
+        return legacy_feedback.slider_feedback(data, today), legacy_feedback.get_resources(level_of(data), data)
+
+    def compiled(data):
+        return wellness.slider_feedback(data, today, rules), wellness.get_resources(level_of(data), data, rules)
+
+    def evaluate_only(case):
+        values, level = case
+        return rules.slider_sections(values, level, today), rules.resources(level, values)
+
+    results = {}
+    items = payloads(args.requests)
+    off_grid = payloads(args.requests, off_grid=True)
+    results["legacy_us"] = run("legacy if-chains", legacy, items, args.repeats)
+    results["compiled_us"] = run("compiled rules (bitmask)", compiled, items, args.repeats)
+    results["legacy_off_grid_us"] = run("legacy if-chains, mood x.5", legacy, off_grid, args.repeats)
+    results["interpreted_us"] = run("compiled rules, mood x.5", compiled, off_grid, args.repeats)
+    cases = [(tuple(d[name] for name in SLIDERS), level_of(d)) for d in items]
+    results["evaluate_only_us"] = run("Ruleset evaluation only", evaluate_only, cases, args.repeats)
+    print(f"compiled vs legacy: {results['legacy_us'] / results['compiled_us']:.2f}x")
+
+    compile_s = []
+    for _ in range(args.reloads):
+        start = time.perf_counter()
+        Ruleset.from_file(RULES_FILE)
+        compile_s.append(time.perf_counter() - start)
+    results["compile"] = summarize(compile_s, "ms")
+    print(f"compile feedback_rules.json: p50 {results['compile']['p50_ms']} ms")
+
+    # Reload latency: from the file being replaced to current() serving the new version.
+    with open(RULES_FILE, encoding="utf-8") as fh:
+        text = fh.read()
+    path = os.path.join(tempfile.mkdtemp(), "rules.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    live = FeedbackRules(path, reload_s=0.001)
+    reload_s = []
+    with contextlib.redirect_stdout(io.StringIO()):  # one "[rules] reloaded" line each
+        for k in range(args.reloads):
+            edited = text.replace('"default": "', f'"default": "v{k} ', 1)
+            version = live.current().version
+            start = time.perf_counter()
+            with open(f"{path}.tmp", "w", encoding="utf-8") as fh:
+                fh.write(edited)
+            os.replace(f"{path}.tmp", path)
+            os.utime(path, ns=(k + 1, k + 1))  # distinct mtimes even within the clock's resolution
+            while live.current().version == version:
+                pass
+            reload_s.append(time.perf_counter() - start)
+    results["reload"] = summarize(reload_s, "ms")
+    print(f"hot reload (reload_s=0.001), file replaced -> served: p50 {results['reload']['p50_ms']} ms, "
+          f"p99 {results['reload']['p99_ms']} ms over {live.reloads} reloads")
+
+    if args.json:
+        write_report({"suite": "feedback_rules", "environment": environment(), "results": results}, args.json)
+
+
+if __name__ == "__main__":
+    main()
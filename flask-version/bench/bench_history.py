@@ -0,0 +1,107 @@
+"""
+Check-in history at scale: builds a store with `--rows` check-ins from
+`--students` anonymous ids spread over `--days` days (sealed 1M-row columnar
+segments plus one open log, as a long-running deployment would have), then
+times `/api/history`-style trend queries and the group-committed append path.
+
+    python bench/bench_history.py --rows 20000000 --students 200000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import DAY, RECORD, HistoryStore, pseudonym, write_segment  # noqa: E402
+
+SALT = "bench-history"
+
+
+def synthetic_rows(keys, start_ts, end_ts, n, rng):
+    rows = np.empty(n, dtype=RECORD)
+    rows["key"] = keys[rng.integers(0, len(keys), n)]
+    rows["ts"] = np.sort(rng.integers(start_ts, end_ts, n)).astype(np.uint32)
+    rows["sliders"] = rng.integers(0, 5 ** 8, n)
+    rows["score"] = rng.integers(8, 41, n) / 8.0
+    rows["level"] = rng.integers(0, 3, n)
+    rows["emotion"] = rng.integers(0, 9, n)
+    return rows
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--students", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--segment-rows", type=int, default=1 << 20)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dir", default=None, help="keep the generated store here")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="history-bench-")
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(7)
+    ids = [f"student-{i}" for i in range(args.students)]
+    keys = np.array([pseudonym(i, SALT) for i in ids], dtype=np.uint64)
+    now = int(time.time())
+    start = now - args.days * DAY
+
+    t0 = time.perf_counter()
+    open_rows = min(args.segment_rows // 2, args.rows)
+    sealed = args.rows - open_rows
+    n_segments = -(-sealed // args.segment_rows)
+    for s in range(n_segments):
+        n = min(args.segment_rows, sealed - s * args.segment_rows)
+        lo = start + (now - start) * s * args.segment_rows // args.rows
+        hi = start + (now - start) * (s * args.segment_rows + n) // args.rows
+        write_segment(os.path.join(directory, f"seg-{s:06d}-0.col"), synthetic_rows(keys, lo, hi, n, rng))
+    tail_start = start + (now - start) * sealed // args.rows
+    # Named for this process, so the store adopts it as its own open log.
+    synthetic_rows(keys, tail_start, now, open_rows, rng).tofile(os.path.join(directory, f"active-{os.getpid()}.log"))
+    build_s = time.perf_counter() - t0
+    size_mb = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)) / 1e6
+    print(f"built {args.rows:,} rows ({n_segments} segments + {open_rows:,}-row open log, "
+          f"{size_mb:.0f} MB, {args.rows and size_mb * 1e6 / args.rows:.0f} B/row) in {build_s:.1f}s")
+
+    store = HistoryStore(directory, salt=SALT, flush_ms=50)
+    t0 = time.perf_counter()
+    store.trends(ids[0], now=now)
+    print(f"first query (maps segments, reads open log): {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    latencies = []
+    for i in rng.integers(0, len(ids), args.queries):
+        t0 = time.perf_counter()
+        out = store.trends(ids[i], now=now)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    print(f"trend query over {args.queries} students: p50 {percentile(latencies, 50):.2f} ms, "
+          f"p95 {percentile(latencies, 95):.2f} ms, p99 {percentile(latencies, 99):.2f} ms "
+          f"(last: {out['checkins_30d']} check-ins in 30d)")
+
+    data = {"mood": 4, "stress": 2, "focus": 3, "sleep": 3, "motivation": 3,
+            "anxiety": 3, "appetite": 3, "food_security": 3}
+    n = 200_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        store.append(ids[i % len(ids)], data, 3.6, "Moderate", {"emotion": "joy", "confidence": 0.9})
+    append_us = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    store.flush()
+    print(f"append: {append_us:.2f} us/call on the request path; "
+          f"final flush {(time.perf_counter() - t0) * 1000:.1f} ms; {store.stats()}")
+
+    if not args.dir:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
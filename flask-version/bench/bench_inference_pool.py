@@ -0,0 +1,137 @@
+"""
+Throughput of the shared inference pool (inference_pool.py) as it grows from
+1 to N processes, using the CPU-burning stub backend (EMOTION_STUB_CPU=1) so
+each batch occupies one core the way a single-threaded forward pass does.
+
+For every pool size the script starts `inference_pool.py --procs P --threads 1`,
+drives it from `--clients` concurrent PoolClient threads (each sending
+`--batch` texts per call, like a web worker's MicroBatcher) for `--duration`
+seconds, and reports texts/sec, call latency, shed calls and the pool's own
+utilization figure. A final overload run with a tiny --max-queue shows
+load shedding.
+
+    python bench/bench_inference_pool.py --procs 1,2,4 --clients 16 --duration 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from emotion import QueueSaturated  # noqa: E402
+from inference_pool import PoolClient  # noqa: E402
+from stub_backend import STUB_ENV  # noqa: E402
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def start_pool(procs, socket_path, max_queue, env_overrides):
+    env = {**os.environ, **STUB_ENV, "EMOTION_STUB_CPU": "1", **env_overrides}
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "inference_pool.py"), "--procs", str(procs),
+         "--threads", "1", "--max-queue", str(max_queue), "--socket", socket_path],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    client = PoolClient(socket_path)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if os.path.exists(socket_path) and client.stats().get("ready_procs") == procs:
+            return proc
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"pool with {procs} procs did not become ready")
+
+
+def drive(socket_path, clients, batch, duration):
+    client = PoolClient(socket_path)
+    latencies, shed, texts = [], [0], [0]
+    lock = threading.Lock()
+    stop = time.time() + duration
+
+    def loop(n):
+        i = 0
+        while time.time() < stop:
+            payload = [f"client {n} journal {i}-{j}: exams and deadlines again" for j in range(batch)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                client.classify_batch(payload)
+            except QueueSaturated:
+                with lock:
+                    shed[0] += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000.0)
+                texts[0] += batch
+
+    threads = [threading.Thread(target=loop, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "texts_per_sec": round(texts[0] / elapsed, 1),
+        "calls": len(latencies),
+        "shed_calls": shed[0],
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "pool": client.stats(),
+    }
+
+
+def run(procs, args, max_queue):
+    socket_path = os.path.join(tempfile.mkdtemp(), "pool.sock")
+    env = {"EMOTION_STUB_BATCH_MS": str(args.batch_ms), "EMOTION_STUB_PER_TEXT_MS": str(args.per_text_ms)}
+    proc = start_pool(procs, socket_path, max_queue, env)
+    try:
+        return drive(socket_path, args.clients, args.batch, args.duration)
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--procs", default="1,2,4", help="comma-separated pool sizes")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=4, help="texts per client call")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--batch-ms", type=float, default=20.0, help="stub cost per batch")
+    parser.add_argument("--per-text-ms", type=float, default=5.0, help="stub cost per text")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    for procs in [int(p) for p in args.procs.split(",")]:
+        results[procs] = run(procs, args, max_queue=1024)
+    overload = run(1, args, max_queue=args.batch)
+
+    if args.json:
+        print(json.dumps({"cpu_count": os.cpu_count(), "scaling": results, "overload": overload}, indent=2))
+        return
+    base = results[min(results)]["texts_per_sec"] or 1.0
+    print(f"cpu_count={os.cpu_count()} clients={args.clients} batch={args.batch}")
+    print(f"{'procs':>5} {'texts/s':>9} {'speedup':>8} {'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'util':>6} {'shed':>6}")
+    for procs, r in results.items():
+        print(f"{procs:>5} {r['texts_per_sec']:>9} {r['texts_per_sec'] / base:>8.2f} {r['p50_ms']:>7} "
+              f"{r['p95_ms']:>7} {r['p99_ms']:>7} {r['pool'].get('utilization', 0):>6} {r['shed_calls']:>6}")
+    print(f"overload (1 proc, max_queue={args.batch}): {overload['texts_per_sec']} texts/s, "
+          f"{overload['shed_calls']} calls shed, p99 {overload['p99_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
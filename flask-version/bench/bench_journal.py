@@ -0,0 +1,89 @@
+"""
+Journal keyword/negation scanning on 1KB-50KB entries: the original four
+`_has` calls + three negation regexes vs. one journal_matcher.scan. Runs
+keyword-dense, keyword-free and negation-heavy ("not ... not ...") text, and
+confirms the negation results agree with the original regexes.
+
+    python bench/bench_journal.py
+"""
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from journal_matcher import scan
+
+LEGACY_TOPICS = (
+    ("exam", "midterm", "final", "quiz", "deadline", "assignment", "paper"),
+    ("money", "rent", "bills", "food", "groceries"),
+    ("roommate", "conflict", "fight", "argue"),
+    ("homesick", "lonely", "alone"),
+)
+LEGACY_NEGATIONS = (r"not[\s\w]*sad", r"not[\s\w]*(happy|good)", r"not[\s\w]*stressed")
+
+
+def legacy(text):
+    low = text.lower()
+    topics = [any(w in low for w in words) for words in LEGACY_TOPICS]
+    negations = [bool(re.search(p, low)) for p in LEGACY_NEGATIONS]
+    return topics, negations
+
+
+def journal_of(size, rng, sentences):
+    parts, total = [], 0
+    while total < size:
+        s = rng.choice(sentences)
+        parts.append(s)
+        total += len(s) + 1
+    return " ".join(parts)[:size]
+
+
+def main():
+    with open(os.path.join(ROOT, "scripts", "sample_journals.txt"), encoding="utf-8") as fh:
+        sentences = [line.strip() for line in fh if line.strip()]
+    sentences += ["I'm not sad, just tired", "not feeling good today", "honestly not that stressed",
+                  "Read the newspaper", "another sad day", "cannot be happy"]
+    rng = random.Random(11)
+    raw_scan = scan.__wrapped__  # bypass the memo so every call really scans
+
+    mismatches = 0
+    for _ in range(2000):
+        text = journal_of(rng.randint(10, 400), rng, sentences)
+        _, old_neg = legacy(text)
+        neg = raw_scan(text).negated
+        new_neg = [("sad" in neg), bool(neg & {"happy", "good"}), ("stressed" in neg)]
+        mismatches += old_neg != new_neg
+    print(f"negation parity vs original regexes on 2000 journals: {mismatches} mismatches")
+
+    filler = "we walked across campus and talked about the weather and the game "
+    kinds = {
+        "dense": lambda size: journal_of(size, rng, sentences),
+        "keyword-free": lambda size: (filler * (size // len(filler) + 1))[:size],
+        "negation-heavy": lambda size: ("i am not really " * (size // 16 + 1))[:size],
+    }
+    print(f"{'text':>15s} {'size':>7s} {'legacy us':>10s} {'scan us':>10s} {'speedup':>8s}")
+    for kind, make in kinds.items():
+        for size in (1_000, 5_000, 10_000, 25_000, 50_000):
+            texts = [make(size) for _ in range(5)]
+            # The legacy negation regexes are quadratic on long "not" runs; keep reps small.
+            reps = 1 if kind == "negation-heavy" else max(1, 100_000 // size)
+            start = time.perf_counter()
+            for _ in range(reps):
+                for t in texts:
+                    legacy(t)
+            old = (time.perf_counter() - start) / (reps * len(texts)) * 1e6
+            start = time.perf_counter()
+            for _ in range(reps):
+                for t in texts:
+                    raw_scan(t)
+            new = (time.perf_counter() - start) / (reps * len(texts)) * 1e6
+            print(f"{kind:>15s} {size:>7d} {old:>10.1f} {new:>10.1f} {old / new:>7.2f}x")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
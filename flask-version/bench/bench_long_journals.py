@@ -0,0 +1,101 @@
+"""
+Latency vs. journal length for chunked emotion inference, and the padding
+saved by length bucketing.
+
+1. One journal of N tokens: emotion.classify_batch (windows + token cap) vs.
+   a single unchunked forward pass, which is what ran before. With the real
+   model that pass fails past 512 tokens.
+2. A micro-batch of 15 short journals plus one long one: one padded forward
+   pass over all 16 vs. length buckets.
+
+By default the model is the stub with a per-padded-token cost
+(--per-token-us) standing in for a forward pass that grows with sequence
+length. Set --backend torch|torch-int8|onnx to time the real model instead.
+
+    python bench/bench_long_journals.py [--json long-journals.json]
+    python bench/bench_long_journals.py --backend onnx --lengths 64,256,512,1024,4096
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ("exam", "tired", "happy", "roommate", "deadline", "hopeful", "rent", "lonely", "class", "today",
+         "I", "feel", "really", "about", "the", "and", "was", "my", "so", "worried")
+
+
+def journal(n_words, rng):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", default="stub")
+    parser.add_argument("--lengths", default="16,64,256,510,511,1024,2048,4096,8192", help="journal lengths in words")
+    parser.add_argument("--per-token-us", type=float, default=200.0, help="stub cost per padded token")
+    parser.add_argument("--batch-ms", type=float, default=5.0, help="stub cost per forward pass")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the report here")
+    args = parser.parse_args()
+
+    os.environ["EMOTION_BACKEND"] = args.backend
+    os.environ.setdefault("EMOTION_BACKEND_PLUGIN", os.path.join(ROOT, "scripts", "stub_backend.py"))
+    os.environ.setdefault("EMOTION_STUB_BATCH_MS", str(args.batch_ms))
+    os.environ.setdefault("EMOTION_STUB_PER_TEXT_MS", "0")
+    os.environ.setdefault("EMOTION_STUB_PER_TOKEN_US", str(args.per_token_us))
+
+    import emotion
+    from benchlib import environment, write_report
+
+    model = emotion.get_pipeline()
+    rng = random.Random(7)
+    print(f"backend {args.backend}: window {emotion.CHUNK_TOKENS} tokens, overlap {emotion.CHUNK_OVERLAP}, "
+          f"cap {emotion.MAX_TOKENS} tokens per journal")
+    print(f"{'words':>6} {'tokens':>6} {'windows':>7} {'chunked ms':>10} {'one pass ms':>11}")
+    curve = []
+    for n in [int(x) for x in args.lengths.split(",")]:
+        text = journal(n, rng)
+        tokens = len(emotion.token_spans(model, text))
+        windows = len(emotion.chunk_text(model, text))
+        chunked = best_of(lambda: emotion.classify_batch([text]), args.repeat)
+        try:
+            single = best_of(lambda: model([text], batch_size=1), args.repeat)
+        except Exception:  # the real model rejects sequences past its limit
+            single = None
+        curve.append({"words": n, "tokens": tokens, "windows": windows, "chunked_ms": round(chunked * 1e3, 3),
+                      "one_pass_ms": round(single * 1e3, 3) if single is not None else None})
+        one = f"{single * 1e3:>11.1f}" if single is not None else f"{'error':>11}"
+        print(f"{n:>6} {tokens:>6} {windows:>7} {chunked * 1e3:>10.1f} {one}")
+
+    batch = [journal(rng.randint(8, 40), rng) for _ in range(15)] + [journal(1500, rng)]
+    rng.shuffle(batch)
+    padded = best_of(lambda: model([emotion.chunk_text(model, t)[0][0] for t in batch], batch_size=len(batch)),
+                     args.repeat)
+    bucketed = best_of(lambda: emotion.classify_batch(batch), args.repeat)
+    print(f"\n15 short + 1 long journal: one padded pass {padded * 1e3:.1f} ms "
+          f"(long journal cut to its first window), length buckets {bucketed * 1e3:.1f} ms "
+          f"(long journal fully windowed)")
+
+    if args.json:
+        write_report({"suite": "long-journals", "environment": {**environment(), "backend": args.backend},
+                      "results": {"curve": curve,
+                                  "mixed_batch": {"padded_ms": round(padded * 1e3, 3),
+                                                  "bucketed_ms": round(bucketed * 1e3, 3)}}}, args.json)
+
+
+if __name__ == "__main__":
+    main()
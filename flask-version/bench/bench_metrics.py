@@ -0,0 +1,79 @@
+"""
+Cost of the /api/submit instrumentation: CPU time per request through the
+Flask test client with METRICS off vs on, plus the bare per-stage cost of the
+no-op and recording timers.
+
+    python bench/bench_metrics.py [--requests 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Repeated payloads would be replayed; time the full submit path.
+os.environ.setdefault("SUBMIT_DEDUP", "0")
+# Every request comes from one address; the per-client limit would reject most.
+os.environ.setdefault("ADMISSION", "0")
+
+import app as flask_app  # noqa: E402
+from metrics import METRICS, NULL_TIMER, Metrics  # noqa: E402
+
+JOURNALS = ["", "", "", "Stressed about my midterm and rent is due", "I am not sad, just tired"]
+
+
+def payloads(n, seed=7):
+    rng = random.Random(seed)
+    out = []
+    while len(out) < n:
+        data = {name: rng.randint(1, 5) for name in flask_app.REQUIRED_FIELDS}
+        if all(v == 3 for v in data.values()):
+            continue
+        data["journal"] = rng.choice(JOURNALS)
+        out.append(data)
+    return out
+
+
+def per_request(client, items):
+    start = time.process_time()
+    for data in items:
+        client.post("/api/submit", json=data)
+    return (time.process_time() - start) / len(items) * 1e6
+
+
+def per_stage(timer_factory, n=200_000):
+    start = time.process_time()
+    for _ in range(n // 5):
+        timer = timer_factory()
+        for name in ("validate", "score", "feedback", "resources", "serialize"):
+            with timer.stage(name):
+                pass
+        timer.finish()
+    return (time.process_time() - start) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    items = payloads(args.requests)
+    client = flask_app.app.test_client()
+    per_request(client, items[:2000])  # warm the feedback table and caches
+
+    results = {}
+    for label, enabled in (("off", False), ("on", True), ("off", False), ("on", True)):
+        METRICS.enabled = enabled
+        results.setdefault(label, []).append(per_request(client, items))
+    off, on = min(results["off"]), min(results["on"])
+    print(f"/api/submit via test client: METRICS off {off:.1f} us/request, on {on:.1f} us/request "
+          f"({on - off:+.1f} us, {100.0 * (on - off) / off:+.1f}%)")
+
+    enabled = Metrics(enabled=True)
+    print(f"per stage: no-op timer {per_stage(lambda: NULL_TIMER):.0f} ns, "
+          f"recording timer {per_stage(enabled.timer):.0f} ns (incl. histogram update)")
+
+
+if __name__ == "__main__":
+    main()
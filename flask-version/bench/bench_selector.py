@@ -0,0 +1,67 @@
+"""
+Micro-benchmark of feedback text selection: the original per-call MD5 picker
+vs. the Selector (memoized day picks + CRC32 payload picks), and the whole
+generate_advanced_feedback path under each FEEDBACK_SELECTOR mode.
+
+    python bench/bench_selector.py [--n 200000]
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedback_rules
+import wellness
+from selector import Selector
+
+ITEMS = ["a", "b", "c"]
+
+
+def legacy_pick(items, seed_key):
+    seed = int(hashlib.md5(seed_key.encode()).hexdigest(), 16)
+    return items[seed % len(items)]
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    per_call = (time.perf_counter() - start) / n * 1e9
+    print(f"{label:34s} {per_call:8.0f} ns/call")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=200000)
+    args = parser.parse_args()
+    n = args.n
+    today = date.today()
+    keys = [f"{today}-{random.randint(11111111, 55555555)}-journal text {i % 50}" for i in range(1000)]
+    fast, md5 = Selector("fast"), Selector("md5")
+
+    timed("legacy md5 pick (day key)", lambda i: legacy_pick(ITEMS, f"{date.today()}-combo1"), n)
+    timed("selector.daily (memoized)", lambda i: fast.daily(ITEMS, "combo1", today), n)
+    timed("legacy md5 pick (payload key)", lambda i: legacy_pick(ITEMS, keys[i % 1000]), n)
+    timed("selector.pick md5 mode", lambda i: md5.pick(ITEMS, keys[i % 1000]), n)
+    timed("selector.pick fast (crc32)", lambda i: fast.pick(ITEMS, keys[i % 1000]), n)
+
+    rng = random.Random(3)
+    payloads = [{name: rng.randint(1, 5) for name in ("mood", "stress", "focus", "sleep", "motivation",
+                                                     "anxiety", "appetite", "food_security")}
+                for _ in range(1000)]
+    for p in payloads[::3]:
+        p["journal"] = "Worried about my exam and feeling alone"
+    feedback_n = max(1, n // 10)
+    for mode in ("md5", "fast"):
+        wellness.SELECTOR = feedback_rules.SELECTOR = Selector(mode)
+        timed(f"generate_advanced_feedback [{mode}]",
+              lambda i: wellness.generate_advanced_feedback(payloads[i % 1000]), feedback_n)
+
+
+if __name__ == "__main__":
+    main()
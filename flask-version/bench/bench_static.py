@@ -0,0 +1,131 @@
+"""
+Bytes on the wire and page loads per second for the page shell, its CSS/JS
+and /api/emojis, with and without prebuilt static responses (STATIC_CACHE).
+
+A minimal browser cache replays what a real one does with the response
+headers: a `cold` load has an empty cache; a `warm` load follows an earlier
+visit, so it skips anything still fresh under Cache-Control max-age and sends
+If-None-Match for the rest. Each mode runs in its own gunicorn (app:app) and
+every load goes over one keep-alive connection advertising gzip/br.
+
+    python bench/bench_static.py [--loads 300] [--json static.json]
+"""
+import argparse
+import gzip
+import http.client
+import os
+import re
+import sys
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchlib import environment, write_report  # noqa: E402
+from load_submit import spawn  # noqa: E402
+
+ASSET = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+class Browser:
+    """Just enough of an HTTP cache: max-age freshness and ETag revalidation."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cache = {}  # url -> (etag, fresh_until, body)
+        self.requests = 0
+        self.not_modified = 0
+        self.wire_bytes = 0
+
+    def get(self, url):
+        now = time.monotonic()
+        cached = self.cache.get(url)
+        if cached and cached[1] > now:
+            return cached[2]
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if cached and cached[0]:
+            headers["If-None-Match"] = cached[0]
+        self.conn.request("GET", url, headers=headers)
+        response = self.conn.getresponse()
+        body = response.read()
+        self.requests += 1
+        self.wire_bytes += len(body) + sum(len(k) + len(v) + 4 for k, v in response.getheaders()) + 17  # + status line
+        if response.status == 304:
+            self.not_modified += 1
+            body = cached[2]
+        elif response.status != 200:
+            raise RuntimeError(f"GET {url}: {response.status}")
+        elif response.getheader("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        elif response.getheader("Content-Encoding") == "br":
+            import brotli
+            body = brotli.decompress(body)
+        control = response.getheader("Cache-Control", "")
+        max_age = re.search(r"max-age=(\d+)", control)
+        fresh_until = now + int(max_age.group(1)) if max_age and "no-cache" not in control else 0
+        self.cache[url] = (response.getheader("ETag"), fresh_until, body)
+        return body
+
+    def load_page(self):
+        html = self.get("/").decode()
+        for url in ASSET.findall(html):
+            self.get(url)
+        self.get("/api/emojis")
+
+
+def measure(url, loads, warm):
+    parsed = urllib.parse.urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=10)
+    browsers = []
+    if warm:
+        browser = Browser(conn)
+        browser.load_page()
+        browser.requests = browser.not_modified = browser.wire_bytes = 0
+    start = time.perf_counter()
+    for _ in range(loads):
+        if not warm:
+            browser = Browser(conn)
+            browsers.append(browser)
+        browser.load_page()
+    elapsed = time.perf_counter() - start
+    browsers = browsers or [browser]
+    requests = sum(b.requests for b in browsers)
+    conn.close()
+    return {
+        "loads_per_s": round(loads / elapsed, 1),
+        "requests_per_s": round(requests / elapsed, 1),
+        "requests_per_load": round(requests / loads, 2),
+        "not_modified_per_load": round(sum(b.not_modified for b in browsers) / loads, 2),
+        "bytes_per_load": round(sum(b.wire_bytes for b in browsers) / loads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--loads", type=int, default=300, help="page loads per mode and cache state")
+    parser.add_argument("--json", help="write the report here")
+    args = parser.parse_args()
+
+    results = {}
+    for mode, flag in (("plain", "0"), ("prebuilt", "1")):
+        proc, url = spawn({"STATIC_CACHE": flag, "USE_EMOTION": "0", "WEB_CONCURRENCY": "1"})
+        try:
+            for state in ("cold", "warm"):
+                results[f"{mode}/{state}"] = measure(url, args.loads, warm=state == "warm")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(f"{'mode/cache':<16} {'bytes/load':>10} {'reqs/load':>9} {'304s/load':>9} {'loads/s':>8} {'reqs/s':>8}")
+    for name, r in results.items():
+        print(f"{name:<16} {r['bytes_per_load']:>10} {r['requests_per_load']:>9} {r['not_modified_per_load']:>9} "
+              f"{r['loads_per_s']:>8} {r['requests_per_s']:>8}")
+    if args.json:
+        write_report({"suite": "static", "environment": environment(), "results": results}, args.json)
+
+
+if __name__ == "__main__":
+    main()
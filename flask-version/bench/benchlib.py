@@ -0,0 +1,91 @@
+"""
+Shared helpers for the benchmark suite: latency summaries, the JSON report
+format and comparison against a stored baseline.
+
+A report is {"suite", "environment", "results": {name: {metric: value}}}.
+`compare` checks every latency metric (keys ending in _us or _ms) and, for
+throughput metrics (ops_per_sec, rps), the inverse direction.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+LOWER_IS_BETTER = ("_us", "_ms")
+# Servers the load tests spawn run with render.yaml's workers and threads
+# (gunicorn.conf.py otherwise keeps gunicorn's one sync worker).
+SERVER_CONCURRENCY = {"WEB_CONCURRENCY": os.getenv("WEB_CONCURRENCY", "2"),
+                      "GUNICORN_THREADS": os.getenv("GUNICORN_THREADS", "8")}
+HIGHER_IS_BETTER = ("ops_per_sec", "rps")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted sequence (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+
+def summarize(seconds, unit="us"):
+    """count/mean/p50/p95/p99 of per-call durations given in seconds."""
+    scale = 1e6 if unit == "us" else 1e3
+    if not seconds:
+        return {"count": 0}
+    return {
+        "count": len(seconds),
+        f"mean_{unit}": round(sum(seconds) / len(seconds) * scale, 3),
+        f"p50_{unit}": round(percentile(seconds, 50) * scale, 3),
+        f"p95_{unit}": round(percentile(seconds, 95) * scale, 3),
+        f"p99_{unit}": round(percentile(seconds, 99) * scale, 3),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_report(report, path):
+    with open(path, "w") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def compare(report, baseline_path, tolerance):
+    """Print metric-by-metric deltas vs. the baseline; return the regressions beyond `tolerance`."""
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    regressions = []
+    print(f"\ncompared with {baseline_path} (baseline commit {baseline.get('environment', {}).get('commit', '?')}, "
+          f"tolerance {tolerance:.0%})")
+    for name, metrics in sorted(report["results"].items()):
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"  {name:28s} (new, no baseline)")
+            continue
+        for key, value in sorted(metrics.items()):
+            old = base.get(key)
+            lower = key.endswith(LOWER_IS_BETTER)
+            higher = key.endswith(HIGHER_IS_BETTER)
+            if not (lower or higher) or not isinstance(old, (int, float)) or not old or value is None:
+                continue
+            change = (value - old) / old
+            worse = change > tolerance if lower else change < -tolerance
+            flag = "REGRESSION" if worse else ""
+            print(f"  {name:28s} {key:14s} {old:>12.3f} -> {value:>12.3f} {change:+7.1%} {flag}")
+            if worse:
+                regressions.append((name, key, old, value))
+    return regressions
@@ -0,0 +1,170 @@
+"""
+Concurrent-connection load test: sync `gunicorn app:app` vs async
+`gunicorn -k uvicorn.workers.UvicornWorker asgi:app`, both using the stub emotion backend so the slow path is
+reproducible offline.
+
+Each client connection loops over a mix of journal submits (slow: emotion
+inference) and cheap GETs (/health, /api/emojis) and the script reports
+throughput and latency percentiles for both kinds at each concurrency level.
+
+    python bench/load_serving_modes.py --concurrency 8,32,128 --duration 10
+    python bench/load_serving_modes.py --url http://127.0.0.1:5005   # existing server
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from benchlib import SERVER_CONCURRENCY  # noqa: E402
+from stub_backend import STUB_ENV  # noqa: E402
+
+# Both run under gunicorn.conf.py with the same WEB_CONCURRENCY, so the
+# comparison is per process count. (uvicorn's own --workers supervisor added a
+# flat ~40ms to every response in testing; the gunicorn worker class does not.)
+MODES = {
+    "sync": ["gunicorn", "app:app"],
+    "async": ["gunicorn", "-k", "uvicorn.workers.UvicornWorker", "asgi:app"],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn(mode, env_overrides):
+    port = free_port()
+    env = {**SERVER_CONCURRENCY, **os.environ, **STUB_ENV, "USE_EMOTION": "1", "ADMISSION": "0", "PORT": str(port),
+           **env_overrides}
+    cmd = list(MODES[mode])
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return proc, url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not become healthy")
+
+
+def payload(rng, n):
+    data = {k: rng.randint(1, 5) for k in ("mood", "stress", "focus", "sleep", "motivation",
+                                          "anxiety", "appetite", "food_security")}
+    data["mood"] = 1  # never all-3s
+    data["journal"] = f"entry {n}: worried about my exam and not sleeping well"
+    return json.dumps(data)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))] * 1000, 1)
+
+
+def run_level(url, concurrency, duration, journal_ratio, timeout):
+    parsed = urllib.parse.urlparse(url)
+    stop = time.time() + duration
+    lock = threading.Lock()
+    results = {"cheap": [], "journal": [], "errors": 0, "with_emotion": 0}
+
+    def client(idx):
+        rng = random.Random(idx)
+        conn = None
+        n = 0
+        while time.time() < stop:
+            n += 1
+            journal = rng.random() < journal_ratio
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+                start = time.perf_counter()
+                if journal:
+                    conn.request("POST", "/api/submit", body=payload(rng, idx * 1_000_000 + n),
+                                 headers={"Content-Type": "application/json"})
+                else:
+                    conn.request("GET", rng.choice(("/health", "/api/emojis")))
+                resp = conn.getresponse()
+                body = resp.read()
+                elapsed = time.perf_counter() - start
+                ok = resp.status == 200
+            except (OSError, http.client.HTTPException):
+                conn, ok, elapsed = None, False, 0.0
+            with lock:
+                if not ok:
+                    results["errors"] += 1
+                    continue
+                results["journal" if journal else "cheap"].append(elapsed)
+                if journal and b'"emotion_analysis": null' not in body and b'"emotion_analysis":null' not in body:
+                    results["with_emotion"] += 1
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(duration + timeout + 5)
+    done = len(results["cheap"]) + len(results["journal"])
+    return {
+        "concurrency": concurrency,
+        "rps": round(done / duration, 1),
+        "cheap_p50_ms": percentile(results["cheap"], 50),
+        "cheap_p99_ms": percentile(results["cheap"], 99),
+        "journal_p50_ms": percentile(results["journal"], 50),
+        "journal_p99_ms": percentile(results["journal"], 99),
+        "journal_with_emotion": f"{results['with_emotion']}/{len(results['journal'])}",
+        "errors": results["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--url", help="test an already running server instead of spawning")
+    parser.add_argument("--concurrency", default="8,32,128")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--journal-ratio", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for spawned servers")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    report = {}
+    targets = [("given", None)] if args.url else [(m, m) for m in args.modes.split(",")]
+    for label, mode in targets:
+        proc, url = (None, args.url) if args.url else spawn(mode, env)
+        try:
+            report[label] = []
+            for level in levels:
+                row = run_level(url, level, args.duration, args.journal_ratio, args.timeout)
+                report[label].append(row)
+                print(f"{label:6s} {json.dumps(row)}", flush=True)
+        finally:
+            if proc:
+                proc.terminate()
+                proc.wait(10)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Open-loop load generator for /api/submit with realistic payloads.
+
+Faker synthesizes check-ins: sliders drawn around a per-student baseline
+(so they correlate the way real answers do), and about --journal-ratio of
+them carry a journal built from Faker sentences with wellness keywords
+mixed in. Requests are sent on a fixed schedule at --qps regardless of how
+fast earlier ones finished, and latency is measured from each request's
+scheduled send time, so a stalled server shows up as queueing delay instead
+of hiding it (no coordinated omission).
+
+    python bench/load_submit.py --qps 200 --duration 20                 # spawns gunicorn app:app
+    python bench/load_submit.py --url http://127.0.0.1:5005 --qps 50 --json load.json
+    python bench/load_submit.py --qps 200 --baseline bench/baseline-load.json
+    python bench/load_submit.py --qps 50 --stream --env EMOTION_STUB_BATCH_MS=40   # time to first result
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from faker import Faker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from benchlib import SERVER_CONCURRENCY, compare, environment, summarize, write_report  # noqa: E402
+from stub_backend import STUB_ENV  # noqa: E402
+
+SLIDERS = ("mood", "stress", "focus", "sleep", "motivation", "anxiety", "appetite", "food_security")
+KEYWORDS = ("exam", "deadline", "rent", "groceries", "roommate", "homesick", "lonely",
+            "not sad", "not happy", "not stressed", "tired", "overwhelmed", "excited")
+
+
+class PayloadFactory:
+    """Faker-backed check-ins from a fixed population of simulated students."""
+
+    def __init__(self, seed, students=500, journal_ratio=0.4):
+        self.fake = Faker()
+        Faker.seed(seed)
+        self.rng = random.Random(seed)
+        self.journal_ratio = journal_ratio
+        self.students = [
+            {"anon_id": self.fake.uuid4(), "base": {name: self.rng.randint(1, 5) for name in SLIDERS}}
+            for _ in range(students)
+        ]
+
+    def journal(self):
+        sentences = self.fake.sentences(nb=self.rng.randint(1, 6))
+        for _ in range(self.rng.randint(0, 2)):
+            sentences.insert(self.rng.randrange(len(sentences) + 1), f"I am {self.rng.choice(KEYWORDS)}.")
+        return " ".join(sentences)
+
+    def checkin(self):
+        student = self.rng.choice(self.students)
+        data = {name: min(5, max(1, v + self.rng.choice((-1, 0, 0, 1))))
+                for name, v in student["base"].items()}
+        if all(v == 3 for v in data.values()):
+            data["mood"] = self.rng.choice((2, 4))
+        data["journal"] = self.journal() if self.rng.random() < self.journal_ratio else ""
+        data["anon_id"] = student["anon_id"]
+        return json.dumps(data).encode()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn(env_overrides):
+    port = free_port()
+    env = {**os.environ, "PORT": str(port), **env_overrides}
+    proc = subprocess.Popen(["gunicorn", "app:app"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not become healthy")
+
+
+def run(url, qps, duration, concurrency, factory, timeout, stream=False):
+    parsed = urllib.parse.urlparse(url)
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, firsts, statuses = [], [], {}
+    bodies = [factory.checkin() for _ in range(int(qps * duration))]
+    headers = {"Content-Type": "application/json"}
+    if stream:
+        headers["Accept"] = "application/x-ndjson"
+
+    def send(body, scheduled):
+        conn = getattr(local, "conn", None)
+        first = None
+        try:
+            if conn is None:
+                conn = local.conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+            conn.request("POST", "/api/submit", body=body, headers=headers)
+            resp = conn.getresponse()
+            if stream and resp.status == 200:
+                resp.readline()  # the score, level, resources and slider feedback
+                first = time.perf_counter() - scheduled
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            local.conn = None
+            status = "error"
+        elapsed = time.perf_counter() - scheduled
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+                firsts.append(first if first is not None else elapsed)
+
+    interval = 1.0 / qps
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        for i, body in enumerate(bodies):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, body, scheduled)
+        sent_in = time.perf_counter() - start
+    wall = time.perf_counter() - start
+    ok = statuses.get(200, 0)
+    return {
+        **summarize(latencies, unit="ms"),
+        # Time to the first result line; the same as the latency without --stream.
+        **{f"first_{k}": v for k, v in summarize(firsts, unit="ms").items() if k != "count"},
+        "target_qps": qps,
+        "offered_qps": round(len(bodies) / sent_in, 1) if sent_in else None,
+        "rps": round(ok / wall, 1) if wall else None,
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="load an already running server instead of spawning gunicorn")
+    parser.add_argument("--qps", default="50,200", help="comma-separated target request rates")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per rate")
+    parser.add_argument("--concurrency", type=int, default=64, help="max requests in flight")
+    parser.add_argument("--journal-ratio", type=float, default=0.4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--stream", action="store_true",
+                        help="ask for the streamed (NDJSON) response and also time the first result line")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the spawned server")
+    parser.add_argument("--json", help="write the report here")
+    parser.add_argument("--baseline", help="compare with this stored report; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    env = {**SERVER_CONCURRENCY, "USE_EMOTION": "1", **STUB_ENV, "ADMISSION": "0",
+           **dict(item.split("=", 1) for item in args.env)}
+    proc, url = (None, args.url) if args.url else spawn(env)
+    factory = PayloadFactory(args.seed, journal_ratio=args.journal_ratio)
+    results = {}
+    try:
+        for qps in [float(q) for q in args.qps.split(",")]:
+            name = f"submit_at_{qps:g}_qps"
+            results[name] = run(url, qps, args.duration, args.concurrency, factory, args.timeout, args.stream)
+            r = results[name]
+            first = f"  first result p50 {r.get('first_p50_ms')} p95 {r.get('first_p95_ms')} ms" if args.stream else ""
+            print(f"{name:22s} {r['rps']:>8} rps  p50 {r.get('p50_ms')} ms  p95 {r.get('p95_ms')} ms  "
+                  f"p99 {r.get('p99_ms')} ms{first}  statuses {r['statuses']}", flush=True)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(10)
+
+    report = {"suite": "load", "environment": {**environment(), "url": args.url or "spawned gunicorn app:app",
+                                               "server_env": env if not args.url else None, "stream": args.stream},
+              "results": results}
+    if args.json:
+        write_report(report, args.json)
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
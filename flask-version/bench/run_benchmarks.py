@@ -0,0 +1,139 @@
+"""
+Micro-benchmarks for the submit pipeline, runnable offline.
+
+Times each building block per call: scoring, the direct feedback and
+resources functions, the FeedbackTable path, the journal scan, the emotion
+path (negation override, cache hit, and a stub-model round trip through the
+micro-batcher), vectorized bulk scoring and a full /api/submit through the
+Flask test client. The emotion model is the stub backend with zero latency,
+so the numbers are the app's own overhead, not DistilBERT's.
+
+    python bench/run_benchmarks.py --json bench-results.json
+    python bench/run_benchmarks.py --baseline bench/baseline.json   # exit 1 on regressions
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Before importing the app: offline stub model with no artificial latency.
+os.environ.setdefault("USE_EMOTION", "1")
+os.environ.setdefault("EMOTION_BACKEND", "stub")
+os.environ.setdefault("EMOTION_BACKEND_PLUGIN", os.path.join(ROOT, "scripts", "stub_backend.py"))
+os.environ.setdefault("EMOTION_STUB_BATCH_MS", "0")
+os.environ.setdefault("EMOTION_STUB_PER_TEXT_MS", "0")
+os.environ.setdefault("EMOTION_BATCH_WAIT_MS", "0")
+# Repeated payloads would be replayed; time the full submit path.
+os.environ.setdefault("SUBMIT_DEDUP", "0")
+# Every request comes from one address; the per-client limit would reject most.
+os.environ.setdefault("ADMISSION", "0")
+
+import numpy as np  # noqa: E402
+
+import app as flask_app  # noqa: E402
+from benchlib import compare, environment, summarize, write_report  # noqa: E402
+from bulk_scoring import score_batch  # noqa: E402
+from journal_matcher import scan  # noqa: E402
+from wellness import (  # noqa: E402
+    calculate_wellness_score, generate_advanced_feedback,
+    get_burnout_level, get_resources,
+)
+
+SAMPLE_JOURNALS = os.path.join(ROOT, "scripts", "sample_journals.txt")
+
+
+def payloads(n, rng, journals):
+    out = []
+    while len(out) < n:
+        data = {name: rng.randint(1, 5) for name in flask_app.REQUIRED_FIELDS}
+        if all(v == 3 for v in data.values()):
+            continue
+        data["journal"] = rng.choice(journals) if rng.random() < 0.4 else ""
+        out.append(data)
+    return out
+
+
+def timed(fn, items):
+    """Per-call durations (seconds) of fn(item) over items, plus overall ops/sec."""
+    clock = time.perf_counter
+    durations = []
+    append = durations.append
+    start_all = clock()
+    for item in items:
+        start = clock()
+        fn(item)
+        append(clock() - start)
+    total = clock() - start_all
+    return durations, len(items) / total if total else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the report here")
+    parser.add_argument("--baseline", help="compare with this stored report; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (fraction)")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(SAMPLE_JOURNALS) as fh:
+        journals = [line.strip() for line in fh if line.strip()]
+    n = args.iterations
+    items = payloads(n, rng, journals)
+    with_journal = [d for d in items if d["journal"]] or items
+    negated = [f"I am not sad, entry {i}" for i in range(n)]
+    unique = [f"{rng.choice(journals)} ({i})" for i in range(n)]
+    matrix = np.array([[rng.randint(1, 5) for _ in range(8)] for _ in range(10_000)], dtype=np.float64)
+    client = flask_app.app.test_client()
+
+    # Warm the feedback table, selector memo and emotion cache for the "warm" cases.
+    for data in items[:5000]:
+        flask_app.FEEDBACK_TABLE.feedback(data)
+        flask_app.FEEDBACK_TABLE.resources(data)
+    for text in journals:
+        flask_app.analyze_journal_emotion(text)
+
+    benchmarks = {
+        "score": (lambda d: get_burnout_level(calculate_wellness_score(d)), items),
+        "feedback_direct": (generate_advanced_feedback, items),
+        "resources_direct": (lambda d: get_resources(get_burnout_level(calculate_wellness_score(d)), d), items),
+        "feedback_table": (lambda d: (flask_app.FEEDBACK_TABLE.feedback(d), flask_app.FEEDBACK_TABLE.resources(d)),
+                           items),
+        "journal_scan_cold": (lambda t: scan.__wrapped__(t), unique),
+        "emotion_regex": (flask_app.analyze_journal_emotion, negated),
+        "emotion_cache_hit": (flask_app.analyze_journal_emotion, [rng.choice(journals) for _ in range(n)]),
+        "emotion_stub_model": (flask_app.analyze_journal_emotion, unique[: max(1, n // 10)]),
+        "bulk_score_10k_rows": (score_batch, [matrix] * max(1, n // 200)),
+        "submit_e2e": (lambda d: client.post("/api/submit", json=d), items[: max(1, n // 4)]),
+        "submit_e2e_journal": (lambda d: client.post("/api/submit", json=d), with_journal[: max(1, n // 4)]),
+    }
+    if args.only:
+        wanted = set(args.only.split(","))
+        benchmarks = {k: v for k, v in benchmarks.items() if k in wanted}
+
+    results = {}
+    for name, (fn, inputs) in benchmarks.items():
+        durations, ops = timed(fn, inputs)
+        results[name] = {**summarize(durations), "ops_per_sec": round(ops, 1)}
+        r = results[name]
+        print(f"{name:22s} p50 {r['p50_us']:>9.2f} us  p95 {r['p95_us']:>9.2f} us  "
+              f"p99 {r['p99_us']:>9.2f} us  {r['ops_per_sec']:>12,.0f} ops/s")
+
+    report = {"suite": "micro", "environment": environment(), "results": results}
+    if args.json:
+        write_report(report, args.json)
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Vectorized wellness scoring for cohort check-ins.
+
+`score_batch` is the columnar counterpart of `calculate_wellness_score` +
+`get_burnout_level` in wellness.py and gives bit-identical results (see
+scripts/check_bulk_scoring.py, which compares all 5^8 slider combinations).
+
+Accepted inputs: a pandas DataFrame, a dict of equal-length columns, a list
+of per-row dicts, or an (n, 8) NumPy array in SLIDERS order.
+"""
+import csv
+import io
+
+import numpy as np
+
+SLIDERS = ("mood", "stress", "focus", "sleep", "motivation", "anxiety", "appetite", "food_security")
+LEVELS = np.array(["Low", "Moderate", "High"], dtype=object)
+
+
+class BatchError(ValueError):
+    """Input batch is malformed (missing column, ragged lengths, non-numeric values)."""
+
+
+def _column(values, name, n=None):
+    try:
+        col = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise BatchError(f"Non-numeric values in column: {name}")
+    if col.ndim != 1 or (n is not None and len(col) != n):
+        raise BatchError(f"Column {name} must be a flat list of the same length as the others")
+    return col
+
+
+def to_matrix(batch):
+    """Normalize any supported batch shape to an (n, 8) float64 array."""
+    if isinstance(batch, np.ndarray):
+        if batch.dtype.names:
+            batch = {name: batch[name] for name in batch.dtype.names}
+        else:
+            if batch.ndim != 2 or batch.shape[1] != len(SLIDERS):
+                raise BatchError(f"Array batch must have shape (n, {len(SLIDERS)}) in order {', '.join(SLIDERS)}")
+            return batch.astype(np.float64, copy=False)
+    if isinstance(batch, list):
+        batch = {name: [row.get(name, 3 if name == "food_security" else None) for row in batch]
+                 for name in SLIDERS}
+    if hasattr(batch, "columns"):  # pandas DataFrame
+        batch = {name: batch[name].to_numpy() for name in SLIDERS if name in batch.columns}
+    if not isinstance(batch, dict):
+        raise BatchError("Unsupported batch type")
+
+    n = None
+    cols = []
+    for name in SLIDERS:
+        if name not in batch:
+            if name == "food_security" and n is not None:
+                cols.append(np.full(n, 3.0))
+                continue
+            raise BatchError(f"Missing field: {name}")
+        col = _column(batch[name], name, n)
+        if name == "food_security":
+            col = np.where(np.isnan(col), 3.0, col)
+        elif np.isnan(col).any():
+            raise BatchError(f"Missing values in column: {name}")
+        n = len(col)
+        cols.append(col)
+    return np.column_stack(cols) if n else np.empty((0, len(SLIDERS)))
+
+
+def wellness_scores(matrix):
+    """Row-wise `calculate_wellness_score` (same operation order, so same floats)."""
+    mood, stress, focus, sleep, motivation, anxiety, appetite, food_security = matrix.T
+    return (
+        mood + (6 - stress) + focus + sleep +
+        motivation + (6 - anxiety) + (3 - np.abs(appetite - 3)) + food_security
+    ) / 8
+
+
+def burnout_levels(scores):
+    """Row-wise `get_burnout_level`."""
+    return LEVELS[np.where(scores >= 4.0, 0, np.where(scores >= 2.5, 1, 2))]
+
+
+def score_batch(batch):
+    """Return (wellness_scores, burnout_levels) arrays for every row of `batch`."""
+    scores = wellness_scores(to_matrix(batch))
+    return scores, burnout_levels(scores)
+
+
+def read_csv(text):
+    """Parse a CSV body with a header row into a DataFrame of slider columns (a dict of columns without pandas)."""
+    try:
+        import pandas as pd
+    except ImportError:  # lite install (requirements-lite.txt)
+        return _read_csv_columns(text)
+    try:
+        return pd.read_csv(io.StringIO(text))
+    except (ValueError, pd.errors.ParserError) as e:
+        raise BatchError(f"Invalid CSV: {e}")
+
+
+def _read_csv_columns(text):
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows or not rows[0]:
+        raise BatchError("Invalid CSV: no header row")
+    header, body = [name.strip() for name in rows[0]], [row for row in rows[1:] if row]
+    if any(len(row) != len(header) for row in body):
+        raise BatchError("Invalid CSV: rows and header have different lengths")
+    return {name: [row[i] for row in body] for i, name in enumerate(header)}
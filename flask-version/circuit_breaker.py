@@ -0,0 +1,104 @@
+"""
+Deadline and circuit breaker for emotion inference.
+
+Every model call waits at most EMOTION_TIMEOUT_MS; past that the check-in
+goes out without emotion (the batch still finishes in the background). After
+EMOTION_BREAKER_FAILURES timeouts or errors in a row, the breaker opens: for
+EMOTION_BREAKER_COOLDOWN_S journals skip the model entirely and get the
+negation overrides, the cache or the cascade when one of those answers, and
+no emotion otherwise. Then it goes half-open and lets a single probe call
+through: a success closes it, a failure opens it for another cool-down. Each
+gunicorn worker has its own breaker, so a worker whose model is stuck stops
+waiting on it within a few requests without waiting for the others.
+"""
+import os
+import threading
+import time
+
+EMOTION_TIMEOUT_MS = float(os.getenv("EMOTION_TIMEOUT_MS", "1500"))
+BREAKER_FAILURES = int(os.getenv("EMOTION_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_S = float(os.getenv("EMOTION_BREAKER_COOLDOWN_S", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATES = (CLOSED, OPEN, HALF_OPEN)
+FAILURE_KINDS = ("timeout", "error")
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe; `failures=0` never opens."""
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown_s=BREAKER_COOLDOWN_S, clock=time.monotonic):
+        self.failures = failures
+        self.cooldown_s = cooldown_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+        self.probes = 0
+        self.short_circuited = 0
+        self.failed = {kind: 0 for kind in FAILURE_KINDS}
+        self.last_failure = None
+
+    def allow(self):
+        """True if this call may go to the model (in half-open state, as the one probe)."""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.cooldown_s:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                self.probes += 1
+                return True
+            self.short_circuited += 1
+            return False
+
+    def success(self):
+        """Record an answer; closes a half-open breaker (the probe), but not an open one."""
+        with self._lock:
+            if self.state == OPEN:
+                # A call let through before the breaker opened, answering late:
+                # the cool-down still runs and a probe decides.
+                return
+            self.consecutive = 0
+            self._probing = False
+            self.state = CLOSED
+
+    def failure(self, kind):
+        """Record a timeout or error; opens the breaker on the threshold or a failed probe."""
+        with self._lock:
+            self.failed[kind] += 1
+            self.last_failure = kind
+            self.consecutive += 1
+            # Calls let through before the breaker opened may still fail afterwards;
+            # they don't restart the cool-down.
+            if self.state == HALF_OPEN or (self.state == CLOSED and 0 < self.failures <= self.consecutive):
+                self.trips += 1
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self._probing = False
+
+    def cancel(self):
+        """The allowed call never reached the model (queue full): no verdict, free the probe slot."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            remaining = self.cooldown_s - (self.clock() - self.opened_at) if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive,
+                "failure_threshold": self.failures,
+                "cooldown_s": self.cooldown_s,
+                "cooldown_remaining_s": round(max(0.0, remaining), 3),
+                "trips": self.trips,
+                "probes": self.probes,
+                "short_circuited": self.short_circuited,
+                "timeouts": self.failed["timeout"],
+                "errors": self.failed["error"],
+                "last_failure": self.last_failure,
+            }
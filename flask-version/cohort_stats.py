@@ -0,0 +1,282 @@
+"""
+Live cohort aggregates for the wellness-office dashboard.
+
+Every check-in adds one small vector (count, burnout-level counts, score and
+slider sums, score histogram) to its minute, hour and day bucket. Workers
+accumulate these deltas in memory and a background thread folds them into the
+store every COHORT_SNAPSHOT_S seconds: a shared SQLite file
+(COHORT_STATS_DB) where rows are merged with additive upserts, so any number
+of gunicorn workers add up correctly and the totals survive restarts, or
+without a file, this process's own memory.
+
+`/api/stats` reads a bounded number of buckets by primary key, so its cost
+doesn't depend on how many check-ins have been recorded. Buckets (and cells
+within them) with fewer than COHORT_K_MIN check-ins are suppressed. A bucket
+never hides just one cell of a breakdown, or it could be worked out from the
+bucket's total: the smallest other non-zero cell is hidden with it. The
+window only adds up what its buckets publish (suppressed buckets and any
+cell hidden in one of them are left out), so no hidden value can be
+recovered by subtracting the buckets from the window.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+from proc_local import LocalSqlite, WorkerThread
+
+COHORT_STATS_DB = os.getenv("COHORT_STATS_DB", "")
+COHORT_SNAPSHOT_S = float(os.getenv("COHORT_SNAPSHOT_S", "5"))
+COHORT_K_MIN = int(os.getenv("COHORT_K_MIN", "10"))
+
+SLIDERS = ("mood", "stress", "focus", "sleep", "motivation", "anxiety", "appetite", "food_security")
+LEVELS = ("Low", "Moderate", "High")
+# Score histogram: 0.5-wide bins from 1.0 (the last bin is closed at 5.0).
+HIST_EDGES = (1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0)
+HIST_LABELS = tuple(f"{lo}-{hi}" for lo, hi in zip(HIST_EDGES, HIST_EDGES[1:]))
+
+FIELDS = (("count",) + tuple(level.lower() for level in LEVELS) + ("score_sum",)
+          + tuple(f"{name}_sum" for name in SLIDERS) + tuple(f"h{i}" for i in range(len(HIST_LABELS))))
+_LEVEL_AT = {level: 1 + i for i, level in enumerate(LEVELS)}
+_SCORE_AT = FIELDS.index("score_sum")
+_HIST_AT = FIELDS.index("h0")
+
+# Bucket width and how many buckets are kept (and may be requested) per grain.
+GRAINS = {"minute": (60, 24 * 60), "hour": (3600, 30 * 24), "day": (86400, 400)}
+
+
+def bucket_start(ts, grain):
+    size = GRAINS[grain][0]
+    return int(ts) // size * size
+
+
+def checkin_vector(data, score, level):
+    """The delta one check-in adds to each of its buckets."""
+    vec = [0.0] * len(FIELDS)
+    vec[0] = 1
+    vec[_LEVEL_AT[level]] = 1
+    vec[_SCORE_AT] = score
+    for i, name in enumerate(SLIDERS):
+        vec[_SCORE_AT + 1 + i] = float(data.get(name, 3))
+    bin_index = min(len(HIST_LABELS) - 1, max(0, int((score - HIST_EDGES[0]) / 0.5)))
+    vec[_HIST_AT + bin_index] = 1
+    return vec
+
+
+def _add(into, vec):
+    for i, v in enumerate(vec):
+        into[i] += v
+
+
+# ---------- Stores
+class MemoryStore:
+    """Totals kept in this process; under gunicorn each worker counts only its own check-ins."""
+
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def merge(self, deltas):
+        with self._lock:
+            for key, vec in deltas.items():
+                row = self._rows.get(key)
+                if row is None:
+                    self._rows[key] = list(vec)
+                else:
+                    _add(row, vec)
+
+    def read(self, grain, starts):
+        with self._lock:
+            return {s: list(self._rows[(grain, s)]) for s in starts if (grain, s) in self._rows}
+
+    def prune(self, grain, before):
+        with self._lock:
+            for key in [k for k in self._rows if k[0] == grain and k[1] < before]:
+                del self._rows[key]
+
+
+class SqliteStore:
+    """Totals shared by all workers; deltas are merged with additive upserts."""
+
+    def __init__(self, path):
+        self.path = path
+        columns = ", ".join(f"{name} REAL NOT NULL DEFAULT 0" for name in FIELDS)
+        self._db = LocalSqlite(path, timeout=5.0, schema=(
+            f"CREATE TABLE IF NOT EXISTS cohort_buckets ("
+            f"grain TEXT NOT NULL, start INTEGER NOT NULL, {columns}, PRIMARY KEY (grain, start))",
+        ))
+
+    def merge(self, deltas):
+        names = ", ".join(FIELDS)
+        marks = ", ".join("?" for _ in FIELDS)
+        updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in FIELDS)
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                f"INSERT INTO cohort_buckets (grain, start, {names}) VALUES (?, ?, {marks}) "
+                f"ON CONFLICT (grain, start) DO UPDATE SET {updates}",
+                [(grain, start, *vec) for (grain, start), vec in deltas.items()],
+            )
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+
+    def read(self, grain, starts):
+        if not starts:
+            return {}
+        rows = self._db().execute(
+            f"SELECT start, {', '.join(FIELDS)} FROM cohort_buckets "
+            f"WHERE grain = ? AND start BETWEEN ? AND ?", (grain, min(starts), max(starts)),
+        ).fetchall()
+        return {row[0]: list(row[1:]) for row in rows}
+
+    def prune(self, grain, before):
+        self._db().execute("DELETE FROM cohort_buckets WHERE grain = ? AND start < ?", (grain, before))
+
+
+# ---------- Aggregator
+class CohortStats:
+    """Buffers per-bucket deltas and periodically folds them into the store."""
+
+    def __init__(self, db_path=COHORT_STATS_DB, snapshot_s=COHORT_SNAPSHOT_S, k_min=COHORT_K_MIN):
+        self.store = SqliteStore(db_path) if db_path else MemoryStore()
+        self.shared = bool(db_path)
+        self.snapshot_s = max(0.1, snapshot_s)
+        self.k_min = max(1, k_min)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._worker = WorkerThread(self._run, "cohort-snapshot", on_fork=self._forget_pending)
+        self.recorded = 0
+        self.snapshots = 0
+        self.snapshot_errors = 0
+        self.last_snapshot_ms = 0.0
+        atexit.register(self.snapshot)
+
+    def _forget_pending(self):
+        # The parent's deltas are its own to snapshot.
+        self._pending = {}
+
+    def add(self, data, score, level, ts=None):
+        """Count one check-in in its minute/hour/day buckets (memory only; O(1))."""
+        self._worker.ensure()
+        ts = time.time() if ts is None else ts
+        vec = checkin_vector(data, score, level)
+        with self._lock:
+            for grain in GRAINS:
+                key = (grain, bucket_start(ts, grain))
+                row = self._pending.get(key)
+                if row is None:
+                    self._pending[key] = list(vec)
+                else:
+                    _add(row, vec)
+            self.recorded += 1
+
+    def _run(self):
+        while True:
+            time.sleep(self.snapshot_s)
+            self.snapshot()
+
+    def snapshot(self):
+        """Fold pending deltas into the store and drop buckets past retention."""
+        with self._lock:
+            deltas, self._pending = self._pending, {}
+        if not deltas:
+            return
+        start = time.perf_counter()
+        try:
+            self.store.merge(deltas)
+            now = time.time()
+            for grain, (size, keep) in GRAINS.items():
+                self.store.prune(grain, bucket_start(now, grain) - size * keep)
+        except sqlite3.Error as e:
+            # Put the deltas back so the next snapshot retries them.
+            with self._lock:
+                for key, vec in deltas.items():
+                    row = self._pending.setdefault(key, [0.0] * len(FIELDS))
+                    _add(row, vec)
+                self.snapshot_errors += 1
+            print(f"[cohort-stats] snapshot error: {e}")
+            return
+        self.snapshots += 1
+        self.last_snapshot_ms = round((time.perf_counter() - start) * 1000.0, 3)
+
+    # ----- Reads
+    def _cells(self, counts, hide=()):
+        """
+        Counts with small non-zero cells (and the labels in `hide`) as None. A
+        single hidden cell takes the smallest other non-zero one with it, so
+        neither follows from the total.
+        """
+        cells = {label: int(c) for label, c in counts}
+        hidden = {label for label, c in cells.items() if 0 < c < self.k_min or label in hide}
+        if len(hidden) == 1:
+            shown = [label for label, c in cells.items() if c and label not in hidden]
+            if shown:
+                hidden.add(min(shown, key=cells.get))
+        for label in hidden:
+            cells[label] = None
+        return cells
+
+    def _bucket(self, start, row, hide=()):
+        out = {"start": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start))}
+        count = int(row[0]) if row else 0
+        if count < self.k_min:
+            out.update(suppressed=True, checkins=None)
+            return out
+        out["suppressed"] = False
+        out["checkins"] = count
+        out["burnout"] = self._cells(zip(LEVELS, row[1:1 + len(LEVELS)]), hide)
+        averages = {"wellness_score": round(row[_SCORE_AT] / count, 2)}
+        for i, name in enumerate(SLIDERS):
+            averages[name] = round(row[_SCORE_AT + 1 + i] / count, 2)
+        out["averages"] = averages
+        out["score_histogram"] = self._cells(zip(HIST_LABELS, row[_HIST_AT:]), hide)
+        return out
+
+    def _window(self, start, rows, buckets):
+        """The published buckets combined; a cell hidden in any of them stays hidden."""
+        window, hide = [0.0] * len(FIELDS), set()
+        for row, bucket in zip(rows, buckets):
+            if bucket["suppressed"]:
+                continue
+            _add(window, row)
+            for cells in (bucket["burnout"], bucket["score_histogram"]):
+                hide.update(label for label, c in cells.items() if c is None)
+        return self._bucket(start, window, hide)
+
+    def query(self, grain="day", buckets=7, now=None):
+        """The latest `buckets` buckets of `grain` (oldest first) plus their combined window."""
+        size, keep = GRAINS[grain]
+        buckets = max(1, min(int(buckets), keep))
+        current = bucket_start(time.time() if now is None else now, grain)
+        starts = [current - size * i for i in range(buckets - 1, -1, -1)]
+        rows = self.store.read(grain, starts)
+        with self._lock:
+            for start in starts:
+                pending = self._pending.get((grain, start))
+                if pending is not None:
+                    row = rows.setdefault(start, [0.0] * len(FIELDS))
+                    _add(row, pending)
+        published = [self._bucket(start, rows.get(start)) for start in starts]
+        return {
+            "grain": grain,
+            "k_min": self.k_min,
+            "shared": self.shared,
+            "buckets": published,
+            "window": self._window(starts[0], [rows.get(start) for start in starts], published),
+        }
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "shared": self.shared,
+            "recorded": self.recorded,
+            "pending_buckets": pending,
+            "snapshots": self.snapshots,
+            "snapshot_errors": self.snapshot_errors,
+            "last_snapshot_ms": self.last_snapshot_ms,
+        }
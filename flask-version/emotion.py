@@ -0,0 +1,326 @@
+"""
+Journal emotion inference: model loading, negation overrides, chunking of
+long journals and a micro-batching engine so concurrent /api/submit calls
+share one forward pass.
+"""
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter
+
+from emotion_backends import load_backend
+from journal_matcher import scan
+from proc_local import WorkerThread
+
+MODEL_NAME = "bhadresh-savani/distilbert-base-uncased-emotion"
+# Local directory (e.g. produced by scripts/export_emotion_model.py) overrides the hub id.
+MODEL_DIR = os.getenv("EMOTION_MODEL_DIR", "")
+BACKEND = os.getenv("EMOTION_BACKEND", "torch")
+# Identifies which weights/backend produced a result (used to namespace caches).
+MODEL_ID = f"{MODEL_DIR or MODEL_NAME}:{BACKEND}"
+
+BATCH_MAX_SIZE = int(os.getenv("EMOTION_BATCH_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("EMOTION_BATCH_WAIT_MS", "10"))
+QUEUE_MAX = int(os.getenv("EMOTION_QUEUE_MAX", "64"))
+
+# Long journals: windows of CHUNK_TOKENS tokens (512 minus [CLS]/[SEP]),
+# overlapping by CHUNK_OVERLAP, at most MAX_TOKENS tokens per journal.
+CHUNK_TOKENS = int(os.getenv("EMOTION_CHUNK_TOKENS", "510"))
+CHUNK_OVERLAP = int(os.getenv("EMOTION_CHUNK_OVERLAP", "64"))
+MAX_TOKENS = int(os.getenv("EMOTION_MAX_TOKENS", "2048"))
+# Texts within a forward pass differ in length by at most this factor...
+BUCKET_RATIO = 2.0
+# ...except short ones (in characters), which all go in together.
+BUCKET_FLOOR_CHARS = 256
+
+EMOTION_PIPELINE = None
+_PIPELINE_LOCK = threading.Lock()
+
+# Load/warm-up bookkeeping for /health readiness and memory reporting.
+MODEL_STATUS = {
+    "ready": False,
+    "backend": BACKEND,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "loaded_pid": None,
+    "error": None,
+}
+WARMUP_TEXT = "Feeling a little stressed about exams this week but mostly hopeful."
+
+# ---------- Negation overrides (checked before the model, in order)
+NEGATION_RULES = [
+    (("sad",), {"emotion": "neutral", "confidence": 1.0}),
+    (("happy", "good"), {"emotion": "sadness", "confidence": 0.9}),
+    (("stressed",), {"emotion": "calm", "confidence": 0.95}),
+]
+
+def negation_override(text):
+    """Return a fixed emotion when the journal negates sad/happy/good/stressed."""
+    negated = scan(text).negated
+    if negated:
+        for targets, result in NEGATION_RULES:
+            if negated.intersection(targets):
+                return dict(result)
+    return None
+
+# ---------- Model
+def get_pipeline():
+    """Load the classifier for EMOTION_BACKEND once per process (thread-safe)."""
+    global EMOTION_PIPELINE
+    if EMOTION_PIPELINE is None:
+        with _PIPELINE_LOCK:
+            if EMOTION_PIPELINE is None:
+                start = time.perf_counter()
+                EMOTION_PIPELINE = load_backend(BACKEND, MODEL_DIR or MODEL_NAME)
+                MODEL_STATUS["load_seconds"] = round(time.perf_counter() - start, 3)
+                MODEL_STATUS["loaded_pid"] = os.getpid()
+    return EMOTION_PIPELINE
+
+def top_emotion(scores):
+    """Reduce a list of {label, score} dicts to the response schema."""
+    top = max(scores, key=lambda x: x['score'])
+    return {"emotion": top['label'], "confidence": float(top['score'])}
+
+# ---------- Long journals
+# Journals past the model's 512-token limit are split into overlapping
+# windows. All windows and short journals of a batch are sorted by length
+# and run in length buckets, so one long journal doesn't pad the whole batch
+# to 512 tokens. Each journal's result is the token-weighted mean of its
+# windows' scores. Past MAX_TOKENS, windows are picked evenly across the
+# journal (the first, and the last when two or more fit), which bounds the
+# worst case.
+CHUNK_STATS = Counter()
+_WORD = re.compile(r"\S+")
+
+
+def token_spans(model, text):
+    """Character (start, end) of each model token in `text`; whitespace words when the backend has no tokenizer."""
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+        return tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    return [m.span() for m in _WORD.finditer(text)]
+
+
+def chunk_text(model, text, window=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, max_tokens=MAX_TOKENS):
+    """Split `text` into [(chunk, tokens)] windows; texts that fit come back whole as [(text, None)]."""
+    window = max(1, min(window, max_tokens))
+    if not 0 <= overlap < window:
+        raise ValueError(f"chunk overlap must be in [0, {window}), got {overlap}")
+    if len(text) <= window:  # every token covers at least one character
+        return [(text, None)]
+    spans = token_spans(model, text)
+    n = len(spans)
+    if n <= window:
+        return [(text, n)]
+    stride = window - overlap
+    starts = list(range(0, n - window, stride)) + [n - window]
+    limit = max(1, max_tokens // window)
+    if len(starts) > limit:
+        CHUNK_STATS["capped"] += 1
+        last = len(starts) - 1
+        starts = [starts[round(i * last / (limit - 1))] for i in range(limit)] if limit > 1 else starts[:1]
+    return [(text[spans[s][0]:spans[s + window - 1][1]], window) for s in starts]
+
+
+def length_buckets(items, max_size, ratio=BUCKET_RATIO, floor=BUCKET_FLOOR_CHARS):
+    """Group (text, ...) items, sorted by length, into runs of similar length."""
+    buckets = []
+    for item in sorted(items, key=lambda it: len(it[0])):
+        size = max(len(item[0]), floor)
+        if buckets and len(buckets[-1][1]) < max_size and size <= buckets[-1][0] * ratio:
+            buckets[-1][1].append(item)
+        else:
+            buckets.append((size, [item]))
+    return [bucket for _, bucket in buckets]
+
+
+def classify_batch(texts):
+    """Classify `texts` in length-bucketed forward passes; returns one result per text."""
+    model = get_pipeline()
+    texts = list(texts)
+    # (chunk, journal index, weight) for every window of every journal.
+    items = []
+    for i, text in enumerate(texts):
+        chunks = chunk_text(model, text)
+        if len(chunks) > 1:
+            CHUNK_STATS["chunked"] += 1
+            CHUNK_STATS["chunks"] += len(chunks)
+            items.extend((chunk, i, tokens) for chunk, tokens in chunks)
+        else:
+            items.append((chunks[0][0], i, 1))  # weight 1 keeps the model's scores bit-for-bit
+    CHUNK_STATS["texts"] += len(texts)
+
+    totals = [{} for _ in texts]
+    weights = [0.0] * len(texts)
+    for bucket in length_buckets(items, max(BATCH_MAX_SIZE, 1)):
+        # truncation only guards against a re-tokenized window landing past the limit.
+        scores = model([chunk for chunk, _, _ in bucket], batch_size=len(bucket), truncation=True)
+        for (_, i, weight), result in zip(bucket, scores):
+            weights[i] += weight
+            for entry in result:
+                totals[i][entry["label"]] = totals[i].get(entry["label"], 0.0) + weight * entry["score"]
+    MODEL_STATUS["ready"] = True
+    return [top_emotion([{"label": label, "score": total / weights[i]} for label, total in totals[i].items()])
+            for i in range(len(texts))]
+
+def warm_up():
+    """Load the model and run one inference so no student pays for it."""
+    try:
+        get_pipeline()
+        start = time.perf_counter()
+        classify_batch([WARMUP_TEXT])
+        MODEL_STATUS["warmup_seconds"] = round(time.perf_counter() - start, 3)
+        MODEL_STATUS["error"] = None
+        print(f"[emotion] model ready in pid {os.getpid()} "
+              f"(load {MODEL_STATUS['load_seconds']}s, warm-up {MODEL_STATUS['warmup_seconds']}s)")
+    except Exception as e:
+        MODEL_STATUS["error"] = str(e)
+        print(f"[emotion] warm-up failed: {e}")
+    return MODEL_STATUS
+
+def model_status():
+    status = dict(MODEL_STATUS)
+    # True in gunicorn workers when the weights came from the master via fork.
+    status["shared_from_master"] = bool(status["loaded_pid"]) and status["loaded_pid"] != os.getpid()
+    return status
+
+def process_memory():
+    """RSS / PSS / shared memory of this process in MB (Linux /proc); just the pid elsewhere."""
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_clean_mb",
+              "Shared_Dirty": "shared_dirty_mb", "Private_Dirty": "private_dirty_mb"}
+    out = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    out[fields[key]] = round(int(rest.split()[0]) / 1024.0, 1)
+    except OSError:
+        pass
+    return out
+
+# ---------- Micro-batching engine
+class QueueSaturated(Exception):
+    """Raised when the inference queue is full and the caller should degrade."""
+
+
+class _Pending:
+    __slots__ = ("text", "enqueued", "done", "result", "error", "abandoned")
+
+    def __init__(self, text):
+        self.text = text
+        self.enqueued = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Set when the caller stops waiting; the batch leaves the text out.
+        self.abandoned = False
+
+
+class MicroBatcher:
+    """
+    Collects texts from concurrent callers into batches of up to
+    `max_batch_size`, waiting at most `max_wait_ms` after the first item,
+    and runs `infer(texts) -> results` once per batch on a background thread.
+    """
+
+    WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    def __init__(self, infer=classify_batch, max_batch_size=BATCH_MAX_SIZE,
+                 max_wait_ms=BATCH_MAX_WAIT_MS, max_queue=QUEUE_MAX):
+        self.infer = infer
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self._worker = WorkerThread(self._run, "emotion-batcher")
+        self.batch_sizes = Counter()
+        self.wait_buckets = Counter()
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.saturated = 0
+        self.errors = 0
+        self.expired = 0
+
+    def submit(self, text, timeout=None):
+        """Queue `text` and block until its batch finishes; raises QueueSaturated when full."""
+        self._worker.ensure()
+        item = _Pending(text)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.saturated += 1
+            raise QueueSaturated("emotion queue is full")
+        if not item.done.wait(timeout):
+            item.abandoned = True
+            raise TimeoutError("emotion inference timed out")
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        live = [item for item in batch if not item.abandoned]
+        if len(live) < len(batch):
+            with self._lock:
+                self.expired += len(batch) - len(live)
+            batch = live
+            if not batch:
+                return
+        try:
+            results = self.infer([item.text for item in batch])
+            error = None
+        except Exception as e:
+            results, error = [None] * len(batch), e
+        now = time.monotonic()
+        with self._lock:
+            self.batch_sizes[len(batch)] += 1
+            if error is not None:
+                self.errors += 1
+            for item in batch:
+                wait_ms = (now - item.enqueued) * 1000.0
+                self.wait_count += 1
+                self.wait_total_ms += wait_ms
+                self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+                bucket = next((b for b in self.WAIT_BUCKETS_MS if wait_ms <= b), "+Inf")
+                self.wait_buckets[bucket] += 1
+        for item, result in zip(batch, results):
+            item.result, item.error = result, error
+            item.done.set()
+
+    def stats(self):
+        """Snapshot of queue depth, batch-size histogram and per-request wait time."""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batch_sizes": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+                "wait_ms": {
+                    "count": self.wait_count,
+                    "avg": round(self.wait_total_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                    "max": round(self.wait_max_ms, 3),
+                    "buckets": {str(b): self.wait_buckets.get(b, 0) for b in self.WAIT_BUCKETS_MS + ("+Inf",)},
+                },
+                "saturated": self.saturated,
+                "errors": self.errors,
+                "expired": self.expired,
+            }
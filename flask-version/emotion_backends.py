@@ -0,0 +1,114 @@
+"""
+Pluggable CPU inference backends for the emotion classifier.
+
+Every backend is a callable `classify(texts, batch_size=...)` returning, per
+text, a list of {"label", "score"} dicts over all emotions — the same shape
+the transformers pipeline returns with `return_all_scores=True` — so the rest
+of the app doesn't care which one is loaded.
+
+    torch       fp32 transformers pipeline (default, as before)
+    torch-int8  dynamic int8 quantization of the Linear layers
+    onnx        ONNX Runtime session over a model exported by
+                scripts/export_emotion_model.py
+
+Other backends can be added with `register_backend`, from a file named by
+EMOTION_BACKEND_PLUGIN that is imported on first load — that is how the
+offline benchmarks and load tests get the model-free `stub`
+(scripts/stub_backend.py) without it living in the app.
+"""
+import importlib.util
+import os
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+BACKEND_PLUGIN = os.getenv("EMOTION_BACKEND_PLUGIN", "")
+
+_REGISTERED = {}
+
+
+def register_backend(name, factory):
+    """Make `factory(model)` loadable as EMOTION_BACKEND=name."""
+    _REGISTERED[name] = factory
+
+
+def _import_plugin(path):
+    if not os.path.isfile(path):
+        raise ValueError(f"EMOTION_BACKEND_PLUGIN {path!r} is not a file")
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+
+def _torch_pipeline(model):
+    from transformers import pipeline
+    return pipeline("text-classification", model=model, return_all_scores=True)
+
+
+def _torch_int8_pipeline(model):
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    tokenizer = AutoTokenizer.from_pretrained(model)
+    fp32 = AutoModelForSequenceClassification.from_pretrained(model)
+    fp32.eval()
+    int8 = torch.quantization.quantize_dynamic(fp32, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("text-classification", model=int8, tokenizer=tokenizer, return_all_scores=True)
+
+
+class OnnxClassifier:
+    """ONNX Runtime sequence classifier with a pipeline-compatible call signature."""
+
+    def __init__(self, model_dir, onnx_path=None, max_length=512):
+        import numpy as np
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+        self._np = np
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        config = AutoConfig.from_pretrained(model_dir)
+        self.labels = [config.id2label[i] for i in range(len(config.id2label))]
+        if onnx_path is None:
+            quantized = os.path.join(model_dir, "model.int8.onnx")
+            onnx_path = quantized if os.path.exists(quantized) else os.path.join(model_dir, "model.onnx")
+        opts = ort.SessionOptions()
+        threads = int(os.getenv("EMOTION_ONNX_THREADS", "0"))
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.max_length = max_length
+        self.onnx_path = onnx_path
+
+    def __call__(self, texts, batch_size=None, **kwargs):
+        np = self._np
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        batch_size = batch_size or len(texts) or 1
+        out = []
+        for i in range(0, len(texts), batch_size):
+            enc = self.tokenizer(texts[i:i + batch_size], padding=True, truncation=True,
+                                 max_length=self.max_length, return_tensors="np")
+            feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+            logits = self.session.run(None, feeds)[0]
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            for row in probs:
+                out.append([{"label": label, "score": float(p)} for label, p in zip(self.labels, row)])
+        return out
+
+
+def load_backend(name, model):
+    """Build the classifier for backend `name` from a hub id or local directory."""
+    if name == "torch":
+        return _torch_pipeline(model)
+    if name == "torch-int8":
+        return _torch_int8_pipeline(model)
+    if name == "onnx":
+        if not os.path.isdir(model):
+            raise ValueError("onnx backend needs EMOTION_MODEL_DIR pointing at an exported model")
+        return OnnxClassifier(model)
+    if name not in _REGISTERED and BACKEND_PLUGIN:
+        _import_plugin(BACKEND_PLUGIN)
+    if name in _REGISTERED:
+        return _REGISTERED[name](model)
+    raise ValueError(f"unknown EMOTION_BACKEND {name!r}; choose one of "
+                     f"{', '.join(BACKENDS + tuple(_REGISTERED))} or set EMOTION_BACKEND_PLUGIN")
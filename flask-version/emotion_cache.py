@@ -0,0 +1,140 @@
+"""
+Content-addressed cache for journal emotion results.
+
+Keys are a hash of the normalized journal (lowercased, whitespace collapsed)
+so trivially different entries share a result. A bounded in-memory LRU sits
+in front of an optional SQLite file that all gunicorn workers share and that
+survives restarts.
+"""
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from emotion import MODEL_ID
+from proc_local import LocalSqlite
+
+CACHE_SIZE = int(os.getenv("EMOTION_CACHE_SIZE", "2048"))
+CACHE_DB = os.getenv("EMOTION_CACHE_DB", "")
+CACHE_DB_MAX_ROWS = int(os.getenv("EMOTION_CACHE_DB_MAX_ROWS", "200000"))
+
+_WS = re.compile(r"\s+")
+
+def cache_key(text, namespace=MODEL_ID):
+    """Stable key for `text`; the model/backend id is mixed in so a swap starts fresh."""
+    norm = _WS.sub(" ", (text or "").lower()).strip()
+    return hashlib.blake2b(f"{namespace}\0{norm}".encode(), digest_size=16).hexdigest()
+
+
+class EmotionCache:
+    """Two-tier get/put cache of {"emotion", "confidence"} results."""
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, max_items=CACHE_SIZE, db_path=CACHE_DB, db_max_rows=CACHE_DB_MAX_ROWS):
+        self.max_items = max(0, max_items)
+        self.db_path = db_path or None
+        self.db_max_rows = db_max_rows
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = LocalSqlite(self.db_path, schema=(
+            "CREATE TABLE IF NOT EXISTS emotion_cache ("
+            "key TEXT PRIMARY KEY, emotion TEXT NOT NULL, confidence REAL NOT NULL, "
+            "created REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS emotion_cache_created ON emotion_cache(created)",
+        ))
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.disk_errors = 0
+
+    # ----- SQLite tier
+    def _disk_get(self, key):
+        try:
+            row = self._db().execute(
+                "SELECT emotion, confidence FROM emotion_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print(f"[emotion-cache] read error: {e}")
+            return None
+        if row is None:
+            return None
+        return {"emotion": row[0], "confidence": float(row[1])}
+
+    def _disk_put(self, key, value):
+        try:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO emotion_cache (key, emotion, confidence, created) VALUES (?, ?, ?, ?)",
+                (key, value["emotion"], value["confidence"], time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                cur = db.execute(
+                    "DELETE FROM emotion_cache WHERE key IN ("
+                    "SELECT key FROM emotion_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (self.db_max_rows,),
+                )
+                self.disk_evictions += max(cur.rowcount, 0)
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print(f"[emotion-cache] write error: {e}")
+
+    # ----- Memory tier
+    def _mem_put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, text):
+        key = cache_key(text)
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return dict(value)
+        if self.db_path:
+            value = self._disk_get(key)
+            if value is not None:
+                self.disk_hits += 1
+                if self.max_items:
+                    self._mem_put(key, value)
+                return dict(value)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, text, value):
+        key = cache_key(text)
+        value = {"emotion": value["emotion"], "confidence": float(value["confidence"])}
+        if self.max_items:
+            self._mem_put(key, value)
+        if self.db_path:
+            self._disk_put(key, value)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_items": self.max_items,
+                "disk": bool(self.db_path),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "disk_errors": self.disk_errors,
+            }
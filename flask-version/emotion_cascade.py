@@ -0,0 +1,122 @@
+"""
+Cheap-first tier for journal emotion, between the cache and the transformer.
+
+A TF-IDF + logistic regression model distilled offline from the
+transformer's own labels (scripts/distill_emotion_cascade.py) answers when
+its top-class probability reaches EMOTION_CASCADE_THRESHOLD; anything less
+confident escalates to the transformer as before. The model costs tens of
+microseconds per journal instead of tens of milliseconds, so the share of
+journals it answers comes straight off the model queue. Its answers are not
+written to the emotion cache, which stays keyed on the transformer's output.
+
+sklearn's own predict_proba spends about a millisecond per call on input
+validation, so the fitted TF-IDF + multinomial logistic regression is
+unpacked into a vocabulary dict, idf weights and a coefficient matrix and
+scored directly (identical probabilities; the distillation script checks).
+
+The bundle records which model/backend produced its training labels; loading
+one distilled from a different teacher logs a warning.
+"""
+import math
+import os
+import threading
+import time
+from collections import Counter
+
+from emotion import MODEL_ID
+
+CASCADE_MODEL = os.getenv("EMOTION_CASCADE_MODEL", "")
+CASCADE_THRESHOLD = float(os.getenv("EMOTION_CASCADE_THRESHOLD", "0.9"))
+
+
+class LinearTfidf:
+    """predict_proba of a fitted TfidfVectorizer -> multinomial LogisticRegression pipeline, for one text."""
+
+    def __init__(self, pipeline):
+        import numpy as np  # with scikit-learn; not needed while the cascade is off
+        vectorizer, classifier = pipeline.steps[0][1], pipeline.steps[-1][1]
+        if len(classifier.classes_) < 3 or vectorizer.binary or vectorizer.norm != "l2":
+            raise ValueError("expected an l2-normalized TF-IDF and a multiclass logistic regression")
+        self.classes = [str(label) for label in classifier.classes_]
+        self.analyze = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.sublinear = vectorizer.sublinear_tf
+        self.idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(self.vocabulary))
+        self.coef = np.ascontiguousarray(classifier.coef_.T)  # (features, classes)
+        self.intercept = classifier.intercept_
+
+    def predict_proba(self, text):
+        import numpy as np
+        counts = Counter(i for i in map(self.vocabulary.get, self.analyze(text)) if i is not None)
+        if counts:
+            index = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+            if self.sublinear:
+                tf = np.log(tf) + 1.0
+            weights = tf * self.idf[index]
+            weights /= math.sqrt(float(weights @ weights))
+            logits = weights @ self.coef[index] + self.intercept
+        else:
+            logits = self.intercept.astype(np.float64)
+        logits = np.exp(logits - logits.max())
+        return logits / logits.sum()
+
+
+class EmotionCascade:
+    """Confidence-gated local classifier; `classify` returns None to escalate."""
+
+    def __init__(self, path, threshold=CASCADE_THRESHOLD):
+        import joblib  # ships with scikit-learn; only needed when the cascade is on
+        bundle = joblib.load(path)
+        self.path = path
+        self.model = LinearTfidf(bundle["model"])
+        self.teacher = bundle.get("teacher")
+        self.labels = self.model.classes
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.answered = 0
+        self.escalated = 0
+        self.seconds = 0.0
+        if self.teacher != MODEL_ID:
+            print(f"[emotion-cascade] {path} was distilled from {self.teacher}, serving {MODEL_ID}")
+
+    def classify(self, text):
+        start = time.perf_counter()
+        probs = self.model.predict_proba(text)
+        top = int(probs.argmax())
+        confidence = float(probs[top])
+        confident = confidence >= self.threshold
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.seconds += elapsed
+            if confident:
+                self.answered += 1
+            else:
+                self.escalated += 1
+        if not confident:
+            return None
+        return {"emotion": self.labels[top], "confidence": confidence}
+
+    def stats(self):
+        with self._lock:
+            total = self.answered + self.escalated
+            return {
+                "model": self.path,
+                "teacher": self.teacher,
+                "threshold": self.threshold,
+                "answered": self.answered,
+                "escalated": self.escalated,
+                "escalated_fraction": round(self.escalated / total, 4) if total else 0.0,
+                "avg_us": round(self.seconds / total * 1e6, 1) if total else 0.0,
+            }
+
+
+def load_cascade(path=CASCADE_MODEL, threshold=CASCADE_THRESHOLD):
+    """The cascade tier for `path`, or None when unset or unloadable (journals go to the model)."""
+    if not path:
+        return None
+    try:
+        return EmotionCascade(path, threshold)
+    except Exception as e:
+        print(f"[emotion-cascade] disabled, could not load {path}: {e}")
+        return None
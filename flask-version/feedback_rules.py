@@ -0,0 +1,418 @@
+"""
+Declarative feedback and resource rules (feedback_rules.json), compiled
+into a bitmask evaluator and hot-reloaded without a restart.
+
+A rule's `when` maps sliders to a condition (">=4", "<=2", "==3", "<3",
+">3", "!=3" or a list of values) and may name burnout levels; all of them
+must hold. `at_least: {count, of}` adds "at least `count` of these slider
+conditions" (count 1 is an "or"). Feedback sections are evaluated in file
+order; a `first` section keeps its first matching rule, an `all` section
+every match. A rule has one `text`, or `texts` with a `pick_daily` scope (the
+same pick for everyone all day, see selector.py). Resource rules add their
+`items` in order, up to `limit`. Journal rules key on journal_matcher topics
+and on the emotion label with its confidence.
+
+Compiling numbers the rules (bit j = rule j, in file order) and works out,
+for every slider value and burnout level, the mask of rules it doesn't rule
+out. Those are folded into two tables, one per half of the sliders (5^4
+value tuples each), so a check-in is two lookups and an AND with its level's
+mask. `at_least` rules without enough of their counted values are dropped
+(each slider value is also one bit of a `state` int, slider i value v -> bit
+5i+v-1), and the set bits are walked in order; a match in a `first` section
+clears the rest of that section. All sections come out of that one pass,
+memoized per matched mask for the day. Sliders that aren't 1..5 can't be
+looked up, so those check-ins are checked condition by condition instead,
+with the same result.
+
+FEEDBACK_RULES_FILE is checked for changes (mtime and size) at most every
+FEEDBACK_RULES_RELOAD_S seconds, on use. A changed file is compiled in full
+and then swapped in with one reference assignment. Every evaluation reads
+the ruleset once, so it never mixes old and new rules. A file that fails to
+compile leaves the current rules in place and is logged; at startup it is
+an error. Each gunicorn worker reloads on its own.
+"""
+import hashlib
+import itertools
+import json
+import operator
+import os
+import threading
+import time
+
+from journal_matcher import TOPICS
+from selector import SELECTOR
+
+RULES_FILE = os.getenv("FEEDBACK_RULES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            "feedback_rules.json"))
+RELOAD_S = float(os.getenv("FEEDBACK_RULES_RELOAD_S", "2"))
+
+SLIDERS = ("mood", "stress", "focus", "sleep", "motivation", "anxiety", "appetite", "food_security")
+LEVELS = ("Low", "Moderate", "High")
+VALUES = range(1, 6)
+LEVEL_BIT = len(SLIDERS) * len(VALUES)
+SECTIONS = ("priority", "combo", "singles", "campus", "food", "farmers")
+MODES = ("first", "all")
+OPS = {"<=": operator.le, ">=": operator.ge, "==": operator.eq, "!=": operator.ne, "<": operator.lt,
+       ">": operator.gt}
+
+
+class RuleError(ValueError):
+    """The rules file is malformed (unknown slider, section, topic or condition)."""
+
+
+def _condition(spec):
+    """A predicate on one slider value from ">=4"-style text or a list of values."""
+    if isinstance(spec, list):
+        allowed = frozenset(spec)
+        return lambda v: v in allowed
+    if isinstance(spec, str):
+        for symbol in sorted(OPS, key=len, reverse=True):
+            if spec.startswith(symbol):
+                try:
+                    threshold = float(spec[len(symbol):])
+                except ValueError:
+                    break
+                op = OPS[symbol]
+                return lambda v: op(v, threshold)
+    raise RuleError(f"bad condition {spec!r}; use e.g. '>=4', '<=2', '==3' or a list of values")
+
+
+def _allow_masks(predicates):
+    """Per slider value and per level, the mask of rules (bit j = predicates[j]) it doesn't rule out."""
+    sliders = [dict.fromkeys(VALUES, 0) for _ in SLIDERS]
+    levels = dict.fromkeys(LEVELS, 0)
+    for j, predicate in enumerate(predicates):
+        for i, allow in enumerate(sliders):
+            for v in VALUES:
+                if not predicate.forbidden >> (i * 5 + v - 1) & 1:
+                    allow[v] |= 1 << j
+        for k, level in enumerate(LEVELS):
+            if not predicate.forbidden >> (LEVEL_BIT + k) & 1:
+                levels[level] |= 1 << j
+    counted = tuple((1 << j, p.counted, p.count) for j, p in enumerate(predicates) if p.counted)
+    return sliders, levels, counted
+
+
+def _slider_bits(name, predicate):
+    if name not in SLIDERS:
+        raise RuleError(f"unknown slider {name!r}; sliders are {', '.join(SLIDERS)}")
+    i = SLIDERS.index(name)
+    allowed = care = 0
+    for v in VALUES:
+        care |= 1 << (i * 5 + v - 1)
+        if predicate(v):
+            allowed |= 1 << (i * 5 + v - 1)
+    return allowed, care
+
+
+class Predicate:
+    """The `when` / `at_least` part of one rule, as masks plus an equivalent per-value test."""
+
+    __slots__ = ("forbidden", "counted", "count", "uses_sliders", "_conditions", "_levels", "_of")
+
+    def __init__(self, rule):
+        when = dict(rule.get("when") or {})
+        levels = when.pop("level", None)
+        self.forbidden, self._conditions, self._levels, self._of = 0, [], None, []
+        if levels is not None:
+            if isinstance(levels, str):
+                levels = [levels]
+            unknown = set(levels) - set(LEVELS)
+            if unknown:
+                raise RuleError(f"unknown level(s) {sorted(unknown)}; levels are {', '.join(LEVELS)}")
+            self._levels = frozenset(levels)
+            for j, level in enumerate(LEVELS):
+                if level not in self._levels:
+                    self.forbidden |= 1 << (LEVEL_BIT + j)
+        for name, spec in when.items():
+            predicate = _condition(spec)
+            allowed, care = _slider_bits(name, predicate)
+            self.forbidden |= care & ~allowed
+            self._conditions.append((SLIDERS.index(name), predicate))
+        self.counted, self.count = 0, 0
+        at_least = rule.get("at_least")
+        if at_least is not None:
+            self.count = int(at_least.get("count", 1))
+            for name, spec in (at_least.get("of") or {}).items():
+                predicate = _condition(spec)
+                self.counted |= _slider_bits(name, predicate)[0]
+                self._of.append((SLIDERS.index(name), predicate))
+            if not self._of or not 1 <= self.count <= len(self._of):
+                raise RuleError(f"at_least needs 1 <= count <= {len(self._of)} conditions, got {at_least!r}")
+        self.uses_sliders = bool(self._conditions or self._of)
+
+    def test(self, values, level):
+        """Same answer as the masks, for any slider values."""
+        if self._levels is not None and level not in self._levels:
+            return False
+        if not all(predicate(values[i]) for i, predicate in self._conditions):
+            return False
+        return not self._of or sum(1 for i, predicate in self._of if predicate(values[i])) >= self.count
+
+
+def _output(rule, where):
+    """(scope, texts): scope None for a fixed `text`."""
+    if "texts" in rule:
+        texts = tuple(rule["texts"])
+        scope = rule.get("pick_daily")
+        if not texts or not all(isinstance(t, str) for t in texts) or not isinstance(scope, str):
+            raise RuleError(f"{where}: `texts` needs a non-empty list of strings and a `pick_daily` scope")
+        return scope, texts
+    if not isinstance(rule.get("text"), str):
+        raise RuleError(f"{where}: a rule needs `text` or `texts`")
+    return None, (rule["text"],)
+
+
+class Ruleset:
+    """One compiled rules file; immutable once built (apart from the memoized daily picks)."""
+
+    def __init__(self, spec, source=""):
+        self.source = source
+        self.version = hashlib.blake2b(json.dumps(spec, sort_keys=True).encode(), digest_size=6).hexdigest()
+        feedback = spec.get("feedback") or {}
+        self.default = feedback.get("default", "")
+        # Flat list over all sections, in evaluation order:
+        # (section name, first-only, predicate, scope, texts)
+        self.feedback_rules = []
+        seen = set()
+        for section in feedback.get("sections") or ():
+            name, mode = section.get("name"), section.get("mode", "first")
+            if name not in SECTIONS or name in seen:
+                raise RuleError(f"section {name!r} is unknown or repeated; sections are {', '.join(SECTIONS)}")
+            if mode not in MODES:
+                raise RuleError(f"section {name}: mode must be one of {', '.join(MODES)}")
+            seen.add(name)
+            for n, rule in enumerate(section.get("rules") or ()):
+                predicate = Predicate(rule)
+                scope, texts = _output(rule, f"{name} rule {n + 1}")
+                self.feedback_rules.append((name, mode == "first", predicate, scope, texts))
+
+        journal = spec.get("journal") or {}
+        topics = {topic for topic, _ in TOPICS}
+        self.topic_lines = []
+        for rule in journal.get("topics") or ():
+            if rule.get("topic") not in topics:
+                raise RuleError(f"unknown journal topic {rule.get('topic')!r}; topics are {', '.join(sorted(topics))}")
+            self.topic_lines.append((rule["topic"], _output(rule, f"topic {rule['topic']}")[1][0]))
+        self.emotion_lines = [(frozenset(rule.get("emotions") or ()), float(rule.get("confidence_above", 0.0)),
+                               _output(rule, "emotion rule")[1][0])
+                              for rule in journal.get("emotions") or ()]
+
+        resources = spec.get("resources") or {}
+        self.resource_title = resources.get("title", "")
+        self.resource_limit = int(resources.get("limit", 4))
+        self.resource_rules = []
+        for n, rule in enumerate(resources.get("rules") or ()):
+            items = rule.get("items")
+            if not items or not all(isinstance(item, dict) and "name" in item for item in items):
+                raise RuleError(f"resource rule {n + 1}: `items` needs a list of objects with a name")
+            self.resource_rules.append((Predicate(rule), tuple(dict(item) for item in items)))
+        self._index()
+
+    def _index(self):
+        """Build the lookup tables and, per feedback rule, what a match clears."""
+        feedback, feedback_levels, feedback_counted = _allow_masks([r[2] for r in self.feedback_rules])
+        resources, resource_levels, resource_counted = _allow_masks([r[0] for r in self.resource_rules])
+        # One mask over both rule lists: feedback rules in the low bits, resource rules above them.
+        shift = self._shift = len(self.feedback_rules)
+        self._feedback_all = (1 << shift) - 1
+        self._levels = {level: feedback_levels[level] | resource_levels[level] << shift for level in LEVELS}
+        self._counted = feedback_counted + tuple((rule << shift, counted, count)
+                                                 for rule, counted, count in resource_counted)
+        # The sliders in two halves: every 5^4 tuple of values -> (rules it allows, its state bits).
+        half = len(SLIDERS) // 2
+        self._halves = []
+        for lo, hi in ((0, half), (half, len(SLIDERS))):
+            table = {}
+            for combo in itertools.product(VALUES, repeat=hi - lo):
+                allow, state = -1, 0
+                for i, v in zip(range(lo, hi), combo):
+                    allow &= feedback[i][v] | resources[i][v] << shift
+                    state |= 1 << (i * 5 + v - 1)
+                table[combo] = (allow, state)
+            self._halves.append(table)
+        self._half = half
+        sections = {}
+        for j, (name, first, _, _, _) in enumerate(self.feedback_rules):
+            sections[name] = sections.get(name, 0) | 1 << j
+        # rule j -> (section, first-only, mask to keep after it matches)
+        self._feedback_outputs = tuple((name, first, ~(sections[name] if first else 1 << j))
+                                       for j, (name, first, _, _, _) in enumerate(self.feedback_rules))
+        self._resource_items = tuple(items for _, items in self.resource_rules)
+        self._resource_memo = {}
+        self._day = (None, (), {})
+
+    def _decoded(self, today):
+        """Today's feedback texts per rule and the memo of matched mask -> sections."""
+        day = self._day
+        if day[0] != (today, SELECTOR):
+            texts = tuple(texts[0] if scope is None else SELECTOR.daily(texts, scope, today)
+                          for _, _, _, scope, texts in self.feedback_rules)
+            day = self._day = ((today, SELECTOR), texts, {})
+        return day[1], day[2]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as fh:
+            try:
+                spec = json.load(fh)
+            except ValueError as e:
+                raise RuleError(f"{path}: {e}")
+        return cls(spec, path)
+
+    def _match(self, values, level):
+        """Mask of the feedback and resource rules that hold, or None if the values aren't in the tables."""
+        matched = self._levels.get(level)
+        if matched is None:
+            return None
+        head, tail = self._halves
+        try:
+            head_allow, head_state = head[values[:self._half]]
+            tail_allow, tail_state = tail[values[self._half:]]
+        except (KeyError, TypeError):
+            return None
+        matched &= head_allow & tail_allow
+        state = head_state | tail_state
+        for rule, counted, count in self._counted:
+            if matched & rule and (state & counted).bit_count() < count:
+                matched &= ~rule
+        return matched
+
+    def slider_sections(self, values, level, today):
+        """(priority, combo, singles, campus, food, farmers): a text or None each, singles a tuple of texts."""
+        matched = self._match(values, level)
+        if matched is None:
+            out, singles = dict.fromkeys(SECTIONS), []
+            for name, first, predicate, scope, texts in self.feedback_rules:
+                if (first and out[name] is not None) or not predicate.test(values, level):
+                    continue
+                text = texts[0] if scope is None else SELECTOR.daily(texts, scope, today)
+                if first:
+                    out[name] = text
+                else:
+                    singles.append(text)
+            out["singles"] = tuple(singles)
+            return tuple(out[name] for name in SECTIONS)
+        feedback = matched & self._feedback_all
+        texts, memo = self._decoded(today)
+        sections = memo.get(feedback)
+        if sections is None:
+            out, singles, outputs, rest = dict.fromkeys(SECTIONS), [], self._feedback_outputs, feedback
+            while rest:
+                j = (rest & -rest).bit_length() - 1
+                name, first, keep = outputs[j]
+                rest &= keep
+                if first:
+                    out[name] = texts[j]
+                else:
+                    singles.append(texts[j])
+            out["singles"] = tuple(singles)
+            sections = memo[feedback] = tuple(out[name] for name in SECTIONS)
+        return sections
+
+    def resources(self, level, values=None):
+        """{"title", "items"} for a burnout level; rules on sliders only apply when `values` are given."""
+        limit = self.resource_limit
+        items = []
+        matched = self._match(values, level) if values is not None else None
+        if matched is None:
+            for predicate, rule_items in self.resource_rules:
+                if values is None:
+                    if predicate.uses_sliders or not predicate.test((), level):
+                        continue
+                elif not predicate.test(values, level):
+                    continue
+                items.extend(rule_items)
+                if len(items) >= limit:
+                    break
+        else:
+            mask = matched >> self._shift
+            items = self._resource_memo.get(mask)
+            if items is None:
+                items, rest = [], mask
+                while rest and len(items) < limit:
+                    low = rest & -rest
+                    items.extend(self._resource_items[low.bit_length() - 1])
+                    rest ^= low
+                items = self._resource_memo[mask] = tuple(items[:limit])
+        return {"title": self.resource_title, "items": list(map(dict.copy, items[:limit]))}
+
+    def journal_lines(self, topics, emotion=None):
+        lines = [line for topic, line in self.topic_lines if topic in topics]
+        if emotion:
+            for labels, above, line in self.emotion_lines:
+                if emotion.get("emotion") in labels and emotion.get("confidence", 0) > above:
+                    lines.append(line)
+        return lines
+
+    def size(self):
+        return {"feedback": len(self.feedback_rules), "resources": len(self.resource_rules),
+                "journal": len(self.topic_lines) + len(self.emotion_lines)}
+
+
+class FeedbackRules:
+    """The current Ruleset for a file, recompiled and swapped when the file changes."""
+
+    def __init__(self, path=RULES_FILE, reload_s=RELOAD_S, clock=time.monotonic):
+        self.path = path
+        self.reload_s = reload_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self._ruleset = Ruleset.from_file(path)  # a broken file at startup is an error
+        self._checked = clock()
+        self.loaded_at = time.time()
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def current(self):
+        """The ruleset to use for one evaluation (read it once per check-in)."""
+        if self.reload_s > 0 and self.clock() - self._checked >= self.reload_s:
+            self.maybe_reload()
+        return self._ruleset
+
+    def maybe_reload(self):
+        """Recompile if the file changed since the last load; True if a new ruleset was swapped in."""
+        if not self._lock.acquire(blocking=False):
+            return False  # another thread is already checking
+        try:
+            self._checked = self.clock()
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                return False
+            try:
+                ruleset = Ruleset.from_file(self.path)
+            except (OSError, RuleError, TypeError, ValueError, AttributeError) as e:
+                self.reload_errors += 1
+                self.last_error = str(e)
+                self._signature = signature  # don't retry until the file changes again
+                print(f"[rules] keeping version {self._ruleset.version}, {self.path} failed to compile: {e}")
+                return False
+            self._signature = signature
+            if ruleset.version == self._ruleset.version:
+                return False  # touched, same rules
+            previous, self._ruleset = self._ruleset.version, ruleset
+            self.reloads += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            print(f"[rules] reloaded {self.path}: version {previous} -> {ruleset.version} {ruleset.size()}")
+            return True
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        ruleset = self._ruleset
+        return {"file": self.path, "version": ruleset.version, "rules": ruleset.size(),
+                "loaded_at": round(self.loaded_at, 3), "reloads": self.reloads,
+                "reload_errors": self.reload_errors, "last_error": self.last_error}
+
+
+RULES = FeedbackRules()
@@ -0,0 +1,137 @@
+"""
+Precompiled decision table for the deterministic, slider-only part of the
+feedback and for the resources list.
+
+Eight sliders in 1..5 give 5^8 = 390,625 combinations, packed into a single
+index. Each slot memoizes `slider_feedback` + `get_resources` for the current
+day and ruleset (the picks are day-seeded, so the table resets at midnight
+and whenever feedback_rules.json is reloaded); the journal lines are layered
+on top per request. Callers pass one ruleset to both `feedback` and
+`resources` so a check-in never mixes two versions. Non-integer or
+out-of-range sliders skip the table and use the wellness functions directly.
+"""
+import threading
+from datetime import date
+
+from feedback_rules import RULES, SLIDERS
+from wellness import (
+    assemble_feedback, calculate_wellness_score, get_burnout_level,
+    get_resources, journal_feedback, slider_feedback,
+)
+
+SIZE = 5 ** len(SLIDERS)
+
+
+def pack(data):
+    """Index 0..SIZE-1 for integer sliders in 1..5, else None."""
+    idx = 0
+    for name in SLIDERS:
+        v = data.get(name, 3) if name == "food_security" else data[name]
+        if type(v) is not int or not 1 <= v <= 5:
+            return None
+        idx = idx * 5 + (v - 1)
+    return idx
+
+
+class FeedbackTable:
+    """Day-scoped O(1) lookup of slider feedback parts, resources and no-journal text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset(date.today(), None)
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def _reset(self, today, version):
+        # (day, ruleset version, slots, pool), swapped as a whole. Each slot is
+        # (parts, resources, no-journal feedback text); identical parts/resources
+        # across slots share one pool object.
+        self._table = (today, version, [None] * SIZE, {})
+        self.filled = 0
+
+    def _sync(self, today, rules):
+        """The table for `today` and `rules`, starting over on a new day or a reloaded ruleset."""
+        table = self._table
+        if today != table[0] or rules.version != table[1]:
+            with self._lock:
+                table = self._table
+                if today != table[0] or rules.version != table[1]:
+                    self._reset(today, rules.version)
+                    table = self._table
+        return table
+
+    def _slot(self, data, today, rules):
+        idx = pack(data)
+        if idx is None:
+            return None
+        table = self._sync(today, rules)
+        slot = table[2][idx]
+        if slot is not None:
+            self.hits += 1
+            return slot
+        self.misses += 1
+        return self._fill(table, idx, data, today, rules)
+
+    def _fill(self, table, idx, data, today, rules):
+        # Writes only into `table`: if another request has since moved on to a
+        # new day or ruleset, this slot lands in the old list and is dropped.
+        _, _, slots, pool = table
+        parts = slider_feedback(data, today, rules)
+        parts = pool.setdefault(parts, parts)
+        resources = get_resources(get_burnout_level(calculate_wellness_score(data)), data, rules)
+        res_key = (resources["title"], tuple(item["name"] for item in resources["items"]))
+        resources = pool.setdefault(res_key, resources)
+        slot = (parts, resources, assemble_feedback(parts, "", (), today, rules))
+        slots[idx] = slot
+        if table is self._table:
+            self.filled += 1
+        return slot
+
+    def feedback(self, data, emotion=None, rules=None):
+        """Same result as `generate_advanced_feedback(data, emotion)` (on `rules` if given)."""
+        today = date.today()
+        rules = rules or RULES.current()
+        journal = (data.get('journal') or "").strip()
+        journal_lines = journal_feedback(journal, emotion, rules) if journal or emotion else []
+        slot = self._slot(data, today, rules)
+        if slot is None:
+            self.fallbacks += 1
+            return assemble_feedback(slider_feedback(data, today, rules), journal, journal_lines, today, rules)
+        if not journal and not journal_lines:
+            return slot[2]
+        return assemble_feedback(slot[0], journal, journal_lines, today, rules)
+
+    def resources(self, data, rules=None):
+        """Same result as `get_resources(level, data, rules)` for the sliders' own burnout level."""
+        rules = rules or RULES.current()
+        slot = self._slot(data, date.today(), rules)
+        if slot is None:
+            self.fallbacks += 1
+            return get_resources(get_burnout_level(calculate_wellness_score(data)), data, rules)
+        cached = slot[1]
+        return {"title": cached["title"], "items": [dict(item) for item in cached["items"]]}
+
+    def build_all(self):
+        """Fill every slot for today (about 390k entries); used to prebuild at startup."""
+        today = date.today()
+        rules = RULES.current()
+        table = self._sync(today, rules)
+        data = {}
+        for idx in range(SIZE):
+            rest = idx
+            for name in reversed(SLIDERS):
+                rest, digit = divmod(rest, 5)
+                data[name] = digit + 1
+            if table[2][idx] is None:
+                self._fill(table, idx, data, today, rules)
+
+    def stats(self):
+        return {
+            "day": str(self._table[0]),
+            "rules_version": self._table[1],
+            "filled": self.filled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fallbacks": self.fallbacks,
+        }
@@ -0,0 +1,82 @@
+"""
+Gunicorn settings, picked up automatically by `gunicorn app:app` (render.yaml).
+
+With USE_EMOTION=1 and EMOTION_PRELOAD=1 (default) the app, and therefore the
+emotion model, is imported and warmed once in the master before forking so
+every worker shares the weights copy-on-write instead of loading its own.
+
+With EMOTION_POOL_PROCS=N the master instead starts inference_pool.py with N
+inference processes and points every worker at its socket; workers then
+never load the model.
+
+Cohort stats need one store that every worker merges into: without
+COHORT_STATS_DB each worker would count only its own check-ins, so it
+defaults to a SQLite file in the temp directory here. Admission buckets
+likewise: without ADMISSION_DB each worker would give a client its own
+burst, so a client could send WEB_CONCURRENCY times its limit.
+"""
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+
+USE_EMOTION = os.getenv("USE_EMOTION", "0") in ("1", "true", "True")
+EMOTION_PRELOAD = os.getenv("EMOTION_PRELOAD", "1") in ("1", "true", "True")
+EMOTION_POOL_PROCS = int(os.getenv("EMOTION_POOL_PROCS", "0"))
+
+if os.getenv("COHORT_STATS", "1") in ("1", "true", "True"):
+    os.environ.setdefault("COHORT_STATS_DB", os.path.join(tempfile.gettempdir(), "mindguard-cohort.db"))
+if os.getenv("ADMISSION", "1") in ("1", "true", "True"):
+    os.environ.setdefault("ADMISSION_DB", os.path.join(tempfile.gettempdir(), "mindguard-admission.db"))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5005')}"
+# Workers come from WEB_CONCURRENCY (gunicorn's own default: 1); threads stay
+# at gunicorn's default of 1 unless GUNICORN_THREADS is set. render.yaml sets both.
+if os.getenv("GUNICORN_THREADS"):
+    threads = int(os.environ["GUNICORN_THREADS"])
+preload_app = USE_EMOTION and EMOTION_PRELOAD and not EMOTION_POOL_PROCS
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+
+_POOL = None
+
+
+def on_starting(server):
+    global _POOL
+    if USE_EMOTION and EMOTION_POOL_PROCS:
+        from inference_pool import DEFAULT_SOCKET
+        socket_path = os.environ.setdefault("EMOTION_POOL_SOCKET", DEFAULT_SOCKET)
+        _POOL = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "inference_pool.py"),
+                                  "--procs", str(EMOTION_POOL_PROCS), "--socket", socket_path])
+        server.log.info("emotion inference pool: %s procs on %s (pid %s)", EMOTION_POOL_PROCS, socket_path, _POOL.pid)
+
+
+def on_exit(server):
+    if _POOL is not None:
+        _POOL.terminate()
+        _POOL.wait(10)
+
+
+def when_ready(server):
+    if preload_app:
+        # Keep the preloaded objects out of the collector's reach so workers
+        # don't dirty (and so un-share) their pages while scanning them.
+        gc.collect()
+        gc.freeze()
+        from emotion import model_status, process_memory
+        server.log.info("emotion model preloaded: %s, master memory: %s", model_status(), process_memory())
+
+
+def post_fork(server, worker):
+    # Split cores between workers so torch intra-op pools don't oversubscribe.
+    # (With the inference pool, workers don't run the model; the pool splits cores itself.)
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // max(1, server.cfg.workers)))
+
+
+def post_worker_init(worker):
+    if preload_app:
+        from emotion import process_memory
+        worker.log.info("worker %s memory: %s", worker.pid, process_memory())
@@ -0,0 +1,419 @@
+"""
+Opt-in, append-only history of check-ins for per-student trends.
+
+Each check-in is one 22-byte record: a pseudonymous 64-bit key (keyed
+BLAKE2b of the client's anonymous id, so raw ids are never stored), a
+timestamp, the eight sliders packed into one index (see feedback_table.pack),
+the score, the burnout level and the emotion label.
+
+Writes are group-committed: `append` only buffers the record, and a
+background thread per worker writes the buffer to its own row-oriented log
+(`active-<pid>.log`) every HISTORY_FLUSH_MS. Once a log reaches
+HISTORY_SEGMENT_ROWS it is sealed into an immutable columnar segment
+(`seg-*.col`: all keys, then all timestamps, ...) sorted by (key, time), so a
+per-student query is a binary search on the memory-mapped key column of
+each segment that overlaps the window, plus a scan of the short open logs.
+A log whose worker has died (gunicorn restarted it, or the host went down)
+is sealed by the next store that starts, so it isn't rescanned forever.
+
+Keys are salted with CHECKIN_HISTORY_SALT. Without it the store generates a
+random salt once and keeps it in the directory (`salt`), so keys stay stable
+across restarts but can't be recomputed from an anon_id elsewhere.
+"""
+import atexit
+import fcntl
+import hashlib
+import os
+import secrets
+import threading
+import time
+
+import numpy as np
+
+from feedback_table import SLIDERS, pack
+from proc_local import WorkerThread
+
+HISTORY_DIR = os.getenv("CHECKIN_HISTORY_DIR", "")
+HISTORY_SALT = os.getenv("CHECKIN_HISTORY_SALT", "")
+HISTORY_FLUSH_MS = float(os.getenv("HISTORY_FLUSH_MS", "200"))
+HISTORY_SEGMENT_ROWS = int(os.getenv("HISTORY_SEGMENT_ROWS", str(1 << 20)))
+HISTORY_FSYNC = os.getenv("HISTORY_FSYNC", "0") in ("1", "true", "True")
+
+RECORD = np.dtype([("key", "<u8"), ("ts", "<u4"), ("sliders", "<u4"),
+                   ("score", "<f4"), ("level", "u1"), ("emotion", "u1")])
+COLUMNS = [(name, RECORD.fields[name][0]) for name in RECORD.names]
+
+LEVELS = ("Low", "Moderate", "High")
+EMOTIONS = ("", "sadness", "joy", "love", "anger", "fear", "surprise", "neutral", "calm")
+OTHER_EMOTION = 255
+NO_SLIDERS = 0xFFFFFFFF
+DAY = 86400
+
+
+def pseudonym(anon_id, salt=HISTORY_SALT):
+    """64-bit key for a client's anonymous id; unlinkable without the salt."""
+    digest = hashlib.blake2b(anon_id.encode(), key=salt.encode()[:64], digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _pid_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def unpack(index):
+    """Slider dict for a packed index (inverse of feedback_table.pack)."""
+    out = {}
+    for name in reversed(SLIDERS):
+        index, digit = divmod(index, 5)
+        out[name] = digit + 1
+    return out
+
+
+def encode_emotion(analysis):
+    if not analysis:
+        return 0
+    label = analysis.get("emotion", "")
+    return EMOTIONS.index(label) if label in EMOTIONS else OTHER_EMOTION
+
+
+def decode_emotion(code):
+    return EMOTIONS[code] if code < len(EMOTIONS) else "other"
+
+
+# ---------- Storage
+def read_log(path):
+    """The complete records of a row-oriented log (a torn last record is dropped)."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    return np.frombuffer(data[:len(data) - len(data) % RECORD.itemsize], dtype=RECORD)
+
+
+def write_segment(path, rows):
+    """Write `rows` (RECORD array) sorted by (key, ts) as a columnar segment, atomically."""
+    rows = rows[np.lexsort((rows["ts"], rows["key"]))]
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        for name, dtype in COLUMNS:
+            fh.write(np.ascontiguousarray(rows[name], dtype=dtype).tobytes())
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+class Segment:
+    """Memory-mapped columns of one sealed segment."""
+
+    def __init__(self, path):
+        self.path = path
+        self.n = os.path.getsize(path) // RECORD.itemsize
+        self.columns = {}
+        offset = 0
+        for name, dtype in COLUMNS:
+            self.columns[name] = (np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(self.n,))
+                                  if self.n else np.empty(0, dtype=dtype))
+            offset += self.n * dtype.itemsize
+        ts = self.columns["ts"]
+        self.ts_min = int(ts.min()) if self.n else 0
+        self.ts_max = int(ts.max()) if self.n else 0
+
+    def rows(self, key, since):
+        keys = self.columns["key"]
+        # `key` and `since` arrive as numpy scalars of the column dtypes; a
+        # Python int would make searchsorted convert the whole column first.
+        lo = int(np.searchsorted(keys, key, "left"))
+        hi = int(np.searchsorted(keys, key, "right"))
+        if lo == hi:
+            return None
+        # Rows of one key are sorted by time, so the window is another search.
+        lo += int(np.searchsorted(self.columns["ts"][lo:hi], since, "left"))
+        out = np.empty(hi - lo, dtype=RECORD)
+        for name, _ in COLUMNS:
+            out[name] = self.columns[name][lo:hi]
+        return out
+
+
+class _LogTail:
+    """Rows of an open (row-oriented) log, read incrementally as it grows."""
+
+    def __init__(self, path):
+        self.path = path
+        self.inode = None
+        self.offset = 0
+        self.rows = np.empty(0, dtype=RECORD)
+        self.keys = np.empty(0, dtype=np.uint64)
+
+    def refresh(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return self.rows, self.keys
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            # The log was sealed and a new one started under the same name.
+            self.inode, self.offset = st.st_ino, 0
+            self.rows, self.keys = np.empty(0, dtype=RECORD), np.empty(0, dtype=np.uint64)
+        size = st.st_size - st.st_size % RECORD.itemsize  # ignore a record still being written
+        if size > self.offset:
+            with open(self.path, "rb") as fh:
+                fh.seek(self.offset)
+                new = np.frombuffer(fh.read(size - self.offset), dtype=RECORD)
+            self.rows = np.concatenate([self.rows, new])
+            # Contiguous copy: comparing a strided struct field is several times slower.
+            self.keys = np.concatenate([self.keys, new["key"]])
+            self.offset = size
+        return self.rows, self.keys
+
+
+class HistoryStore:
+    """Buffered appends, sealing into columnar segments, and per-key trend queries."""
+
+    # Flush early when this many rows are waiting.
+    FLUSH_ROWS = 4096
+
+    def __init__(self, directory, salt=HISTORY_SALT, flush_ms=HISTORY_FLUSH_MS,
+                 segment_rows=HISTORY_SEGMENT_ROWS, fsync=HISTORY_FSYNC):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.salt = salt or self._load_salt()
+        self.flush_interval = max(0.0, flush_ms) / 1000.0
+        self.segment_rows = max(1, segment_rows)
+        self.fsync = fsync
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer = WorkerThread(self._run, "history-writer", on_fork=self._forget_log)
+        self._fd = None
+        self._log_rows = 0
+        self._read_lock = threading.Lock()
+        self._segments = {}
+        self._tails = {}
+        self.appended = 0
+        self.written = 0
+        self.flushes = 0
+        self.sealed = 0
+        self.recovered = 0
+        self.write_errors = 0
+        self.recover()
+        atexit.register(self.flush)
+
+    def _load_salt(self):
+        """The directory's own salt, generated by whichever worker gets there first."""
+        path = os.path.join(self.directory, "salt")
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.write(fd, secrets.token_hex(32).encode())
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            try:
+                os.link(tmp, path)  # fails if another worker linked its salt first
+                print(f"[history] no CHECKIN_HISTORY_SALT: generated one in {path}")
+            except FileExistsError:
+                pass
+            finally:
+                os.unlink(tmp)
+        with open(path) as fh:
+            return fh.read().strip()
+
+    # ----- Writes
+    def _forget_log(self):
+        # Each gunicorn worker appends to its own log; the parent's fd and rows stay with it.
+        self._fd, self._buffer, self._log_rows = None, [], 0
+
+    def append(self, anon_id, data, score, level, emotion=None, ts=None):
+        """Buffer one check-in; returns immediately (the writer thread commits it)."""
+        self._writer.ensure()
+        sliders = pack(data)
+        row = (pseudonym(anon_id, self.salt), int(ts if ts is not None else time.time()),
+               NO_SLIDERS if sliders is None else sliders, score,
+               LEVELS.index(level), encode_emotion(emotion))
+        with self._lock:
+            self._buffer.append(row)
+            self.appended += 1
+            if len(self._buffer) >= self.FLUSH_ROWS:
+                self._wake.set()
+
+    def _run(self):
+        # A new worker may be replacing one that died with an open log.
+        self.recover()
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _log_path(self):
+        return os.path.join(self.directory, f"active-{os.getpid()}.log")
+
+    def flush(self):
+        """Write everything buffered so far with one append (and optional fsync)."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            try:
+                if self._fd is None:
+                    path = self._log_path()
+                    self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                    self._log_rows = os.path.getsize(path) // RECORD.itemsize
+                os.write(self._fd, np.array(batch, dtype=RECORD).tobytes())
+                if self.fsync:
+                    os.fsync(self._fd)
+            except OSError as e:
+                self.write_errors += 1
+                print(f"[history] write error: {e}")
+                return
+            self.written += len(batch)
+            self.flushes += 1
+            self._log_rows += len(batch)
+            if self._log_rows >= self.segment_rows:
+                self._seal()
+
+    def _seal(self):
+        """Turn this worker's log into a sorted columnar segment."""
+        os.close(self._fd)
+        self._fd = None
+        stem = os.path.join(self.directory, f"seg-{time.time_ns()}-{os.getpid()}")
+        # Rename first so new appends start a fresh log; readers treat
+        # `<stem>.log` as open until `<stem>.col` exists.
+        os.replace(self._log_path(), stem + ".log")
+        try:
+            write_segment(stem + ".col", np.fromfile(stem + ".log", dtype=RECORD))
+            os.unlink(stem + ".log")
+            self.sealed += 1
+        except OSError as e:
+            self.write_errors += 1
+            print(f"[history] seal error: {e}")
+        self._log_rows = 0
+
+    def recover(self):
+        """Seal the logs of workers that are gone, and finish seals they left half done."""
+        try:
+            with open(os.path.join(self.directory, "recover.lock"), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                for name in sorted(os.listdir(self.directory)):
+                    stem, ext = os.path.splitext(name)
+                    pid = stem.rsplit("-", 1)[-1]
+                    if ext != ".log" or not pid.isdigit() or int(pid) == os.getpid() or _pid_alive(int(pid)):
+                        continue
+                    stem = os.path.join(self.directory, stem)
+                    if name.startswith("active-"):
+                        sealing = os.path.join(self.directory, f"seg-{time.time_ns()}-{pid}")
+                        os.replace(stem + ".log", sealing + ".log")
+                        stem = sealing
+                    if not os.path.exists(stem + ".col"):
+                        write_segment(stem + ".col", read_log(stem + ".log"))
+                        self.recovered += 1
+                    os.unlink(stem + ".log")
+        except OSError as e:
+            self.write_errors += 1
+            print(f"[history] recover error: {e}")
+
+    # ----- Reads
+    def _sources(self):
+        names = os.listdir(self.directory)
+        sealed = {n[:-4] for n in names if n.endswith(".col")}
+        segments, tails = [], []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.endswith(".col"):
+                seg = self._segments.get(path)
+                if seg is None:
+                    seg = self._segments[path] = Segment(path)
+                segments.append(seg)
+            elif name.endswith(".log") and name[:-4] not in sealed:
+                tail = self._tails.get(path)
+                if tail is None:
+                    tail = self._tails[path] = _LogTail(path)
+                tails.append(tail)
+        for cache, live in ((self._segments, {s.path for s in segments}), (self._tails, {t.path for t in tails})):
+            for path in list(cache):
+                if path not in live:
+                    del cache[path]
+        return segments, tails
+
+    def rows(self, anon_id, since=0):
+        """All of a student's rows with ts >= since, oldest first."""
+        key = np.uint64(pseudonym(anon_id, self.salt))
+        since = np.uint32(max(0, since))
+        parts = []
+        with self._read_lock:
+            segments, tails = self._sources()
+            logs = [tail.refresh() for tail in tails]
+        for seg in segments:
+            if seg.ts_max >= since:
+                found = seg.rows(key, since)
+                if found is not None and len(found):
+                    parts.append(found)
+        for rows, keys in logs:
+            found = rows[np.flatnonzero(keys == key)]
+            found = found[found["ts"] >= since]
+            if len(found):
+                parts.append(found)
+        with self._lock:
+            pending = [r for r in self._buffer if r[0] == key and r[1] >= since]
+        if pending:
+            parts.append(np.array(pending, dtype=RECORD))
+        if not parts:
+            return np.empty(0, dtype=RECORD)
+        rows = np.concatenate(parts)
+        return rows[np.argsort(rows["ts"], kind="stable")]
+
+    def trends(self, anon_id, now=None):
+        """Rolling 7/30-day averages, least-squares slope (points/day) and daily means."""
+        now = int(now if now is not None else time.time())
+        rows = self.rows(anon_id, since=now - 30 * DAY)
+        scores = rows["score"].astype(np.float64)
+        recent = scores[rows["ts"] >= now - 7 * DAY]
+        days = (rows["ts"].astype(np.float64) - now) / DAY
+        slope = None
+        if len(rows) >= 2 and np.ptp(days) > 0:
+            slope = round(float(np.polyfit(days, scores, 1)[0]), 4)
+        daily = []
+        if len(rows):
+            day_index = (rows["ts"] // DAY).astype(np.int64)
+            uniq, start = np.unique(day_index, return_index=True)
+            sums = np.add.reduceat(scores, start)
+            counts = np.diff(np.append(start, len(scores)))
+            daily = [{"date": time.strftime("%Y-%m-%d", time.gmtime(int(d) * DAY)),
+                      "avg_score": round(float(s / c), 2), "checkins": int(c)}
+                     for d, s, c in zip(uniq, sums, counts)]
+        latest = None
+        if len(rows):
+            last = rows[-1]
+            latest = {"timestamp": int(last["ts"]), "wellness_score": round(float(last["score"]), 2),
+                      "burnout_level": LEVELS[last["level"]],
+                      "emotion": decode_emotion(int(last["emotion"])) or None}
+        return {
+            "checkins_7d": int(len(recent)),
+            "checkins_30d": int(len(scores)),
+            "avg_7d": round(float(recent.mean()), 2) if len(recent) else None,
+            "avg_30d": round(float(scores.mean()), 2) if len(scores) else None,
+            "trend_per_day": slope,
+            "daily": daily,
+            "latest": latest,
+        }
+
+    def stats(self):
+        with self._lock:
+            buffered = len(self._buffer)
+        return {
+            "appended": self.appended,
+            "written": self.written,
+            "buffered": buffered,
+            "flushes": self.flushes,
+            "sealed": self.sealed,
+            "recovered": self.recovered,
+            "segments": len(self._segments),
+            "write_errors": self.write_errors,
+        }
@@ -0,0 +1,328 @@
+"""
+Out-of-process emotion inference shared by every web worker.
+
+A pool server owns N inference processes (each with one copy of the model
+and a capped number of intra-op threads) and listens on a local Unix socket.
+Web workers send batches of journal texts over the socket — their
+MicroBatcher's infer function becomes `PoolClient.classify_batch` — so no
+web worker loads torch. When more than `max_queue` texts are outstanding the
+server answers "busy" at once and the caller sheds load (HTTP 503 or a
+response without emotion, see EMOTION_SHED in app.py).
+
+Start it next to gunicorn (gunicorn.conf.py does this when
+EMOTION_POOL_PROCS > 0) or by hand:
+
+    python inference_pool.py --procs 4 --socket /tmp/mindguard-emotion.sock
+
+Every task carries its caller's deadline (EMOTION_POOL_TIMEOUT_S, or the
+shorter "timeout_s" a client sends, e.g. EMOTION_TIMEOUT_MS from the web
+app). An inference process that dequeues a task past it drops it instead of
+running the model for a caller that has already given up.
+
+Protocol: one JSON object per line. {"texts": [...], "timeout_s": ...} ->
+{"results": [...]} or {"error": "busy"|"..."}; {"op": "stats"} -> pool
+utilization metrics.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from emotion import QueueSaturated
+
+POOL_SOCKET = os.getenv("EMOTION_POOL_SOCKET", "")
+POOL_PROCS = int(os.getenv("EMOTION_POOL_PROCS", "0"))
+POOL_MAX_QUEUE = int(os.getenv("EMOTION_POOL_MAX_QUEUE", "256"))
+POOL_BATCH_SIZE = int(os.getenv("EMOTION_POOL_BATCH_SIZE", "32"))
+POOL_TIMEOUT_S = float(os.getenv("EMOTION_POOL_TIMEOUT_S", "30"))
+DEFAULT_SOCKET = "/tmp/mindguard-emotion.sock"
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+# ---------- Inference processes
+def init_inference_process(threads):
+    """Cap intra-op threads and load the model; first thing in a freshly spawned process."""
+    # Must happen before torch/onnxruntime are imported in this process.
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    import emotion
+    emotion.get_pipeline()
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _live(task, results, pid):
+    """False, reported to the pool, for a task whose caller's deadline has passed."""
+    if task[2] < time.time():
+        results.put(("expired", pid, len(task[1]), 0.0))
+        return False
+    return True
+
+
+def _inference_main(tasks, results, threads, batch_size):
+    """Child loop: load the model once, then classify merged batches of live tasks."""
+    init_inference_process(threads)
+    import emotion
+    classify = emotion.classify_batch
+    pid = os.getpid()
+    results.put(("ready", pid, None, 0.0))
+    while True:
+        first = tasks.get()
+        if first is None:
+            return
+        if not _live(first, results, pid):
+            continue
+        batch = [first]
+        size = len(first[1])
+        while size < batch_size:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                tasks.put(None)
+                break
+            if _live(task, results, pid):
+                batch.append(task)
+                size += len(task[1])
+        texts = [t for _, task_texts, _ in batch for t in task_texts]
+        start = time.perf_counter()
+        try:
+            out, error = classify(texts), None
+        except Exception as e:
+            out, error = None, str(e)
+        busy = time.perf_counter() - start
+        offset = 0
+        for task_id, task_texts, _ in batch:
+            chunk = None if out is None else out[offset:offset + len(task_texts)]
+            offset += len(task_texts)
+            results.put((task_id, pid, chunk if error is None else error, busy / len(batch)))
+
+
+class InferencePool:
+    """N inference processes fed from one bounded task queue."""
+
+    def __init__(self, procs, max_queue=POOL_MAX_QUEUE, batch_size=POOL_BATCH_SIZE, threads=None):
+        self.procs = max(1, procs)
+        self.max_queue = max_queue
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.procs)
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._children = [
+            ctx.Process(target=_inference_main, args=(self._tasks, self._results, self.threads, batch_size),
+                        name=f"emotion-inference-{i}", daemon=True)
+            for i in range(self.procs)
+        ]
+        self._lock = threading.Lock()
+        self._waiting = {}
+        self._next_id = 0
+        self.started = time.time()
+        self.outstanding = 0
+        self.completed = 0
+        self.shed = 0
+        self.errors = 0
+        self.expired = 0
+        self.busy_seconds = {}
+        self.ready = set()
+
+    def start(self):
+        for child in self._children:
+            child.start()
+        threading.Thread(target=self._collect, name="pool-results", daemon=True).start()
+
+    def _collect(self):
+        while True:
+            task_id, pid, payload, busy = self._results.get()
+            with self._lock:
+                self.busy_seconds[pid] = self.busy_seconds.get(pid, 0.0) + busy
+                if task_id == "ready":
+                    self.ready.add(pid)
+                    continue
+                if task_id == "expired":
+                    self.expired += payload
+                    continue
+                slot = self._waiting.pop(task_id, None)
+            if slot is not None:
+                slot[1] = payload
+                slot[0].set()
+
+    def classify(self, texts, timeout=POOL_TIMEOUT_S):
+        """
+        Blocking classify of a batch; raises QueueSaturated when over
+        max_queue and TimeoutError after `timeout`, when the task is also
+        dropped if no process has picked it up yet.
+        """
+        with self._lock:
+            if self.outstanding + len(texts) > self.max_queue:
+                self.shed += len(texts)
+                raise QueueSaturated("inference pool is full")
+            self.outstanding += len(texts)
+            self._next_id += 1
+            task_id = self._next_id
+            slot = [threading.Event(), None]
+            self._waiting[task_id] = slot
+        try:
+            self._tasks.put((task_id, list(texts), time.time() + timeout))
+            if not slot[0].wait(timeout):
+                raise TimeoutError("inference pool timed out")
+            if isinstance(slot[1], str):
+                with self._lock:
+                    self.errors += 1
+                raise RuntimeError(slot[1])
+            with self._lock:
+                self.completed += len(texts)
+            return slot[1]
+        finally:
+            with self._lock:
+                self.outstanding -= len(texts)
+                self._waiting.pop(task_id, None)
+
+    def stats(self):
+        with self._lock:
+            wall = max(1e-9, time.time() - self.started)
+            busy = sum(self.busy_seconds.values())
+            return {
+                "procs": self.procs,
+                "ready_procs": len(self.ready),
+                "threads_per_proc": self.threads,
+                "max_queue": self.max_queue,
+                "outstanding": self.outstanding,
+                "completed": self.completed,
+                "shed": self.shed,
+                "errors": self.errors,
+                "expired": self.expired,
+                "utilization": round(busy / (wall * self.procs), 4),
+                "busy_seconds": {str(pid): round(s, 3) for pid, s in self.busy_seconds.items()},
+            }
+
+    def stop(self):
+        for _ in self._children:
+            self._tasks.put(None)
+        for child in self._children:
+            child.join(5)
+
+
+# ---------- Socket server
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        pool = self.server.pool
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+                if req.get("op") == "stats":
+                    reply = pool.stats()
+                else:
+                    timeout = min(POOL_TIMEOUT_S, req.get("timeout_s") or POOL_TIMEOUT_S)
+                    reply = {"results": pool.classify(req["texts"], timeout)}
+            except QueueSaturated:
+                reply = {"error": "busy"}
+            except Exception as e:
+                reply = {"error": str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class PoolServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path, procs, max_queue=POOL_MAX_QUEUE, batch_size=POOL_BATCH_SIZE, threads=None):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    pool = InferencePool(procs, max_queue=max_queue, batch_size=batch_size, threads=threads)
+    pool.start()
+    server = PoolServer(socket_path, _Handler)
+    server.pool = pool
+    # gunicorn's on_exit terminates us; stop the inference processes with us.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"[emotion-pool] {procs} procs x {pool.threads} threads on {socket_path}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        pool.stop()
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+# ---------- Client (used inside web workers)
+class PoolClient:
+    """
+    Thread-safe client; one persistent socket per thread and process.
+    `deadline_s` is sent with each batch so the pool drops it once the
+    caller has stopped waiting.
+    """
+
+    def __init__(self, socket_path, timeout=POOL_TIMEOUT_S, deadline_s=None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.deadline_s = deadline_s
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+            self._local.pid = os.getpid()
+        return conn
+
+    def _call(self, request):
+        sock, reader = self._conn()
+        try:
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            line = reader.readline()
+            if not line:
+                raise ConnectionError("inference pool closed the connection")
+        except OSError:
+            self._local.conn = None
+            sock.close()
+            raise
+        return json.loads(line)
+
+    def classify_batch(self, texts):
+        request = {"texts": list(texts)}
+        if self.deadline_s:
+            request["timeout_s"] = self.deadline_s
+        reply = self._call(request)
+        if reply.get("error") == "busy":
+            raise QueueSaturated("inference pool is full")
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply["results"]
+
+    def stats(self):
+        try:
+            return self._call({"op": "stats"})
+        except OSError as e:
+            return {"error": str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared emotion inference pool")
+    parser.add_argument("--socket", default=POOL_SOCKET or DEFAULT_SOCKET)
+    parser.add_argument("--procs", type=int, default=POOL_PROCS or (os.cpu_count() or 1))
+    parser.add_argument("--max-queue", type=int, default=POOL_MAX_QUEUE)
+    parser.add_argument("--batch-size", type=int, default=POOL_BATCH_SIZE)
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads per process")
+    args = parser.parse_args()
+    serve(args.socket, args.procs, args.max_queue, args.batch_size, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+One shared keyword and negation scan per journal entry.
+
+The journal is lowercased once and every topic and negated target is
+reported together, so the journal nudges in wellness.py and the negation
+overrides in emotion.py share one (memoized) scan per request. Topic words
+use C-level `str.find` with early exit, and negations one linear regex pass
+over "not ..." runs.
+
+Topic keywords must start at a word boundary, so "paper" matches "papers"
+but not "newspaper". Negations keep the original `not[\\s\\w]*<target>`
+meaning: a target counts as negated when a "not" precedes it with only
+letters, digits, underscores or whitespace in between.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+TOPICS = (
+    ("deadlines", ("exam", "midterm", "final", "quiz", "deadline", "assignment", "paper")),
+    ("money", ("money", "rent", "bills", "food", "groceries")),
+    ("roommate", ("roommate", "conflict", "fight", "argue")),
+    ("homesick", ("homesick", "lonely", "alone")),
+)
+NEGATION_TARGETS = ("sad", "happy", "good", "stressed")
+
+JournalMatch = namedtuple("JournalMatch", "topics negated")
+
+# "not" followed by everything up to the next punctuation mark. Greedy with
+# nothing after it, so a long run costs one linear pass (the original
+# not[\s\w]*<target> patterns backtracked through every run for each "not").
+_NEG_RUN = re.compile(r"not[\s\w]*")
+
+
+def _starts_word(low, word):
+    """True if `word` occurs in `low` at a word start (like a leading \\b)."""
+    i = low.find(word)
+    while i >= 0:
+        if i == 0 or not (low[i - 1].isalnum() or low[i - 1] == "_"):
+            return True
+        i = low.find(word, i + 1)
+    return False
+
+
+@lru_cache(maxsize=512)
+def scan(text):
+    """Return JournalMatch(topics, negated) for `text` (case-insensitive)."""
+    low = (text or "").lower()
+    topics = frozenset(
+        topic for topic, words in TOPICS
+        if any(_starts_word(low, w) for w in words)
+    )
+    negated = set()
+    if "not" in low:
+        for m in _NEG_RUN.finditer(low):
+            # Targets after the leading "not" (the run's first three chars).
+            tail = m.group()[3:]
+            for target in NEGATION_TARGETS:
+                if target in tail:
+                    negated.add(target)
+            if len(negated) == len(NEGATION_TARGETS):
+                break
+    return JournalMatch(topics, frozenset(negated))
@@ -0,0 +1,184 @@
+"""
+Per-stage latency instrumentation for the submit pipeline.
+
+With METRICS=1 every /api/submit gets a RequestTimer. Each stage
+(validate, score, emotion, feedback, resources, serialize) and the total are
+observed into Prometheus-style histograms, and the timings are returned in a
+`Server-Timing` header. The emotion stage is labelled with the path it took:
+regex (negation override), cache, cascade, model, shed, timeout, breaker
+(circuit open) or error. `render()` produces
+the Prometheus text format for /metrics, including the values reported by
+registered collectors (model load time, cache hit rates, error counts).
+
+When disabled, `timer()` returns a shared no-op timer whose `stage()` is a
+shared no-op context manager, so the instrumented code only pays a couple of
+attribute lookups per stage (see bench/bench_metrics.py).
+
+Metrics are per process: under gunicorn each worker reports its own, with a
+`pid` label so scrapes from different workers are not mixed up.
+"""
+import bisect
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.getenv("METRICS", "0") in ("1", "true", "True")
+
+# Seconds; stages run from microseconds (scoring) to seconds (cold model).
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class _NullStage:
+    """Context manager that does nothing; `path` can be set and is ignored."""
+    __slots__ = ("path",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTimer:
+    enabled = False
+
+    def __init__(self):
+        self._stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def finish(self):
+        return None
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "path", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.path = ""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.stages.append((self.name, self.path, time.perf_counter() - self.start))
+        return False
+
+
+class RequestTimer:
+    """Collects the stages of one request; `finish()` records them and returns Server-Timing."""
+    enabled = True
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.stages = []
+        self.start = time.perf_counter()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def finish(self):
+        total = time.perf_counter() - self.start
+        self.stages.append(("total", "", total))
+        self.metrics.record(self.stages)
+        return ", ".join(
+            f'{name};desc="{path}";dur={seconds * 1000.0:.3f}' if path else f"{name};dur={seconds * 1000.0:.3f}"
+            for name, path, seconds in self.stages
+        )
+
+
+class Metrics:
+    """Stage histograms, error counters and scrape-time collectors for one process."""
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._errors = {}
+        self._collectors = []
+
+    def timer(self):
+        return RequestTimer(self) if self.enabled else NULL_TIMER
+
+    def record(self, stages):
+        with self._lock:
+            for name, path, seconds in stages:
+                hist = self._stages.get((name, path))
+                if hist is None:
+                    hist = self._stages[(name, path)] = Histogram()
+                hist.observe(seconds)
+
+    def error(self, stage):
+        with self._lock:
+            self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def add_collector(self, collect):
+        """`collect()` returns [(name, type, help, [(labels_dict, value), ...]), ...] at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        pid = str(os.getpid())
+        lines = []
+
+        def labels(extra):
+            pairs = {"pid": pid, **extra}
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs.items()) + "}"
+
+        with self._lock:
+            stages = {key: (list(h.counts), h.sum, h.count) for key, h in self._stages.items()}
+            errors = dict(self._errors)
+        lines.append("# HELP mindguard_stage_duration_seconds Time spent in each /api/submit stage.")
+        lines.append("# TYPE mindguard_stage_duration_seconds histogram")
+        for (name, path), (counts, total, count) in sorted(stages.items()):
+            base = {"stage": name, "path": path} if path else {"stage": name}
+            running = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), counts):
+                running += n
+                lines.append(f"mindguard_stage_duration_seconds_bucket{labels({**base, 'le': str(bound)})} {running}")
+            lines.append(f"mindguard_stage_duration_seconds_sum{labels(base)} {total:.9f}")
+            lines.append(f"mindguard_stage_duration_seconds_count{labels(base)} {count}")
+        lines.append("# HELP mindguard_errors_total Failures by stage (emotion fallbacks, failed submits).")
+        lines.append("# TYPE mindguard_errors_total counter")
+        for stage, count in sorted(errors.items()):
+            lines.append(f"mindguard_errors_total{labels({'stage': stage})} {count}")
+
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                lines.append(f"# collector error: {e}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for extra, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{labels(extra)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
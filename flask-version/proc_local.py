@@ -0,0 +1,66 @@
+"""
+Per-process resources for code that runs under gunicorn's pre-fork model.
+
+Threads, SQLite connections and open files don't survive fork: a worker
+that inherits them from the master gets a dead thread and a connection it
+must not share. Both helpers here remember the pid they were created in
+and recreate themselves in a new process.
+"""
+import os
+import sqlite3
+import threading
+
+
+class LocalSqlite:
+    """Call it to get this thread's WAL connection to `path` (reopened after fork)."""
+
+    def __init__(self, path, schema=(), timeout=1.0):
+        self.path = path
+        self.schema = tuple(schema)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.schema:
+            conn.execute(statement)
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+
+class WorkerThread:
+    """
+    A daemon thread running `target`, started on first use in each process.
+
+    `on_fork` is called (under the start lock) before the first start in a
+    new process, to drop state inherited from the parent.
+    """
+
+    def __init__(self, target, name, on_fork=None):
+        self.target = target
+        self.name = name
+        self.on_fork = on_fork
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def ensure(self):
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            if self._pid != os.getpid():
+                if self._pid is not None and self.on_fork is not None:
+                    self.on_fork()
+                self._pid = os.getpid()
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._thread.start()
@@ -0,0 +1,218 @@
+"""
+Checks for the /api/submit token buckets (admission.py).
+
+  - the in-memory and SQLite stores make the same decisions and leave the
+    same tokens for a random sequence of charges, refills and refunds;
+  - processes charging one SQLite bucket at once never spend more than it
+    holds (no refill: exactly `burst` charges succeed);
+  - behind trusted proxies the client is the X-Forwarded-For entry the
+    outermost proxy appended, so a forged leftmost entry doesn't change it;
+  - end to end, across several gunicorn workers sharing ADMISSION_DB, one
+    client gets exactly its burst of slider-only check-ins, journals cost
+    more, the rest get 429 with Retry-After, and oversized check-ins get 413;
+    repeated and invalid check-ins aren't charged.
+
+It also prints the cost of a charge per store and the latency of an
+admitted vs. a rejected submit.
+
+    python scripts/check_admission.py [--workers 3]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import admission  # noqa: E402
+from admission import JOURNAL_MAX_CHARS, MemoryBuckets, SqliteBuckets, client_address  # noqa: E402
+
+FAILURES = []
+CHECKIN = {"mood": 4, "stress": 2, "focus": 3, "sleep": 3, "motivation": 3, "anxiety": 3, "appetite": 3,
+           "food_security": 3}
+
+
+def check(ok, message):
+    if not ok:
+        FAILURES.append(message)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def post(port, body):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    start = time.perf_counter()
+    conn.request("POST", "/api/submit", json.dumps(body), {"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    resp.read()
+    conn.close()
+    return resp.status, resp.getheader("Retry-After"), time.perf_counter() - start
+
+
+def check_forwarded_for():
+    trusted = admission.TRUST_PROXY
+    try:
+        admission.TRUST_PROXY = 0
+        check(client_address("10.0.0.1", "6.6.6.6") == "10.0.0.1", "untrusted X-Forwarded-For was used")
+        admission.TRUST_PROXY = 1
+        check(client_address("10.0.0.1", "203.0.113.7") == "203.0.113.7", "one proxy: client hop not used")
+        check(client_address("10.0.0.1", "6.6.6.6, 203.0.113.7") == "203.0.113.7",
+              "one proxy: forged leftmost entry was used")
+        check(client_address("10.0.0.1", None) == "10.0.0.1", "one proxy, no header: peer not used")
+        admission.TRUST_PROXY = 2
+        check(client_address("10.0.0.1", "6.6.6.6, 203.0.113.7, 10.0.0.9") == "203.0.113.7",
+              "two proxies: wrong hop")
+        check(client_address("10.0.0.1", "10.0.0.9") == "10.0.0.1", "two proxies, short header: peer not used")
+    finally:
+        admission.TRUST_PROXY = trusted
+
+
+def check_stores_agree(db):
+    rng = random.Random(5)
+    memory, sqlite = MemoryBuckets(), SqliteBuckets(db)
+    now = 1_000_000.0
+    for i in range(3000):
+        now += rng.choice((0.0, 0.01, 0.5, 3.0))
+        key = f"k{rng.randrange(6)}"
+        cost = rng.choice((1.0, 1.0, 3.0, -1.0))
+        a, b = memory.take(key, cost, 0.5, 12.0, now), sqlite.take(key, cost, 0.5, 12.0, now)
+        check(a[0] == b[0] and abs(a[1] - b[1]) < 1e-9, f"charge {i}: memory {a} vs sqlite {b}")
+
+
+def _spend(db, tries, out):
+    store = SqliteBuckets(db)
+    out.put(sum(store.take("shared", 1.0, 0.0, 50.0, time.time())[0] for _ in range(tries)))
+
+
+def check_no_overspend(db, procs=4, tries=200):
+    out = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_spend, args=(db, tries, out)) for _ in range(procs)]
+    for w in workers:
+        w.start()
+    admitted = sum(out.get() for _ in workers)
+    for w in workers:
+        w.join()
+    check(admitted == 50, f"{procs} processes spent {admitted} tokens from a bucket of 50")
+
+
+def time_charge(store, n=20000):
+    start = time.perf_counter()
+    for i in range(n):
+        store.take(f"c{i % 500}", 1.0, 1e6, 1e9, time.time())
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def start_server(env):
+    port = free_port()
+    server = subprocess.Popen(["gunicorn", "app:app"], cwd=ROOT, env={**env, "PORT": str(port)},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                break
+        except OSError:
+            time.sleep(0.1)
+    return server, port
+
+
+def check_end_to_end(workers, burst):
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "USE_EMOTION": "0", "SUBMIT_DEDUP": "0",
+           "ADMISSION": "1", "ADMISSION_DB": os.path.join(tempfile.mkdtemp(), "admission.db"),
+           "ADMISSION_CLIENT_RATE": "0.0001", "ADMISSION_CLIENT_BURST": str(burst), "ADMISSION_JOURNAL_COST": "4"}
+    server, port = start_server(env)
+    try:
+        results = []
+
+        def client(n):
+            for _ in range(n):
+                results.append(post(port, CHECKIN))
+
+        threads = [threading.Thread(target=client, args=(burst // 2,)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        ok = [r for r in results if r[0] == 200]
+        limited = [r for r in results if r[0] == 429]
+        check(len(ok) == burst, f"{len(ok)} slider check-ins admitted from a burst of {burst} "
+                                f"across {workers} workers")
+        check(len(ok) + len(limited) == len(results), f"unexpected statuses {sorted({r[0] for r in results})}")
+        check(all(r[1] and int(r[1]) >= 1 for r in limited), "429 without Retry-After")
+        print(f"{len(results)} slider check-ins from one client, {workers} workers, burst {burst}: "
+              f"{len(ok)} admitted, {len(limited)} rejected; "
+              f"mean latency admitted {sum(r[2] for r in ok) / max(1, len(ok)) * 1e3:.2f} ms, "
+              f"rejected {sum(r[2] for r in limited) / max(1, len(limited)) * 1e3:.2f} ms")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    # A fresh client with 9 tokens. The over-long journal and the oversized
+    # body are turned away without a charge; journals cost 4 each, so a third
+    # one doesn't fit.
+    server, port = start_server({**env, "ADMISSION_DB": os.path.join(tempfile.mkdtemp(), "admission.db"),
+                                 "ADMISSION_CLIENT_BURST": "9"})
+    try:
+        status = post(port, {**CHECKIN, "journal": "x" * (JOURNAL_MAX_CHARS + 1)})[0]
+        check(status == 413, f"over-long journal: {status}")
+        status = post(port, {**CHECKIN, "journal": "\u00e9" * (JOURNAL_MAX_CHARS * 2)})[0]
+        check(status == 413, f"oversized body: {status}")
+        statuses = [post(port, {**CHECKIN, "journal": f"rough week {i}"})[0] for i in range(3)]
+        check(statuses == [200, 200, 429], f"journal check-ins with 9 tokens, cost 4: {statuses}")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    # One worker so every repeat reaches the same dedup table: repeats of a
+    # check-in and invalid bodies are free, so two more journals still fit.
+    server, port = start_server({**env, "ADMISSION_DB": os.path.join(tempfile.mkdtemp(), "admission.db"),
+                                 "ADMISSION_CLIENT_BURST": "9", "WEB_CONCURRENCY": "1", "SUBMIT_DEDUP": "1"})
+    try:
+        repeat = {**CHECKIN, "anon_id": "student-1", "journal": "rough week"}
+        statuses = [post(port, repeat)[0] for _ in range(5)]
+        check(statuses == [200] * 5, f"repeats of one journal check-in: {statuses}")
+        statuses = [post(port, {**CHECKIN, "mood": 3, "stress": 3})[0] for _ in range(5)]
+        check(statuses == [400] * 5, f"unchanged (invalid) check-ins: {statuses}")
+        statuses = [post(port, {**CHECKIN, "journal": f"another week {i}"})[0] for i in range(2)]
+        check(statuses == [200, 429], f"journal check-ins after free repeats, 5 tokens left: {statuses}")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--burst", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    check_forwarded_for()
+    check_stores_agree(os.path.join(tmp, "agree.db"))
+    check_no_overspend(os.path.join(tmp, "overspend.db"))
+    print(f"charge cost: memory {time_charge(MemoryBuckets()):.1f} us, "
+          f"sqlite {time_charge(SqliteBuckets(os.path.join(tmp, 'timing.db'))):.1f} us")
+    check_end_to_end(args.workers, args.burst)
+
+    for message in FAILURES[:20]:
+        print("FAIL", message)
+    print(f"{'FAILED' if FAILURES else 'ok'}: {len(FAILURES)} failure(s)")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
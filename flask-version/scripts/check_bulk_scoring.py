@@ -0,0 +1,61 @@
+"""
+Property check: bulk_scoring.score_batch must agree exactly with the scalar
+calculate_wellness_score / get_burnout_level for every one of the 5^8
+slider combinations, through each supported input shape.
+
+    python scripts/check_bulk_scoring.py
+"""
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from bulk_scoring import SLIDERS, score_batch
+from wellness import calculate_wellness_score, get_burnout_level
+
+
+def main():
+    combos = np.array(list(itertools.product(range(1, 6), repeat=len(SLIDERS))), dtype=np.int64)
+    print(f"{len(combos)} slider combinations")
+
+    start = time.perf_counter()
+    expected_scores, expected_levels = [], []
+    for row in combos.tolist():
+        score = calculate_wellness_score(dict(zip(SLIDERS, row)))
+        expected_scores.append(score)
+        expected_levels.append(get_burnout_level(score))
+    scalar_s = time.perf_counter() - start
+    expected_scores = np.array(expected_scores)
+    expected_levels = np.array(expected_levels, dtype=object)
+
+    inputs = {
+        "ndarray": combos,
+        "columns": {name: combos[:, i].tolist() for i, name in enumerate(SLIDERS)},
+    }
+    try:
+        import pandas as pd
+        inputs["dataframe"] = pd.DataFrame(combos, columns=list(SLIDERS))
+    except ImportError:
+        pass
+
+    failed = False
+    for label, batch in inputs.items():
+        start = time.perf_counter()
+        scores, levels = score_batch(batch)
+        elapsed = time.perf_counter() - start
+        bad = np.flatnonzero((scores != expected_scores) | (levels != expected_levels))
+        rounded_bad = sum(round(float(a), 2) != round(b, 2) for a, b in zip(scores, expected_scores))
+        status = "ok" if not len(bad) and not rounded_bad else "MISMATCH"
+        failed |= status != "ok"
+        print(f"{label:10s} {status}  vectorized {elapsed * 1000:.1f} ms vs scalar {scalar_s * 1000:.1f} ms")
+        for i in bad[:5]:
+            print(f"    row {combos[i].tolist()}: {scores[i]!r}/{levels[i]} != {expected_scores[i]!r}/{expected_levels[i]}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
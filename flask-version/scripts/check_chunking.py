@@ -0,0 +1,163 @@
+"""
+Boundary checks for long-journal chunking in emotion.py.
+
+Against a model with a tokenizer (3-character tokens, so tokens and words
+differ) and the tokenizer-less stub, for lengths around the window size and
+several overlaps and caps:
+  - a journal that fits is passed whole, without tokenizing when it is short;
+  - windows hold exactly `window` tokens, start at the first token, end at the
+    last, and cover every token with at least `overlap` tokens shared;
+  - past the cap, at most max_tokens // window windows are kept, including the
+    first and (if more than one fits) the last; a cap below the window
+    shrinks the window;
+  - classify_batch keeps input order, matches the unchunked model exactly for
+    journals that fit, and returns the token-weighted mean for those that don't;
+  - length buckets respect the size and length-ratio limits.
+
+    python scripts/check_chunking.py
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import emotion  # noqa: E402
+from emotion import chunk_text, classify_batch, length_buckets, token_spans, top_emotion  # noqa: E402
+from stub_backend import StubClassifier  # noqa: E402
+
+FAILURES = []
+
+
+def check(ok, message):
+    if not ok:
+        FAILURES.append(message)
+
+
+class TriGramTokenizer:
+    """Fast-tokenizer stand-in: every 3 characters of a word are one token."""
+    is_fast = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        self.calls += 1
+        spans = []
+        for word in emotion._WORD.finditer(text):
+            for start in range(word.start(), word.end(), 3):
+                spans.append((start, min(start + 3, word.end())))
+        return {"offset_mapping": spans}
+
+
+class TokenizedStub(StubClassifier):
+    def __init__(self):
+        super().__init__(batch_ms=0, per_text_ms=0)
+        self.tokenizer = TriGramTokenizer()
+        self.batches = []
+
+    def __call__(self, texts, batch_size=None, **kwargs):
+        self.batches.append(list(texts))
+        return super().__call__(texts, batch_size=batch_size)
+
+
+def text_of(n_tokens, rng, model):
+    """A journal with exactly n_tokens tokens for `model`."""
+    words = []
+    while len(token_spans(model, " ".join(words))) < n_tokens:
+        words.append(rng.choice(("exam", "tired", "happy", "roommate", "a", "deadline", "hopeful", "rent")))
+    text = " ".join(words)
+    while len(token_spans(model, text)) > n_tokens:
+        text = text[:-1].rstrip()
+    return text
+
+
+def check_windows(model, rng, window, overlap, max_tokens):
+    label = f"{type(model).__name__} window={window} overlap={overlap} cap={max_tokens}"
+    window = min(window, max_tokens)  # a cap below the window shrinks it
+    for n in sorted({1, window - 1, window, window + 1, window + overlap, 2 * window - overlap,
+                     2 * window - overlap + 1, 3 * window, 7 * window + 5}):
+        if n < 1:
+            continue
+        text = text_of(n, rng, model)
+        spans = token_spans(model, text)
+        chunks = chunk_text(model, text, window, overlap, max_tokens)
+        limit = max(1, max_tokens // window)
+        if n <= window:
+            check(chunks == [(text, chunks[0][1])] and chunks[0][1] in (None, n), f"{label} n={n}: not passed whole")
+            continue
+        check(all(tokens == window for _, tokens in chunks), f"{label} n={n}: window size")
+        check(len(chunks) <= limit, f"{label} n={n}: {len(chunks)} windows > cap {limit}")
+        check(chunks[0][0] == text[:spans[window - 1][1]], f"{label} n={n}: first window")
+        if limit > 1:
+            check(chunks[-1][0] == text[spans[n - window][0]:], f"{label} n={n}: last window")
+        starts = [text.index(chunk) for chunk, _ in chunks]
+        token_starts = [next(i for i, span in enumerate(spans) if span[0] == s) for s in starts]
+        check(token_starts == sorted(token_starts), f"{label} n={n}: windows out of order")
+        needed = -(-(n - overlap) // (window - overlap))  # windows for full coverage
+        if needed <= limit:
+            gaps = [b - a for a, b in zip(token_starts, token_starts[1:])]
+            check(all(g <= window - overlap for g in gaps), f"{label} n={n}: gap between windows {gaps}")
+        else:
+            check(len(chunks) == limit, f"{label} n={n}: capped to {len(chunks)}, expected {limit}")
+
+
+def main():
+    rng = random.Random(7)
+    tokenized, stub = TokenizedStub(), StubClassifier(batch_ms=0, per_text_ms=0)
+
+    for model in (tokenized, stub):
+        for window, overlap, max_tokens in ((16, 0, 1000), (16, 4, 1000), (16, 15, 1000), (16, 4, 48),
+                                            (16, 4, 16), (16, 4, 8), (510, 64, 2048)):
+            check_windows(model, rng, window, overlap, max_tokens)
+
+    tokenized.tokenizer.calls = 0
+    chunk_text(tokenized, "x" * 20, window=20, overlap=4)
+    check(tokenized.tokenizer.calls == 0, "short journal was tokenized")
+    try:
+        chunk_text(tokenized, "a b c d e f", window=4, overlap=4)
+        check(False, "overlap == window accepted")
+    except ValueError:
+        pass
+
+    # classify_batch end to end, with small windows so chunking kicks in.
+    saved = (emotion.EMOTION_PIPELINE, emotion.CHUNK_TOKENS, emotion.CHUNK_OVERLAP, emotion.MAX_TOKENS)
+    emotion.EMOTION_PIPELINE = tokenized
+    defaults = chunk_text.__defaults__
+    chunk_text.__defaults__ = (24, 6, 72)
+    try:
+        texts = [text_of(rng.choice((3, 10, 24, 25, 40, 90, 300)), rng, tokenized) for _ in range(60)]
+        results = classify_batch(texts)
+        for text, result in zip(texts, results):
+            chunks = chunk_text(tokenized, text)
+            if len(chunks) == 1:
+                check(result == top_emotion(tokenized([text])[0]), f"unchunked result differs: {text[:30]!r}")
+            else:
+                totals = {}
+                for chunk, weight in chunks:
+                    for entry in tokenized([chunk])[0]:
+                        totals[entry["label"]] = totals.get(entry["label"], 0.0) + weight * entry["score"]
+                weight = sum(w for _, w in chunks)
+                expected = top_emotion([{"label": k, "score": v / weight} for k, v in totals.items()])
+                check(result["emotion"] == expected["emotion"] and abs(result["confidence"] - expected["confidence"]) < 1e-12,
+                      f"aggregate differs: {result} vs {expected}")
+    finally:
+        chunk_text.__defaults__ = defaults
+        emotion.EMOTION_PIPELINE = saved[0]
+
+    items = [("x" * rng.randint(1, 3000),) for _ in range(500)]
+    buckets = length_buckets(items, max_size=16)
+    check(sum(len(b) for b in buckets) == len(items), "bucketing lost items")
+    for bucket in buckets:
+        sizes = [max(len(it[0]), emotion.BUCKET_FLOOR_CHARS) for it in bucket]
+        check(len(bucket) <= 16 and max(sizes) <= emotion.BUCKET_RATIO * min(sizes), f"bucket limits: {sizes}")
+
+    for message in FAILURES[:20]:
+        print("FAIL", message)
+    print(f"{'FAILED' if FAILURES else 'ok'}: {len(FAILURES)} failure(s)")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Checks that /api/stats merges correctly across gunicorn workers.
+
+Starts `gunicorn app:app` with several workers sharing one COHORT_STATS_DB,
+posts random check-ins from many connections (so they land on different
+workers), waits for a snapshot and compares the day bucket with counts and
+averages computed directly from the submitted rows. Checks that no
+suppressed value can be worked out from a bucket's total or from the window,
+and times /api/stats as the stored history grows from 100k to 500k extra
+check-ins, which should not change.
+
+    python scripts/check_cohort_stats.py --workers 3 --checkins 600
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cohort_stats import COHORT_K_MIN, GRAINS, LEVELS, SLIDERS, CohortStats, bucket_start  # noqa: E402
+from wellness import calculate_wellness_score, get_burnout_level  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request(method, path, json.dumps(body) if body is not None else None,
+                 {"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read() or b"null")
+
+
+def random_checkin(rng):
+    while True:
+        row = {name: rng.randint(1, 5) for name in SLIDERS}
+        if any(v != 3 for v in row.values()):
+            return row
+
+
+def check_suppression():
+    """No breakdown hides exactly one cell, and the window hides whatever a bucket hides."""
+    stats = CohortStats(db_path="", snapshot_s=3600, k_min=10)
+    now = bucket_start(time.time(), "hour") + 1800
+    size = GRAINS["hour"][0]
+    # Hour 0: Low 2 (small) among 30; hour 1: 25, nothing small; hour 2: 4 check-ins (suppressed).
+    plan = [(0, "Low", 2), (0, "Moderate", 15), (0, "High", 13), (1, "Moderate", 12), (1, "High", 13),
+            (2, "High", 4)]
+    scores = {"Low": 4.5, "Moderate": 3.0, "High": 1.5}
+    for hours_ago, level, n in plan:
+        for _ in range(n):
+            stats.add({}, scores[level], level, ts=now - (2 - hours_ago) * size)
+    got = stats.query("hour", 3, now=now)
+    problems = []
+    for bucket in got["buckets"] + [got["window"]]:
+        if bucket["suppressed"]:
+            continue
+        for name in ("burnout", "score_histogram"):
+            hidden = [label for label, c in bucket[name].items() if c is None]
+            if len(hidden) == 1:
+                problems.append(f"{bucket['start']} {name}: only {hidden[0]} hidden")
+    window = got["window"]
+    published = [b for b in got["buckets"] if not b["suppressed"]]
+    if window["checkins"] != sum(b["checkins"] for b in published):
+        problems.append(f"window checkins {window['checkins']} include suppressed buckets")
+    for level in LEVELS:
+        if any(b["burnout"][level] is None for b in published) and window["burnout"][level] is not None:
+            problems.append(f"window shows {level}, hidden in a bucket")
+    print(f"suppression: buckets {[b['burnout'] if not b['suppressed'] else 'suppressed' for b in got['buckets']]}, "
+          f"window {window['checkins']} {window['burnout']} -> {'OK' if not problems else problems}")
+    return not problems
+
+
+def time_query(port, n=200):
+    start = time.perf_counter()
+    for _ in range(n):
+        request(port, "GET", "/api/stats?grain=hour&buckets=24")
+    return (time.perf_counter() - start) / n * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--checkins", type=int, default=600)
+    parser.add_argument("--clients", type=int, default=12)
+    args = parser.parse_args()
+
+    suppression_ok = check_suppression()
+    db = os.path.join(tempfile.mkdtemp(), "cohort.db")
+    port = free_port()
+    env = {**os.environ, "PORT": str(port), "WEB_CONCURRENCY": str(args.workers),
+           "COHORT_STATS_DB": db, "COHORT_SNAPSHOT_S": "0.5", "USE_EMOTION": "0", "ADMISSION": "0"}
+    server = subprocess.Popen(["gunicorn", "app:app"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                if request(port, "GET", "/health")[0] == 200:
+                    break
+            except OSError:
+                time.sleep(0.1)
+        rng = random.Random(11)
+        rows = [random_checkin(rng) for _ in range(args.checkins)]
+        pids = set()
+
+        def post(chunk):
+            for row in chunk:
+                status, _ = request(port, "POST", "/api/submit", row)
+                assert status == 200, status
+                status, body = request(port, "GET", "/api/emotion/stats")
+                pids.add(body["memory"]["pid"])
+
+        threads = [threading.Thread(target=post, args=(rows[i::args.clients],)) for i in range(args.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        time.sleep(1.5)
+
+        _, stats = request(port, "GET", "/api/stats?grain=day&buckets=1")
+        got = stats["buckets"][-1]
+        scores = [calculate_wellness_score(r) for r in rows]
+        levels = [get_burnout_level(s) for s in scores]
+        expected_avg = round(sum(scores) / len(scores), 2)
+        if got["suppressed"]:
+            # e.g. the posts straddled midnight UTC and split over two day buckets
+            ok = False
+            print(f"{len(rows)} check-ins over {len(pids)} workers -> /api/stats day bucket {got['start']} "
+                  f"is suppressed -> MISMATCH")
+        else:
+            ok = (got["checkins"] == len(rows)
+                  and got["averages"]["wellness_score"] == expected_avg
+                  and all(got["burnout"][lvl] in (levels.count(lvl), None) for lvl in LEVELS)
+                  and all(got["averages"][name] == round(sum(r[name] for r in rows) / len(rows), 2)
+                          for name in SLIDERS))
+            print(f"{len(rows)} check-ins over {len(pids)} workers -> /api/stats day bucket: "
+                  f"{got['checkins']} check-ins, avg {got['averages']['wellness_score']} "
+                  f"(expected {expected_avg}), burnout {got['burnout']} -> {'OK' if ok else 'MISMATCH'}")
+
+        # Fill every hour bucket first so both timings return the same payload,
+        # then grow the history 5x: the latency should stay flat.
+        bulk = CohortStats(db_path=db, snapshot_s=3600)
+        timings = []
+        for extra in (100_000, 400_000):
+            for _ in range(extra):
+                row = random_checkin(rng)
+                score = calculate_wellness_score(row)
+                bulk.add(row, score, get_burnout_level(score), ts=time.time() - rng.random() * 30 * 86400)
+            bulk.snapshot()
+            time_query(port, 50)  # let each worker see the new WAL pages once
+            timings.append(time_query(port))
+        print(f"/api/stats?grain=hour&buckets=24 latency: {timings[0]:.2f} ms with +100k check-ins, "
+              f"{timings[1]:.2f} ms with +500k (k_min={COHORT_K_MIN})")
+        sys.exit(0 if ok and suppression_ok else 1)
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+if __name__ == "__main__":
+    main()
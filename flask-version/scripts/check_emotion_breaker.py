@@ -0,0 +1,234 @@
+"""
+Fault-injection checks for the emotion deadline and circuit breaker
+(circuit_breaker.py), using the stub model's EMOTION_STUB_FAULT_FILE
+(scripts/stub_backend.py).
+
+  - the breaker state machine: opens after N failures in a row, short-
+    circuits during the cool-down (a late success doesn't close it), lets
+    one half-open probe through, closes on its success and reopens on its
+    failure;
+  - end to end against gunicorn: with a model that takes --fault-ms per call,
+    journal check-ins stay within EMOTION_TIMEOUT_MS plus a margin at p99,
+    the breaker opens and later check-ins skip the model (negation overrides
+    still answer); once the fault is gone a probe closes it again and
+    emotion comes back; a model that raises opens it too.
+
+For comparison it runs the same slow model with no deadline and no breaker,
+where p99 follows the model.
+
+    python scripts/check_emotion_breaker.py [--fault-ms 1000] [--timeout-ms 200]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker  # noqa: E402
+from stub_backend import STUB_ENV  # noqa: E402
+
+FAILURES = []
+CHECKIN = {"mood": 3, "stress": 4, "focus": 3, "sleep": 2, "motivation": 3, "anxiety": 4, "appetite": 3,
+           "food_security": 3}
+COOLDOWN_S = 2.0
+
+
+def check(ok, message):
+    if not ok:
+        FAILURES.append(message)
+
+
+def p99_ms(latencies):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1e3 if ordered else 0.0
+
+
+def check_state_machine():
+    now = [0.0]
+    breaker = CircuitBreaker(failures=3, cooldown_s=10, clock=lambda: now[0])
+    breaker.failure("timeout")
+    breaker.failure("error")
+    breaker.success()
+    breaker.failure("timeout")
+    breaker.failure("timeout")
+    check(breaker.state == CLOSED, "opened without 3 failures in a row")
+    breaker.failure("timeout")
+    check(breaker.state == OPEN and breaker.trips == 1, f"not open after 3 failures: {breaker.state}")
+    check(not breaker.allow(), "allowed a call while open")
+    now[0] = 5.0
+    breaker.failure("timeout")  # a call let through earlier, failing late
+    breaker.success()  # ... or answering late
+    check(breaker.state == OPEN and not breaker.allow(), "a late success closed an open breaker")
+    now[0] = 10.0
+    check(breaker.allow() and breaker.state == HALF_OPEN, "no probe after the cool-down")
+    check(not breaker.allow(), "allowed a second probe at once")
+    breaker.failure("error")
+    check(breaker.state == OPEN and breaker.trips == 2, "failed probe didn't reopen")
+    now[0] = 20.0
+    check(breaker.allow(), "no probe after the second cool-down")
+    breaker.cancel()
+    check(breaker.allow(), "cancelled probe kept its slot")
+    breaker.success()
+    check(breaker.state == CLOSED and breaker.allow(), "successful probe didn't close")
+    stats = breaker.stats()
+    check(stats["timeouts"] == 5 and stats["errors"] == 2 and stats["short_circuited"] == 3,
+          f"counts {stats}")
+    disabled = CircuitBreaker(failures=0)
+    for _ in range(20):
+        disabled.failure("timeout")
+    check(disabled.allow(), "failures=0 opened")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    start = time.perf_counter()
+    conn.request(method, path, json.dumps(body) if body else None, {"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    data = resp.read()
+    conn.close()
+    return resp.status, json.loads(data) if data else None, time.perf_counter() - start
+
+
+def start_server(env):
+    port = free_port()
+    server = subprocess.Popen(["gunicorn", "app:app"], cwd=ROOT, env={**env, "PORT": str(port)},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            if request(port, "GET", "/health")[0] == 200:
+                return server, port
+        except OSError:
+            pass
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not become healthy")
+
+
+def journals(port, tag, n, threads=4):
+    """POST n journal check-ins from `threads` clients; [(status, emotion_analysis, seconds)]."""
+    results, lock = [], threading.Lock()
+
+    def client(k):
+        for i in range(k, n, threads):
+            status, body, seconds = request(port, "POST", "/api/submit",
+                                            {**CHECKIN, "journal": f"Long week of labs, entry {tag}-{i}"})
+            with lock:
+                results.append((status, (body or {}).get("emotion_analysis"), seconds))
+
+    workers = [threading.Thread(target=client, args=(k,)) for k in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return results
+
+
+def breaker(port):
+    return request(port, "GET", "/api/emotion/stats")[1]["breaker"]
+
+
+def set_fault(path, fault):
+    if fault is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "w") as fh:
+        fh.write(fault)
+
+
+def summary(results):
+    latencies = [r[2] for r in results]
+    return (f"p50 {sorted(latencies)[len(latencies) // 2] * 1e3:.0f} ms, p99 {p99_ms(latencies):.0f} ms, "
+            f"{sum(1 for r in results if r[1])}/{len(results)} with emotion")
+
+
+def check_end_to_end(fault_ms, timeout_ms, n):
+    fault_file = os.path.join(tempfile.mkdtemp(), "fault")
+    env = {**os.environ, **STUB_ENV, "USE_EMOTION": "1", "EMOTION_STUB_BATCH_MS": "5",
+           "EMOTION_STUB_PER_TEXT_MS": "1", "EMOTION_STUB_FAULT_FILE": fault_file, "EMOTION_CACHE_SIZE": "0",
+           "ADMISSION": "0", "SUBMIT_DEDUP": "0", "WEB_CONCURRENCY": "1", "GUNICORN_THREADS": "8",
+           "EMOTION_TIMEOUT_MS": str(timeout_ms),
+           "EMOTION_BREAKER_FAILURES": "3", "EMOTION_BREAKER_COOLDOWN_S": str(COOLDOWN_S)}
+    server, port = start_server(env)
+    try:
+        healthy = journals(port, "ok", n)
+        check(all(r[0] == 200 and r[1] for r in healthy), "healthy model: check-in without emotion")
+        print(f"healthy model:              {summary(healthy)}")
+
+        set_fault(fault_file, str(fault_ms))
+        slow = journals(port, "slow", n)
+        state = breaker(port)
+        check(all(r[0] == 200 for r in slow), f"slow model: statuses {sorted({r[0] for r in slow})}")
+        bound = timeout_ms + 250
+        check(p99_ms([r[2] for r in slow]) <= bound, f"slow model: p99 {p99_ms([r[2] for r in slow]):.0f} ms "
+                                                     f"over {bound} ms")
+        check(state["state"] == OPEN and state["timeouts"] >= 3, f"slow model: breaker {state}")
+        check(state["short_circuited"] > 0, "slow model: nothing short-circuited")
+        override = request(port, "POST", "/api/submit", {**CHECKIN, "journal": "I am not happy at all"})
+        check(override[1]["emotion_analysis"] is not None and override[2] < 0.1,
+              f"override while open: {override[1]['emotion_analysis']} in {override[2] * 1e3:.0f} ms")
+        print(f"{fault_ms} ms model, deadline:  {summary(slow)}; breaker {state['state']} after "
+              f"{state['timeouts']} timeouts, {state['short_circuited']} short-circuited")
+
+        set_fault(fault_file, None)
+        time.sleep(COOLDOWN_S + fault_ms / 1000.0)  # cool-down, plus the batch still running
+        recovered = journals(port, "back", n, threads=1)
+        state = breaker(port)
+        check(state["state"] == CLOSED and state["probes"] >= 1, f"after the fault: breaker {state}")
+        check(all(r[1] for r in recovered[1:]), "after the fault: check-ins still without emotion")
+        print(f"fault removed, probed:      {summary(recovered)}; breaker {state['state']}")
+
+        set_fault(fault_file, "error")
+        failing = journals(port, "error", 10, threads=1)
+        state = breaker(port)
+        check(all(r[0] == 200 and r[1] is None for r in failing), "raising model: check-in failed or faked emotion")
+        check(state["state"] == OPEN and state["errors"] == 3, f"raising model: breaker {state}")
+        print(f"raising model:              {summary(failing)}; breaker {state['state']} after "
+              f"{state['errors']} errors")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    set_fault(fault_file, str(fault_ms))
+    server, port = start_server({**env, "EMOTION_TIMEOUT_MS": "0", "EMOTION_BREAKER_FAILURES": "0"})
+    try:
+        unbounded = journals(port, "nobreaker", n)
+        print(f"{fault_ms} ms model, no deadline: {summary(unbounded)}")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fault-ms", type=int, default=1000, help="latency the slow stub adds per call")
+    parser.add_argument("--timeout-ms", type=int, default=200, help="EMOTION_TIMEOUT_MS for the run")
+    parser.add_argument("--requests", type=int, default=40, help="journal check-ins per phase")
+    args = parser.parse_args()
+
+    check_state_machine()
+    check_end_to_end(args.fault_ms, args.timeout_ms, args.requests)
+
+    for message in FAILURES[:20]:
+        print("FAIL", message)
+    print(f"{'FAILED' if FAILURES else 'ok'}: {len(FAILURES)} failure(s)")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
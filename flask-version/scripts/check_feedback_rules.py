@@ -0,0 +1,266 @@
+"""
+Checks for the compiled feedback rules (feedback_rules.py, feedback_rules.json).
+
+  - conformance: for every one of the 5^8 slider combinations, with and
+    without a journal and emotion, on two days and under both
+    FEEDBACK_SELECTOR modes, the feedback text and resources are exactly what
+    the hard-coded rules returned (scripts/legacy_feedback.py); so are the
+    level-only resources and sliders that aren't integers in 1..5, which take
+    the interpreted path;
+  - malformed files are refused with RuleError;
+  - hot reload: an edited file is picked up within FEEDBACK_RULES_RELOAD_S, a
+    broken one keeps the current rules, concurrent readers never see a mix of
+    two versions while the file flips between them (directly or through a
+    shared feedback table), and the feedback table starts over on the new
+    version.
+
+    python scripts/check_feedback_rules.py [--quick]
+"""
+import argparse
+import contextlib
+import copy
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import feedback_rules  # noqa: E402
+import feedback_table  # noqa: E402
+import legacy_feedback  # noqa: E402
+import wellness  # noqa: E402
+from feedback_rules import LEVELS, RULES_FILE, SLIDERS, FeedbackRules, RuleError, Ruleset  # noqa: E402
+from feedback_table import FeedbackTable  # noqa: E402
+from selector import Selector  # noqa: E402
+
+FAILURES = []
+DAYS = (date(2026, 3, 2), date(2026, 10, 17))
+CASES = [
+    ("", None),
+    ("", {"emotion": "sadness", "confidence": 0.9}),
+    ("Two exams and rent due, feeling lonely", {"emotion": "fear", "confidence": 0.8}),
+    ("My roommate keeps me up before deadlines", {"emotion": "anger", "confidence": 0.6}),
+]
+
+
+def check(ok, message):
+    if not ok:
+        FAILURES.append(message)
+
+
+def new_feedback(data, emotion, today, rules):
+    journal = (data.get("journal") or "").strip()
+    return wellness.assemble_feedback(wellness.slider_feedback(data, today, rules), journal,
+                                      wellness.journal_feedback(journal, emotion, rules), today, rules)
+
+
+def old_feedback(data, emotion, today):
+    journal = (data.get("journal") or "").strip()
+    return legacy_feedback.assemble_feedback(legacy_feedback.slider_feedback(data, today), journal,
+                                             legacy_feedback.journal_feedback(journal, emotion), today)
+
+
+def set_selector(mode):
+    selector = Selector(mode)
+    wellness.SELECTOR = feedback_rules.SELECTOR = legacy_feedback.SELECTOR = selector
+
+
+def check_conformance(stride):
+    rules = Ruleset.from_file(RULES_FILE)
+    combos = 0
+    for mode in ("fast", "md5"):
+        set_selector(mode)
+        for k, row in enumerate(itertools.product(range(1, 6), repeat=len(SLIDERS))):
+            if k % stride:
+                continue
+            combos += 1
+            data = dict(zip(SLIDERS, row))
+            level = wellness.get_burnout_level(wellness.calculate_wellness_score(data))
+            if wellness.get_resources(level, data, rules) != legacy_feedback.get_resources(level, data):
+                check(False, f"resources differ for {row}")
+            for today in DAYS:
+                for journal, emotion in CASES:
+                    data["journal"] = journal
+                    if new_feedback(data, emotion, today, rules) != old_feedback(data, emotion, today):
+                        check(False, f"feedback differs for {row} on {today} [{mode}] journal={journal!r}")
+    set_selector(feedback_rules.SELECTOR.mode)
+
+    for level in LEVELS + ("Unknown",):
+        check(wellness.get_resources(level, None, rules) == legacy_feedback.get_resources(level),
+              f"level-only resources differ for {level}")
+
+    # Floats, out-of-range and missing food_security: not encodable, so interpreted.
+    rng = random.Random(7)
+    odd = 0
+    for _ in range(20000):
+        data = {name: rng.choice((0, 1, 2, 2.5, 3, 3.5, 4, 5, 6, 4.0)) for name in SLIDERS}
+        if rng.random() < 0.2:
+            del data["food_security"]
+        data["journal"] = rng.choice(CASES)[0]
+        emotion = rng.choice(CASES)[1]
+        level = wellness.get_burnout_level(wellness.calculate_wellness_score(data))
+        odd += 1
+        if wellness.get_resources(level, data, rules) != legacy_feedback.get_resources(level, data):
+            check(False, f"resources differ for odd sliders {data}")
+        if new_feedback(data, emotion, DAYS[0], rules) != old_feedback(data, emotion, DAYS[0]):
+            check(False, f"feedback differs for odd sliders {data}")
+    print(f"conformance: {combos} combinations x {len(DAYS)} days x {len(CASES)} journal cases "
+          f"(both selector modes), {odd} odd check-ins, {len(FAILURES)} mismatches")
+
+
+def section(spec, name):
+    return next(s["rules"] for s in spec["feedback"]["sections"] if s["name"] == name)
+
+
+def check_validation():
+    with open(RULES_FILE, encoding="utf-8") as fh:
+        spec = json.load(fh)
+    broken = [
+        ("unknown slider", lambda s: section(s, "combo")[0]["when"].update(pulse=">=4")),
+        ("bad condition", lambda s: section(s, "combo")[0]["when"].update(mood="high")),
+        ("unknown level", lambda s: s["resources"]["rules"][1]["when"].update(level="Severe")),
+        ("unknown section", lambda s: s["feedback"]["sections"].append({"name": "extra", "mode": "first",
+                                                                        "rules": []})),
+        ("unknown mode", lambda s: s["feedback"]["sections"][0].update(mode="any")),
+        ("unknown topic", lambda s: s["journal"]["topics"].append({"topic": "weather", "text": "Rain."})),
+        ("rule without text", lambda s: section(s, "food")[0].pop("text")),
+        ("at_least out of range", lambda s: section(s, "priority")[0]["at_least"].update(count=9)),
+    ]
+    for name, mutate in broken:
+        bad = copy.deepcopy(spec)
+        try:
+            mutate(bad)
+            Ruleset(bad)
+        except RuleError:
+            continue
+        except Exception as e:  # noqa: BLE001 - anything else means the rule file format changed
+            check(False, f"validation ({name}): {type(e).__name__}: {e}")
+            continue
+        check(False, f"validation ({name}): accepted")
+
+
+def write_rules(path, spec):
+    """Replace the file atomically, with an mtime that differs from the last write."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(spec, fh, ensure_ascii=False)
+    os.replace(tmp, path)
+    stamp = time.time_ns() + random.randrange(1, 10**6)
+    os.utime(path, ns=(stamp, stamp))
+
+
+def tagged(spec, tag):
+    """Every feedback text with `tag` appended, so a result shows which version produced it."""
+    spec = copy.deepcopy(spec)
+    spec["feedback"]["default"] += tag
+    for part in spec["feedback"]["sections"]:
+        for rule in part["rules"]:
+            if "texts" in rule:
+                rule["texts"] = [t + tag for t in rule["texts"]]
+            else:
+                rule["text"] += tag
+    return spec
+
+
+def check_reload(seconds):
+    with open(RULES_FILE, encoding="utf-8") as fh:
+        spec = json.load(fh)
+    path = os.path.join(tempfile.mkdtemp(), "rules.json")
+    write_rules(path, tagged(spec, " [A]"))
+    rules = FeedbackRules(path, reload_s=0.01)
+    version_a = rules.current().version
+
+    data = {"mood": 1, "stress": 5, "focus": 1, "sleep": 1, "motivation": 1, "anxiety": 5, "appetite": 1,
+            "food_security": 1}
+    write_rules(path, tagged(spec, " [B]"))
+    time.sleep(0.02)
+    ruleset = rules.current()
+    check(ruleset.version != version_a and rules.reloads == 1, "edited file not picked up")
+    check(new_feedback(data, None, DAYS[0], ruleset).count("[B]") >= 3, "reloaded texts not used")
+
+    with open(path, "w") as fh:
+        fh.write('{"feedback": ')
+    time.sleep(0.02)
+    check(rules.current() is ruleset and rules.reload_errors == 1, "broken file replaced the rules")
+    check(rules.stats()["last_error"], "broken file: no last_error")
+
+    # Readers evaluate while a writer flips the file between A and B, half of
+    # them through one shared table: its text must come from the ruleset asked for.
+    stop = threading.Event()
+    mixed, evaluations = [], [0]
+    shared = FeedbackTable()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            data = {name: rng.randint(1, 5) for name in SLIDERS}
+            ruleset = rules.current()
+            if seed % 2:
+                text = shared.feedback(data, rules=ruleset)
+            else:
+                text = new_feedback(data, None, date.today(), ruleset)
+            tag = "[A]" if ruleset.default.endswith("[A]") else "[B]"
+            if ("[B]" if tag == "[A]" else "[A]") in text:
+                mixed.append(text)
+            evaluations[0] += 1
+
+    readers = [threading.Thread(target=reader, args=(k,)) for k in range(4)]
+    for r in readers:
+        r.start()
+    deadline, flips = time.time() + seconds, 0
+    with contextlib.redirect_stdout(io.StringIO()):  # one "[rules] reloaded" line per flip
+        while time.time() < deadline:
+            write_rules(path, tagged(spec, " [A]" if flips % 2 else " [B]"))
+            flips += 1
+            time.sleep(0.005)
+        stop.set()
+        for r in readers:
+            r.join()
+    check(not mixed, f"{len(mixed)} evaluations mixed two versions, e.g. {mixed[:1]}")
+    check(rules.reloads > 2, f"only {rules.reloads} reloads over {flips} flips")
+    print(f"reload: {flips} file flips, {rules.reloads} reloads, {rules.reload_errors} rejected, "
+          f"{evaluations[0]} concurrent evaluations, {len(mixed)} mixed")
+
+    # The feedback table drops its slots when the version changes.
+    feedback_table.RULES = rules
+    try:
+        write_rules(path, tagged(spec, " [A]"))
+        time.sleep(0.02)
+        table = FeedbackTable()
+        before = table.feedback(dict(data))
+        write_rules(path, tagged(spec, " [B]"))
+        time.sleep(0.02)
+        after = table.feedback(dict(data))
+        check("[A]" in before and "[B]" in after and "[A]" not in after,
+              f"feedback table kept the old rules: {after!r}")
+        check(table.stats()["rules_version"] == rules.current().version, "feedback table version not updated")
+    finally:
+        feedback_table.RULES = feedback_rules.RULES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="every 17th slider combination instead of all")
+    parser.add_argument("--reload-seconds", type=float, default=2.0, help="length of the concurrent flip test")
+    args = parser.parse_args()
+
+    check_conformance(17 if args.quick else 1)
+    check_validation()
+    check_reload(args.reload_seconds)
+
+    for message in FAILURES[:20]:
+        print("FAIL", message)
+    print(f"{'FAILED' if FAILURES else 'ok'}: {len(FAILURES)} failure(s)")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Conformance check: FeedbackTable must return exactly what
+generate_advanced_feedback / get_resources return, for every one of the 5^8
+slider combinations, with and without a journal and emotion; and a slot
+filled for yesterday's table after the day has rolled over must not land in
+today's.
+
+    python scripts/check_feedback_table.py
+"""
+import itertools
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feedback_rules import RULES
+from feedback_table import SLIDERS, FeedbackTable, pack
+from wellness import (
+    calculate_wellness_score, generate_advanced_feedback,
+    get_burnout_level, get_resources,
+)
+
+CASES = [
+    ("", None),
+    ("", {"emotion": "sadness", "confidence": 0.9}),
+    ("Two exams and rent due, feeling lonely", {"emotion": "fear", "confidence": 0.8}),
+]
+
+
+def main():
+    table = FeedbackTable()
+    mismatches = 0
+    for row in itertools.product(range(1, 6), repeat=len(SLIDERS)):
+        data = dict(zip(SLIDERS, row))
+        level = get_burnout_level(calculate_wellness_score(data))
+        if table.resources(data) != get_resources(level, data):
+            mismatches += 1
+            print(f"resources differ for {row}")
+        for journal, emotion in CASES:
+            data["journal"] = journal
+            if table.feedback(data, emotion) != generate_advanced_feedback(data, emotion):
+                mismatches += 1
+                print(f"feedback differs for {row} journal={journal!r}")
+    # Values outside the table fall back to the functions.
+    odd = {"mood": 3.5, "stress": 2, "focus": 4, "sleep": 1, "motivation": 2,
+           "anxiety": 5, "appetite": 2, "food_security": 3}
+    if table.feedback(odd) != generate_advanced_feedback(odd):
+        mismatches += 1
+        print("fallback feedback differs")
+    # A request that looked up yesterday's table finishes its fill after another
+    # request has already started today's.
+    rollover = FeedbackTable()
+    rules = RULES.current()
+    today = date.today()
+    stale = rollover._sync(today - timedelta(days=1), rules)
+    rollover._sync(today, rules)
+    rollover._fill(stale, pack(odd | {"mood": 4}), odd | {"mood": 4}, today - timedelta(days=1), rules)
+    if any(rollover._table[2]) or rollover.filled:
+        mismatches += 1
+        print("a fill for yesterday's table landed in today's")
+    print(f"checked {5 ** len(SLIDERS)} combinations x {len(CASES)} journal cases: "
+          f"{mismatches} mismatches; table {table.stats()}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Checks for the opt-in check-in history (history_store.py).
+
+  - appends are buffered, flushed to the worker's log and sealed into
+    sorted columnar segments without losing or reordering rows;
+  - a store sees the open log of another process as it grows, and seals it
+    once that process is gone (also a seal it left half done);
+  - trends: 7/30-day counts and averages, the least-squares slope and the
+    daily means match values computed directly from the rows;
+  - window boundaries: a row exactly 7 or 30 days old is in, one second
+    older is out, whether it sits in a segment, a log or the buffer;
+  - without CHECKIN_HISTORY_SALT the directory gets one generated salt
+    that every store opening it shares.
+
+    python scripts/check_history.py
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from history_store import DAY, RECORD, HistoryStore, pseudonym  # noqa: E402
+
+FAILURES = []
+SALT = "check-history"
+CHECKIN = {"mood": 4, "stress": 2, "focus": 3, "sleep": 3, "motivation": 3, "anxiety": 3, "appetite": 3,
+           "food_security": 3}
+NOW = 1_700_000_000
+
+
+def check(ok, message):
+    if not ok:
+        FAILURES.append(message)
+
+
+def store(directory, **kwargs):
+    # A long flush interval so the checks decide when the writer runs.
+    return HistoryStore(directory, **{"salt": SALT, "flush_ms": 600_000, **kwargs})
+
+
+def names(directory, ext):
+    return sorted(n for n in os.listdir(directory) if n.endswith(ext))
+
+
+def check_append_seal(n=1000, segment_rows=150):
+    directory = tempfile.mkdtemp(prefix="history-check-")
+    history = store(directory, segment_rows=segment_rows)
+    rng = random.Random(3)
+    expected = {f"s{i}": [] for i in range(7)}
+    for i in range(n):
+        anon_id = rng.choice(sorted(expected))
+        ts, score = NOW - rng.randrange(40 * DAY), rng.randint(8, 40) / 8.0
+        history.append(anon_id, CHECKIN, score, "Moderate", {"emotion": "joy"}, ts=ts)
+        expected[anon_id].append((ts, score))
+        if i % 40 == 39:
+            history.flush()
+    pending = history.stats()["buffered"]
+    for anon_id, rows in expected.items():
+        got = history.rows(anon_id)
+        check(sorted(rows) == sorted(zip(got["ts"].tolist(), got["score"].tolist())),
+              f"{anon_id}: rows read back differ before the final flush")
+        check(list(got["ts"]) == sorted(got["ts"]), f"{anon_id}: rows not in time order")
+    history.flush()
+    stats = history.stats()
+    check(stats["written"] == n and stats["buffered"] == 0, f"after flush: {stats}")
+    check(stats["sealed"] > 0 and len(names(directory, ".col")) == stats["sealed"],
+          f"{stats['sealed']} seals, segments {names(directory, '.col')}")
+    sealed_rows = 0
+    for name in names(directory, ".col"):
+        path = os.path.join(directory, name)
+        keys = np.memmap(path, dtype=RECORD["key"], mode="r", shape=(os.path.getsize(path) // RECORD.itemsize,))
+        check(bool(np.all(keys[1:] >= keys[:-1])), f"{name}: keys not sorted")
+        sealed_rows += len(keys)
+    log_rows = sum(os.path.getsize(os.path.join(directory, name)) // RECORD.itemsize
+                   for name in names(directory, ".log"))
+    check(sealed_rows + log_rows == n and log_rows < segment_rows,
+          f"{sealed_rows} sealed + {log_rows} open rows for {n} appended")
+    reopened = store(directory)
+    for anon_id, rows in expected.items():
+        got = reopened.rows(anon_id)
+        check(sorted(rows) == sorted(zip(got["ts"].tolist(), got["score"].tolist())),
+              f"{anon_id}: rows differ after reopening")
+        check(set(got["emotion"].tolist()) == {2}, f"{anon_id}: emotion not stored")
+    print(f"append/flush/seal: {n} rows, {stats['flushes']} flushes, {stats['sealed']} segments, "
+          f"{pending} still buffered before the last flush")
+
+
+def _writer(directory, rows, ready, done):
+    history = store(directory)
+    for ts, score in rows:
+        history.append("other", CHECKIN, score, "Low", ts=ts)
+    history.flush()
+    ready.set()
+    done.wait(30)
+    os._exit(0)  # like a killed worker: no clean shutdown, the log stays open
+
+
+def check_other_process():
+    directory = tempfile.mkdtemp(prefix="history-check-")
+    reader = store(directory)
+    rows = [(NOW - i * 3600, 1.0 + i / 8.0) for i in range(24)]
+    ready, done = multiprocessing.Event(), multiprocessing.Event()
+    child = multiprocessing.Process(target=_writer, args=(directory, rows, ready, done))
+    child.start()
+    check(ready.wait(30), "writer process didn't flush")
+    got = reader.rows("other")
+    check(len(got) == len(rows), f"open log of a live process: {len(got)} of {len(rows)} rows")
+    check(names(directory, ".log") == [f"active-{child.pid}.log"], f"logs: {names(directory, '.log')}")
+    check(store(directory).stats()["recovered"] == 0, "a live process's log was sealed")
+    done.set()
+    child.join(30)
+
+    # A seal interrupted after the rename: the log is there, the segment isn't.
+    stale = [(NOW - DAY, 2.5), (NOW - 2 * DAY, 3.5)]
+    half = np.array([(pseudonym("sealing", SALT), ts, 0, score, 1, 0) for ts, score in stale], dtype=RECORD)
+    with open(os.path.join(directory, f"seg-{time.time_ns()}-{child.pid}.log"), "wb") as fh:
+        fh.write(half.tobytes() + b"\0" * 5)  # and a torn last record
+
+    recovered = store(directory)
+    check(recovered.stats()["recovered"] == 2, f"recovered {recovered.stats()['recovered']} of 2 logs")
+    check(names(directory, ".log") == [], f"logs left after recovery: {names(directory, '.log')}")
+    check(len(names(directory, ".col")) == 2, f"segments after recovery: {names(directory, '.col')}")
+    got = recovered.rows("other")
+    check(sorted(zip(got["ts"].tolist(), got["score"].tolist())) == sorted(rows), "dead worker's rows changed")
+    check(len(recovered.rows("sealing")) == 2, "half-sealed rows lost")
+    print(f"other process: read its open log live, sealed it and a half-done seal after it died "
+          f"({len(names(directory, '.col'))} segments)")
+
+
+def check_trends():
+    directory = tempfile.mkdtemp(prefix="history-check-")
+    history = store(directory, segment_rows=4)
+    # Score rises 0.1 a day; the rows sit in a segment, the open log and the buffer.
+    days_ago = [29.5, 21, 14, 10, 6.5, 6, 3, 1, 0.5, 0]
+    for d in days_ago[:6]:
+        history.append("trend", CHECKIN, 4.0 - 0.1 * d, "Moderate", ts=NOW - int(d * DAY))
+    history.flush()  # 6 rows: one sealed segment
+    for d in days_ago[6:9]:
+        history.append("trend", CHECKIN, 4.0 - 0.1 * d, "Moderate", ts=NOW - int(d * DAY))
+    history.flush()  # 3 rows in the open log
+    history.append("trend", CHECKIN, 4.0, "High", {"emotion": "calm"}, ts=NOW)  # still buffered
+    history.append("trend", CHECKIN, 1.0, "High", ts=NOW - 31 * DAY)  # outside the window
+    out = history.trends("trend", now=NOW)
+
+    scores = np.array([4.0 - 0.1 * d for d in days_ago], dtype=np.float32).astype(np.float64)
+    recent = scores[np.array(days_ago) <= 7]
+    check(out["checkins_30d"] == len(days_ago), f"checkins_30d {out['checkins_30d']}")
+    check(out["checkins_7d"] == len(recent), f"checkins_7d {out['checkins_7d']}")
+    check(out["avg_30d"] == round(float(scores.mean()), 2), f"avg_30d {out['avg_30d']}")
+    check(out["avg_7d"] == round(float(recent.mean()), 2), f"avg_7d {out['avg_7d']}")
+    check(out["trend_per_day"] is not None and abs(out["trend_per_day"] - 0.1) < 1e-3,
+          f"trend_per_day {out['trend_per_day']} (expected 0.1)")
+    check(sum(day["checkins"] for day in out["daily"]) == len(days_ago), "daily counts don't add up")
+    check([day["date"] for day in out["daily"]] == sorted({day["date"] for day in out["daily"]}),
+          "daily means not one per date in order")
+    check(out["latest"] == {"timestamp": NOW, "wellness_score": 4.0, "burnout_level": "High", "emotion": "calm"},
+          f"latest {out['latest']}")
+    empty = history.trends("nobody", now=NOW)
+    check(empty["checkins_30d"] == 0 and empty["avg_30d"] is None and empty["trend_per_day"] is None
+          and empty["latest"] is None, f"no rows: {empty}")
+    print(f"trends: {out['checkins_7d']}/{out['checkins_30d']} check-ins, avg {out['avg_7d']}/{out['avg_30d']}, "
+          f"slope {out['trend_per_day']}/day over {len(out['daily'])} days")
+
+
+def check_windows():
+    for where in ("segment", "log", "buffer"):
+        directory = tempfile.mkdtemp(prefix="history-check-")
+        history = store(directory, segment_rows=4 if where == "segment" else 1 << 20)
+        edges = [NOW - 30 * DAY - 1, NOW - 30 * DAY, NOW - 7 * DAY - 1, NOW - 7 * DAY]
+        for ts in edges:
+            history.append("edge", CHECKIN, 3.0, "Moderate", ts=ts)
+        if where != "buffer":
+            history.flush()
+        check(bool(names(directory, ".col")) == (where == "segment"), f"{where}: rows not where expected")
+        out = history.trends("edge", now=NOW)
+        check(out["checkins_30d"] == 3 and out["checkins_7d"] == 1,
+              f"{where}: 30d {out['checkins_30d']} (expected 3), 7d {out['checkins_7d']} (expected 1)")
+        check(len(history.rows("edge", since=NOW - 7 * DAY)) == 1, f"{where}: rows(since) not inclusive")
+    print("windows: rows exactly 7 and 30 days old are in, one second older are out")
+
+
+def check_salt():
+    directory = tempfile.mkdtemp(prefix="history-check-")
+    first, second = HistoryStore(directory, salt=""), HistoryStore(directory, salt="")
+    check(len(first.salt) == 64 and first.salt == second.salt, "generated salt not shared by the directory")
+    check(oct(os.stat(os.path.join(directory, "salt")).st_mode & 0o777) == "0o600", "salt file readable by others")
+    other = HistoryStore(tempfile.mkdtemp(prefix="history-check-"), salt="")
+    check(other.salt != first.salt, "two directories got the same salt")
+    check(pseudonym("a", first.salt) != pseudonym("a", ""), "generated salt not used")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.parse_args()
+
+    check_append_seal()
+    check_other_process()
+    check_trends()
+    check_windows()
+    check_salt()
+
+    for message in FAILURES[:20]:
+        print("FAIL", message)
+    print(f"{'FAILED' if FAILURES else 'ok'}: {len(FAILURES)} failure(s)")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
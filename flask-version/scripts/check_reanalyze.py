@@ -0,0 +1,135 @@
+"""
+Checks for the offline re-analysis CLI (scripts/reanalyze_journals.py).
+
+  - a run killed partway and started again with the same arguments produces
+    exactly the output of an uninterrupted run: no row lost, repeated or
+    reordered, for JSONL and CSV output;
+  - a checkpoint for a changed input is refused unless --restart is given;
+  - empty and unparseable rows still get one output row each.
+
+It also prints rows/sec for 1 and --procs workers (stub backend, CPU-bound),
+which only shows scaling on a machine with that many cores.
+
+    python scripts/check_reanalyze.py [--rows 4000] [--procs 2]
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "scripts", "reanalyze_journals.py")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_backend import STUB_ENV  # noqa: E402
+
+FAILURES = []
+ENV = {**os.environ, **STUB_ENV, "EMOTION_STUB_CPU": "1", "EMOTION_STUB_BATCH_MS": "2",
+       "EMOTION_STUB_PER_TEXT_MS": "0.3"}
+TEXTS = ("I am not happy about this at all", "Exams are piling up and I can't sleep",
+         "Had a lovely walk with friends today", "I feel so alone in my dorm",
+         "Honestly pretty calm, just tired", "Why does everything go wrong for me")
+
+
+def check(ok, message):
+    if not ok:
+        FAILURES.append(message)
+
+
+def write_input(path, rows):
+    with open(path, "w") as fh:
+        for i in range(rows):
+            text = "" if i % 97 == 0 else f"{TEXTS[i % len(TEXTS)]} ({i})"
+            fh.write(json.dumps({"id": f"c{i}", "journal": text}) + "\n")
+            if i == rows // 2:
+                fh.write("{not json\n")
+
+
+def run(args, **kwargs):
+    return subprocess.run([sys.executable, SCRIPT, *args], env=ENV, capture_output=True, text=True, **kwargs)
+
+
+def check_resume(tmp, src, out_name, procs):
+    clean = os.path.join(tmp, "clean-" + out_name)
+    run([src, "--out", clean, "--procs", str(procs)], check=True)
+    resumed = os.path.join(tmp, "resumed-" + out_name)
+    args = [src, "--out", resumed, "--procs", str(procs), "--checkpoint-s", "0.2", "--chunk-rows", "64"]
+    proc = subprocess.Popen([sys.executable, SCRIPT, *args], env=ENV, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+    # Kill once a checkpoint exists and more rows have been written after it.
+    ckpt = resumed + ".ckpt"
+    deadline = time.time() + 60
+    while time.time() < deadline and proc.poll() is None:
+        if os.path.exists(ckpt) and os.path.getsize(resumed) > json.load(open(ckpt))["bytes"] > 0:
+            break
+        time.sleep(0.05)
+    killed = proc.poll() is None
+    os.killpg(proc.pid, signal.SIGKILL)
+    proc.wait()
+    check(killed, f"{out_name}: run finished before it could be killed; use more --rows")
+    rows_at_kill = json.load(open(ckpt))["rows"]
+    result = run(args)
+    check(result.returncode == 0, f"{out_name}: resume failed: {result.stderr[-500:]}")
+    check(f"resuming {resumed} after row {rows_at_kill}" in result.stdout, f"{out_name}: did not resume")
+    with open(clean, "rb") as a, open(resumed, "rb") as b:
+        check(a.read() == b.read(), f"{out_name}: output after kill + resume differs from a clean run")
+    print(f"{out_name}: killed after row {rows_at_kill}, resumed, output identical to a clean run")
+    return clean
+
+
+def check_rows(path, rows):
+    with open(path) as fh:
+        records = [json.loads(line) for line in fh]
+    check([r["row"] for r in records] == list(range(rows + 1)), "rows missing or out of order")
+    sources = {r["source"] for r in records}
+    check(sources == {"empty", "invalid", "override", "model"}, f"sources {sorted(sources)}")
+    check(all(r["emotion"] for r in records if r["source"] in ("override", "model")), "labelled row without emotion")
+
+
+def check_changed_input(tmp, src):
+    out = os.path.join(tmp, "changed.jsonl")
+    run([src, "--out", out], check=True)
+    with open(src, "a") as fh:
+        fh.write(json.dumps({"id": "late", "journal": "added afterwards"}) + "\n")
+    refused = run([src, "--out", out])
+    check(refused.returncode != 0 and "--restart" in refused.stderr, "checkpoint for a changed input was accepted")
+    check(run([src, "--out", out, "--restart"]).returncode == 0, "--restart failed")
+
+
+def rate(tmp, src, procs):
+    report = os.path.join(tmp, f"rate-{procs}.json")
+    run([src, "--out", os.path.join(tmp, f"rate-{procs}.jsonl"), "--procs", str(procs), "--restart",
+         "--json", report], check=True)
+    with open(report) as fh:
+        return json.load(fh)["rows_per_sec"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=4000)
+    parser.add_argument("--procs", type=int, default=2)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    src = os.path.join(tmp, "journals.jsonl")
+    write_input(src, args.rows)
+    clean = check_resume(tmp, src, "out.jsonl", args.procs)
+    check_rows(clean, args.rows)
+    check_resume(tmp, src, "out.csv", args.procs)
+    one, many = rate(tmp, src, 1), rate(tmp, src, args.procs)
+    print(f"{args.rows} rows: 1 worker {one:.0f} rows/s, {args.procs} workers {many:.0f} rows/s "
+          f"({many / one:.2f}x on {os.cpu_count()} core(s))")
+    check_changed_input(tmp, src)
+
+    for message in FAILURES[:20]:
+        print("FAIL", message)
+    print(f"{'FAILED' if FAILURES else 'ok'}: {len(FAILURES)} failure(s)")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
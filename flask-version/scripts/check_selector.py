@@ -0,0 +1,65 @@
+"""
+Selector checks:
+  1. FEEDBACK_SELECTOR=md5 picks exactly what the original MD5 `_pick` did,
+     for both day-scoped and payload-scoped keys.
+  2. The default (fast) picks are identical across processes, whatever
+     PYTHONHASHSEED a worker happens to get.
+
+    python scripts/check_selector.py
+"""
+import hashlib
+import os
+import subprocess
+import sys
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from selector import Selector
+
+SCOPES = ("priority", "combo1", "combo2", "combo3", "campus")
+KEYS = [f"2026-01-{d:02d}-{s}-{j}" for d in range(1, 29) for s in (11111111, 53524231, 24215432)
+        for j in ("", "exam tomorrow", "lonely")]
+
+
+def legacy_pick(items, seed_key):
+    seed = int(hashlib.md5(seed_key.encode()).hexdigest(), 16)
+    return items[seed % len(items)]
+
+
+def fast_picks():
+    sel = Selector("fast")
+    return [sel.pick(list(range(n)), key) for key in KEYS for n in (2, 3, 4, 7)]
+
+
+def main():
+    failures = 0
+    md5 = Selector("md5")
+    for n in (2, 3, 4, 7):
+        items = list(range(n))
+        for key in KEYS:
+            if md5.pick(items, key) != legacy_pick(items, key):
+                failures += 1
+        for offset in range(60):
+            day = date.today() + timedelta(days=offset)
+            for scope in SCOPES:
+                if md5.daily(items, scope, day) != legacy_pick(items, f"{day}-{scope}"):
+                    failures += 1
+    print(f"md5 compatibility: {'ok' if not failures else f'{failures} mismatches'}")
+
+    expected = fast_picks()
+    code = f"import sys; sys.path.insert(0, {os.path.join(ROOT, 'scripts')!r}); " \
+           f"sys.path.insert(0, {ROOT!r}); import check_selector as c; print(c.fast_picks())"
+    for seed in ("0", "1", "12345"):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                             env={**os.environ, "PYTHONHASHSEED": seed}, check=True).stdout
+        if out.strip() != str(expected):
+            failures += 1
+            print(f"fast picks differ under PYTHONHASHSEED={seed}")
+    print(f"cross-process stability: {'ok' if not failures else 'FAILED'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
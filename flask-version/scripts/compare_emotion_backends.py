@@ -0,0 +1,114 @@
+"""
+Accuracy-parity and latency/throughput comparison of the emotion backends.
+
+Every backend is run over the same journals; labels and confidences are
+compared against the fp32 torch reference, then single-text latency
+(p50/p95/p99) and batched throughput are measured. Exits non-zero if any
+backend agrees with the reference on fewer than --min-agreement of texts.
+
+    python scripts/compare_emotion_backends.py --model-dir ./models/emotion
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emotion import top_emotion
+from emotion_backends import BACKENDS, load_backend
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def measure(classify, texts, batch_sizes, repeat):
+    # Warm-up so one-off allocation doesn't land in the numbers.
+    classify(texts[:2], batch_size=2)
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            classify([text], batch_size=1)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+    throughput = {}
+    for bs in batch_sizes:
+        batch = (texts * (bs // len(texts) + 1))[:bs]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            classify(batch, batch_size=bs)
+        throughput[str(bs)] = round(bs * repeat / (time.perf_counter() - start), 1)
+    return {
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 2),
+            "p95": round(_percentile(latencies, 95), 2),
+            "p99": round(_percentile(latencies, 99), 2),
+            "mean": round(statistics.mean(latencies), 2),
+        },
+        "texts_per_sec": throughput,
+    }
+
+
+def parity(reference, candidate):
+    agree = sum(r["emotion"] == c["emotion"] for r, c in zip(reference, candidate))
+    diffs = [abs(r["confidence"] - c["confidence"]) for r, c in zip(reference, candidate)]
+    return {
+        "label_agreement": round(agree / len(reference), 4),
+        "confidence_mean_abs_diff": round(statistics.mean(diffs), 4),
+        "confidence_max_abs_diff": round(max(diffs), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", required=True, help="directory from export_emotion_model.py")
+    parser.add_argument("--texts", default=os.path.join(HERE, "sample_journals.txt"), help="one journal per line")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--batch-sizes", default="1,8,32")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    with open(args.texts, encoding="utf-8") as fh:
+        texts = [line.strip() for line in fh if line.strip()]
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    names = [n.strip() for n in args.backends.split(",") if n.strip()]
+    if "torch" not in names:
+        names.insert(0, "torch")
+
+    report, reference, ok = {}, None, True
+    for name in names:
+        start = time.perf_counter()
+        classify = load_backend(name, args.model_dir)
+        load_seconds = time.perf_counter() - start
+        preds = [top_emotion(r) for r in classify(texts, batch_size=16)]
+        if reference is None:
+            reference = preds
+        entry = {"load_seconds": round(load_seconds, 2), **parity(reference, preds)}
+        entry.update(measure(classify, texts, batch_sizes, args.repeat))
+        report[name] = entry
+        if entry["label_agreement"] < args.min_agreement:
+            ok = False
+        print(f"{name:11s} agree={entry['label_agreement']:.3f} "
+              f"dconf={entry['confidence_mean_abs_diff']:.4f} "
+              f"p50={entry['latency_ms']['p50']}ms p99={entry['latency_ms']['p99']}ms "
+              f"texts/s={entry['texts_per_sec']}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+    if not ok:
+        print(f"FAIL: a backend agreed with torch fp32 on fewer than {args.min_agreement:.0%} of texts")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Distill the cheap-first emotion tier (emotion_cascade.py) from the transformer.
+
+Labels a journal corpus with the configured model (EMOTION_BACKEND /
+EMOTION_MODEL_DIR, as the app would run it), trains a TF-IDF + logistic
+regression classifier on those labels and writes a joblib bundle for
+EMOTION_CASCADE_MODEL. Journals that hit a negation override are dropped:
+they never reach the cascade. On a held-out split it reports, per confidence
+threshold, how many journals the cascade would answer, how often it agrees
+with the transformer on those, and the expected latency per journal
+(cascade cost + escalated share x measured model cost).
+
+Corpus files are .txt (one journal per line), .jsonl (--text-field) or .csv
+(--text-field column). Teacher labels are the slow part; --labels keeps
+them in a JSONL file and reuses it on the next run.
+
+    python scripts/distill_emotion_cascade.py --corpus journals.txt --labels labels.jsonl \\
+        --out models/emotion_cascade.joblib --json cascade-report.json
+    EMOTION_BACKEND=stub EMOTION_BACKEND_PLUGIN=scripts/stub_backend.py \
+        python scripts/distill_emotion_cascade.py --synthetic 20000 --out /tmp/cascade.joblib
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emotion import MODEL_ID, classify_batch, get_pipeline, negation_override  # noqa: E402
+from emotion_cascade import LinearTfidf  # noqa: E402
+
+THRESHOLDS = (0.0, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98)
+
+# --synthetic: template journals for trying the pipeline without a corpus
+# (e.g. with the stub backend); not a substitute for real journals.
+SITUATIONS = ("my midterm", "the chem lab report", "rent this month", "my roommate", "practice tonight",
+              "group project", "calling home", "the job fair", "finals week", "my shift at work",
+              "the weekend", "office hours", "my advisor meeting", "the dining hall")
+FEELINGS = (
+    "I feel sad and kind of hopeless", "honestly just lonely and tired", "I miss home and feel down",
+    "I'm really happy and proud of myself", "it was great, I'm excited", "feeling hopeful and relaxed",
+    "I'm so grateful for my friends", "love my family, they care a lot", "thankful for people who care",
+    "I'm angry, it's so unfair", "frustrated and annoyed again", "furious about how it went",
+    "I'm worried and anxious", "stressed and overwhelmed", "nervous, kind of scared to fail",
+    "I was surprised, totally unexpected", "suddenly everything changed, shocked", "wow, did not see that coming",
+    "it was fine I guess", "nothing special to report", "just a normal day", "ok, moving on",
+)
+
+
+def synthetic_corpus(n, seed):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        parts = [f"{rng.choice(('Thinking about', 'After', 'Before', 'Dealing with'))} {rng.choice(SITUATIONS)},",
+                 rng.choice(FEELINGS)]
+        if rng.random() < 0.3:
+            parts.append(f"and {rng.choice(FEELINGS).lower()}")
+        out.append(" ".join(parts) + ".")
+    return out
+
+
+def read_corpus(path, text_field):
+    if path.endswith(".jsonl"):
+        with open(path) as fh:
+            return [json.loads(line).get(text_field) or "" for line in fh if line.strip()]
+    if path.endswith(".csv"):
+        with open(path, newline="") as fh:
+            return [row.get(text_field) or "" for row in csv.DictReader(fh)]
+    with open(path) as fh:
+        return [line.rstrip("\n") for line in fh]
+
+
+def teacher_labels(texts, labels_path, batch_size):
+    """{text: {"emotion", "confidence"}} from the model, reusing/extending `labels_path`."""
+    labelled = {}
+    if labels_path and os.path.exists(labels_path):
+        with open(labels_path) as fh:
+            for line in fh:
+                row = json.loads(line)
+                if row.get("teacher") == MODEL_ID:
+                    labelled[row["text"]] = {"emotion": row["emotion"], "confidence": row["confidence"]}
+    todo = [t for t in texts if t not in labelled]
+    if todo:
+        print(f"labelling {len(todo)} journals with {MODEL_ID} ({len(labelled)} reused)")
+    out = open(labels_path, "a") if labels_path else None
+    try:
+        for i in range(0, len(todo), batch_size):
+            chunk = todo[i:i + batch_size]
+            for text, result in zip(chunk, classify_batch(chunk)):
+                labelled[text] = result
+                if out:
+                    out.write(json.dumps({"text": text, "teacher": MODEL_ID, **result}) + "\n")
+    finally:
+        if out:
+            out.close()
+    return labelled
+
+
+def per_text_seconds(fn, texts):
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - start) / len(texts)
+
+
+def train(texts, labels, seed):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+
+    model = make_pipeline(
+        TfidfVectorizer(lowercase=True, ngram_range=(1, 2), sublinear_tf=True, min_df=2, max_features=100_000),
+        LogisticRegression(max_iter=2000, C=4.0, random_state=seed),
+    )
+    model.fit(texts, labels)
+    return model
+
+
+def threshold_report(model, texts, labels, cascade_s, model_s):
+    probs = model.predict_proba(texts)
+    classes = model.classes_
+    top = probs.argmax(axis=1)
+    confidence = probs.max(axis=1)
+    agree = classes[top] == labels
+    n = len(texts)
+    rows = []
+    for threshold in THRESHOLDS:
+        answered = confidence >= threshold
+        n_answered = int(answered.sum())
+        escalated = 1.0 - n_answered / n
+        rows.append({
+            "threshold": threshold,
+            "answered_fraction": round(n_answered / n, 4),
+            "escalated_fraction": round(escalated, 4),
+            "agreement_answered": round(float(agree[answered].mean()), 4) if n_answered else None,
+            # Escalated journals get the model's own answer, so they always agree.
+            "agreement_overall": round(float(agree[answered].sum() + (n - n_answered)) / n, 4),
+            "expected_ms_per_journal": round((cascade_s + escalated * model_s) * 1e3, 3),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", action="append", default=[], help="journal file (.txt/.jsonl/.csv); repeatable")
+    parser.add_argument("--text-field", default="journal", help="field/column holding the journal")
+    parser.add_argument("--synthetic", type=int, default=0, help="add N template journals")
+    parser.add_argument("--labels", help="JSONL cache of teacher labels (read and appended)")
+    parser.add_argument("--out", required=True, help="joblib bundle for EMOTION_CASCADE_MODEL")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the threshold report here")
+    args = parser.parse_args()
+
+    import joblib
+
+    texts = []
+    for path in args.corpus:
+        texts += read_corpus(path, args.text_field)
+    texts += synthetic_corpus(args.synthetic, args.seed)
+    texts = list(dict.fromkeys(t.strip() for t in texts if t and t.strip()))
+    texts = [t for t in texts if not negation_override(t)]
+    if len(texts) < 100:
+        sys.exit(f"need at least 100 distinct journals, got {len(texts)}")
+
+    get_pipeline()
+    labelled = teacher_labels(texts, args.labels, args.batch_size)
+    random.Random(args.seed).shuffle(texts)
+    split = int(len(texts) * (1.0 - args.holdout))
+    train_texts, test_texts = texts[:split], texts[split:]
+    train_labels = [labelled[t]["emotion"] for t in train_texts]
+
+    import numpy as np
+    start = time.perf_counter()
+    model = train(train_texts, train_labels, args.seed)
+    print(f"trained on {len(train_texts)} journals in {time.perf_counter() - start:.1f}s, "
+          f"held out {len(test_texts)}")
+
+    # The app scores with the unpacked model; it must match sklearn exactly.
+    fast = LinearTfidf(model)
+    drift = max(float(np.abs(fast.predict_proba(t) - model.predict_proba([t])[0]).max()) for t in test_texts)
+    if drift > 1e-9:
+        sys.exit(f"unpacked model disagrees with sklearn (max |dp| {drift:.2e})")
+    sample = test_texts[:200]
+    cascade_s = per_text_seconds(fast.predict_proba, sample)
+    model_s = per_text_seconds(lambda t: classify_batch([t]), sample[:50])
+    rows = threshold_report(model, test_texts, np.array([labelled[t]["emotion"] for t in test_texts]),
+                            cascade_s, model_s)
+
+    print(f"\nper journal: cascade {cascade_s * 1e6:.0f} us, model {model_s * 1e3:.1f} ms (batch of 1, {MODEL_ID})")
+    print(f"{'threshold':>9} {'answered':>9} {'escalated':>9} {'agree(ans)':>10} {'agree(all)':>10} {'ms/journal':>10}")
+    for r in rows:
+        agree = f"{r['agreement_answered']:.1%}" if r["agreement_answered"] is not None else "-"
+        print(f"{r['threshold']:>9.2f} {r['answered_fraction']:>9.1%} {r['escalated_fraction']:>9.1%} "
+              f"{agree:>10} {r['agreement_overall']:>10.1%} {r['expected_ms_per_journal']:>10.3f}")
+
+    report = {"teacher": MODEL_ID, "train_rows": len(train_texts), "test_rows": len(test_texts),
+              "cascade_us": round(cascade_s * 1e6, 1), "model_ms": round(model_s * 1e3, 3), "thresholds": rows}
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    joblib.dump({"model": model, "teacher": MODEL_ID,
+                 "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "report": report}, args.out)
+    print(f"\nwrote {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB); "
+          f"serve with EMOTION_CASCADE_MODEL={args.out} EMOTION_CASCADE_THRESHOLD=<threshold>")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Export the emotion classifier for the CPU backends in emotion_backends.py.
+
+Writes tokenizer + config + fp32 weights, an ONNX graph (model.onnx) and a
+dynamically int8-quantized ONNX graph (model.int8.onnx) into --out. Point the
+app at it with EMOTION_MODEL_DIR=<out> and pick EMOTION_BACKEND=torch,
+torch-int8 or onnx.
+
+    python scripts/export_emotion_model.py --source ./distilbert-emotion --out ./models/emotion
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emotion import MODEL_NAME
+
+
+def export(source, out, opset=14, quantize=True):
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(out, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    model = AutoModelForSequenceClassification.from_pretrained(source)
+    model.eval()
+    tokenizer.save_pretrained(out)
+    model.save_pretrained(out)
+    print(f"saved tokenizer + fp32 weights to {out}")
+
+    sample = tokenizer(["exporting the emotion model"], return_tensors="pt")
+    onnx_path = os.path.join(out, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            onnx_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    print(f"exported {onnx_path} ({os.path.getsize(onnx_path) / 1e6:.1f} MB)")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = os.path.join(out, "model.int8.onnx")
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"quantized {int8_path} ({os.path.getsize(int8_path) / 1e6:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=MODEL_NAME, help="local model directory or hub id")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--no-quantize", action="store_true", help="skip model.int8.onnx")
+    args = parser.parse_args()
+    export(args.source, args.out, opset=args.opset, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Frozen copy of the hard-coded feedback and resource rules as they were
+before feedback_rules.json, kept as the reference the compiled ruleset is
+checked against (scripts/check_feedback_rules.py) and timed against
+(bench/bench_feedback_rules.py). Do not edit: it is not used by the app.
+"""
+from collections import namedtuple
+from datetime import date
+
+from journal_matcher import scan
+from selector import SELECTOR
+from wellness import VANDAL_LINKS, calculate_wellness_score, get_burnout_level
+
+
+# ---------- Helpers for varied text
+def _pick(items, seed_key):
+    """Deterministic picker for variety (stable per day + payload)."""
+    return SELECTOR.pick(items, seed_key)
+
+def _pick_daily(items, scope, today):
+    """Same pick for everyone all day (memoized until midnight)."""
+    return SELECTOR.daily(items, scope, today)
+
+
+
+# ---------- Resources
+def get_resources(burnout_level, data=None):
+    VANDAL_LINKS = {
+        "athletics": "https://govandals.com",
+        "swim": "https://www.uidaho.edu/recreation/swim-center",
+        "rec": "https://www.uidaho.edu/recreation/rec-center"
+    }
+
+    resources = {"title": "🎯 Suggested Campus Resources", "items": []}
+
+    if burnout_level == "High":
+        resources["items"].extend([
+            {"name": "🧠 Counseling Services", "url": "https://www.uidaho.edu/current-students/cmhc",
+             "description": "Free short-term counseling and mental health support."},
+            {"name": "📘 TRIO Student Support Services", "url": "https://www.uidaho.edu/current-students/academic-support/asp/sss",
+             "description": "Academic advising, tutoring, and life coaching for eligible students."},
+            {"name": "🏛️ Vandal Success Center", "url": "https://www.uidaho.edu/current-students/academic-support/asp",
+             "description": "Tutoring, time management, and academic skills help."},
+        ])
+
+    elif burnout_level == "Moderate":
+        # Conditional adds
+        if data:
+            if data.get("stress", 3) >= 4 or data.get("anxiety", 3) >= 4:
+                resources["items"].append({"name": "🧘 Mindfulness Workshops",
+                                           "description": "Practical tools for stress & anxiety."})
+            if data.get("focus", 3) <= 2 or data.get("sleep", 3) <= 2:
+                resources["items"].append({"name": "📎 Tutoring Services",
+                                           "description": "Extra support for challenging classes."})
+            if data.get("motivation", 3) <= 2:
+                resources["items"].append({"name": "📚 Academic Coaching",
+                                           "description": "Accountability and strategies for staying on track."})
+
+        # Add positive engagement
+        resources["items"].extend([
+            {"name": "🏋️ Student Rec Center", "url": VANDAL_LINKS["rec"],
+             "description": "Gym, sports courts, and rock climbing wall."},
+            {"name": "🏊 Swim Center (free with student ID)", "url": VANDAL_LINKS["swim"],
+             "description": "Refresh yourself at open swim hours."}
+        ])
+
+    elif burnout_level == "Low":
+        resources["items"].extend([
+            {"name": "🎉 Keep up the great work!", "description": "Stay balanced and enjoy yourself."},
+            {"name": "🏈 Vandal Athletics", "url": VANDAL_LINKS["athletics"],
+             "description": "Check schedules for football, basketball, volleyball and more."},
+            {"name": "🤝 Peer Mentoring", "description": "Support others and build connections."},
+            {"name": "🏋️ Student Rec Center", "url": VANDAL_LINKS["rec"],
+             "description": "Stay active with gym, games, or climbing."},
+        ])
+
+    # Food support if needed
+    if data and data.get("food_security", 3) <= 2:
+        resources["items"].insert(0, {
+            "name": "🍽️ Vandal Food Pantry & Food Resources",
+            "url": "https://www.uidaho.edu/current-students/dean-of-students/student-care/food-insecurity",
+            "description": "Free groceries and support if money/food is tight."
+        })
+
+    # Cap at 4 items → keep it short and relevant
+    resources["items"] = resources["items"][:4]
+
+    return resources
+
+
+# ---------- Feedback
+# Journal topic (see journal_matcher.TOPICS) → nudge, in display order.
+JOURNAL_NUDGES = (
+    ("deadlines", "Deadlines ahead—map the next small step and a short, focused block."),
+    ("money", "Money stress is heavy—if food feels tight, campus resources can help."),
+    ("roommate", "Roommate tension—try a calm check-in or ask a neutral friend/RA for perspective."),
+    ("homesick", "Homesick happens—brief social time or a familiar routine can help."),
+)
+
+# Slider-only pieces of the feedback; `key` is the packed slider string used
+# to seed the per-payload picks.
+FeedbackParts = namedtuple("FeedbackParts", "key priority combo singles campus food farmers")
+
+def slider_feedback(data, today=None):
+    """
+    Journal-independent part of the feedback: lead priority and combo lines,
+    candidate single-slider tips, campus/food lines and the Farmers Market
+    add-on. Deterministic for a given day and slider values.
+    """
+    today = today or date.today()
+    mood = data['mood']
+    stress = data['stress']
+    focus = data['focus']
+    sleep = data['sleep']
+    motivation = data['motivation']
+    anxiety = data['anxiety']
+    appetite = data['appetite']
+    food_security = data.get('food_security', 3)
+
+    hi = lambda v: v >= 4
+    lo = lambda v: v <= 2
+    ok = lambda v: v == 3
+
+    signals = {
+        "mood_hi": hi(mood), "mood_lo": lo(mood),
+        "stress_hi": hi(stress), "stress_lo": lo(stress),
+        "focus_hi": hi(focus), "focus_lo": lo(focus),
+        "sleep_hi": hi(sleep), "sleep_lo": lo(sleep),
+        "motivation_hi": hi(motivation), "motivation_lo": lo(motivation),
+        "anxiety_hi": hi(anxiety), "anxiety_lo": lo(anxiety),
+        "appetite_hi": hi(appetite), "appetite_lo": lo(appetite), "appetite_ok": ok(appetite),
+        "food_low": food_security <= 2,
+    }
+
+    # Priority care if multiple core areas low
+    core = [mood, focus, sleep, motivation]
+    priority = []
+    if sum(1 for v in core if v <= 2) >= 3:
+        priority.append(_pick_daily([
+            "🚩 Several areas look tough today. Consider reaching out to a counselor or a trusted person—support can make things lighter.",
+            "🚩 You flagged a few low spots. A quick check-in with campus support or a friend could really help right now."
+        ], "priority", today))
+
+    # Combo tips
+    combos = []
+    if signals["stress_hi"] and signals["sleep_lo"]:
+        combos.append(_pick_daily([
+            "High stress + poor sleep—try a gentle wind-down tonight and limit screens 60 minutes before bed.",
+            "Stress and sleep are clashing—short breathing sets and a set lights-out time can help."
+        ], "combo1", today))
+
+    if signals["mood_hi"] and signals["focus_lo"]:
+        combos.append(_pick_daily([
+            "Mood is good but focus is off—try a 20-minute distraction-free block to get rolling.",
+            "Feeling upbeat but unfocused—set one tiny, clear task and start there."
+        ], "combo2", today))
+
+    if signals["motivation_lo"] and signals["appetite_lo"]:
+        combos.append(_pick_daily([
+            "Motivation and appetite are low—take it easy and aim for small, regular snacks.",
+            "Low drive + low appetite—be kind to yourself; quick, simple nutrition can help your energy."
+        ], "combo3", today))
+
+    if signals["appetite_lo"] and signals["stress_hi"]:
+        combos.append("Poor appetite with high stress—schedule small snacks and hydration breaks.")
+    if signals["anxiety_hi"] and signals["sleep_lo"]:
+        combos.append("High anxiety and rough sleep—try a calming routine before bed (dim lights, slow breaths).")
+    if signals["motivation_lo"] and signals["mood_lo"]:
+        combos.append("Motivation and mood are both low—pick a super-small win to start momentum.")
+    if signals["stress_hi"] and signals["anxiety_hi"]:
+        combos.append("Stress and anxiety are high—2–3 minutes of paced breathing can help ground you.")
+    if signals["mood_hi"] and signals["stress_hi"]:
+        combos.append("Good mood under stress—keep leaning on the coping skills that are working.")
+
+    # Single-slider tips (short + positive)
+    singles = []
+    if signals["mood_lo"]:
+        singles.append("Mood is low—tiny pleasures or a quick chat with a friend can help.")
+    elif signals["mood_hi"]:
+        singles.append("Great mood—keep feeding it with things that feel good.")
+    if signals["stress_hi"]:
+        singles.append("Stress is high—take a 5-minute breathing or stretch break.")
+    elif signals["stress_lo"]:
+        singles.append("Low stress—nice work pacing your workload.")
+    if signals["focus_lo"]:
+        singles.append("Focus is low—try a Pomodoro block with notifications off.")
+    elif signals["focus_hi"]:
+        singles.append("Focus looks strong—tackle a priority while the groove is there.")
+    if signals["sleep_lo"]:
+        singles.append("Sleep was rough—if possible, plan a wind-down and protect tonight’s rest.")
+    elif signals["sleep_hi"]:
+        singles.append("Great sleep—everything benefits from that.")
+    if signals["motivation_lo"]:
+        singles.append("Motivation is low—set a 2-minute starter task.")
+    elif signals["motivation_hi"]:
+        singles.append("Motivation is high—aim it at your most important task.")
+    if signals["anxiety_hi"]:
+        singles.append("Anxiety is high—try a short grounding exercise (5-4-3-2-1).")
+    elif signals["anxiety_lo"]:
+        singles.append("Low anxiety—keep up what’s helping you stay calm.")
+    if signals["appetite_lo"]:
+        singles.append("Appetite is low—don’t skip meals; light, regular snacks help.")
+    elif signals["appetite_hi"]:
+        singles.append("Strong appetite—lean into nourishing, balanced meals.")
+    elif signals["appetite_ok"]:
+        singles.append("Balanced appetite—good sign for steady energy.")
+
+    # Risk-gated campus suggestion
+    wellness_score = calculate_wellness_score(data)
+    level = get_burnout_level(wellness_score)
+    campus = []
+    if level in ("Low", "Moderate"):
+        campus_pools = [
+            f"Recharge with something fun—check Vandal Athletics at <a href='{VANDAL_LINKS['athletics']}' target='_blank' rel='noopener'>govandals.com</a> and catch a game.",
+            f"Swim is free for students during public hours—see <a href='{VANDAL_LINKS['swim']}' target='_blank' rel='noopener'>Swim Center</a> info.",
+            f"Drop by the Student Rec Center—gym, courts, even climbing: <a href='{VANDAL_LINKS['rec']}' target='_blank' rel='noopener'>Rec Center</a>."
+        ]
+        campus.append(_pick_daily(campus_pools, "campus", today))
+
+    # Food security mention
+    food_lines = []
+    if signals["food_low"]:
+        food_lines.append("If meals are tight, you’re not alone—campus and local options can help with groceries.")
+
+    # Farmers Market add-on if appetite low
+    farmers_market_message = None
+    if appetite <= 2:
+        farmers_market_message = (
+            "🍎 To gently spark appetite, try the "
+            "<a href='https://www.ci.moscow.id.us/197/Community-Events-Moscow-Farmers-Market' "
+            "target='_blank' rel='noopener'>Moscow Farmers Market</a> on Saturdays (May–Oct, 8am–1pm)."
+        )
+
+    return FeedbackParts(
+        key=f"{mood}{stress}{focus}{sleep}{motivation}{anxiety}{appetite}{food_security}",
+        priority=priority[0] if priority else None,
+        combo=combos[0] if combos else None,
+        singles=tuple(singles),
+        campus=campus[0] if campus else None,
+        food=food_lines[0] if food_lines else None,
+        farmers=farmers_market_message,
+    )
+
+def journal_feedback(journal, emotion=None):
+    """Journal keyword nudges plus the emotion tone softener."""
+    journal_lines = []
+    topics = scan(journal).topics if journal else ()
+    for topic, line in JOURNAL_NUDGES:
+        if topic in topics:
+            journal_lines.append(line)
+
+    # Emotion tone softener
+    if emotion and emotion.get("emotion") in {"sadness", "fear", "anger", "anxiety"} and emotion.get("confidence", 0) > 0.7:
+        journal_lines.append("Thanks for sharing—what you're feeling makes sense. Small steps count.")
+
+    return journal_lines
+
+def assemble_feedback(parts, journal="", journal_lines=(), today=None):
+    """Join slider parts and journal lines into the final 2–4 sentences."""
+    today = today or date.today()
+    # Assemble final 2–4 sentences (priority → one combo → one single → maybe journal → maybe campus → maybe food)
+    seed_key = f"{today}-{parts.key}-{journal[:40]}"
+    lines = []
+    if parts.priority:
+        lines.append(parts.priority)
+    if parts.combo:
+        lines.append(parts.combo)
+    if parts.singles:
+        lines.append(_pick(parts.singles, seed_key))
+    if journal_lines:
+        lines.append(_pick(journal_lines, seed_key))
+    if parts.campus:
+        lines.append(parts.campus)
+    if parts.food:
+        lines.append(parts.food)
+
+    # De-dupe, trim
+    seen = set(); final = []
+    for s in lines:
+        if s and s not in seen:
+            final.append(s); seen.add(s)
+    final = final[:4]
+    if not final:
+        final = ["Your responses look balanced today. Keep prioritizing your well-being!"]
+    if parts.farmers:
+        final.append(parts.farmers)
+
+    return " ".join(final)
+
+def generate_advanced_feedback(data, emotion=None):
+    """
+    Build short, varied, targeted feedback based on slider signals + journal.
+    Returns 2–4 sentences, plus Farmers Market suggestion when appetite is low.
+    """
+    journal = (data.get('journal') or "").strip()
+    today = date.today()
+    return assemble_feedback(slider_feedback(data, today), journal,
+                             journal_feedback(journal, emotion), today)
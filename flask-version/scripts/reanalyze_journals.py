@@ -0,0 +1,223 @@
+"""
+Relabel an archive of journals with the current emotion model.
+
+Reads JSONL (--text-field key) or CSV (--text-field column), optionally
+gzipped, one row at a time and hands chunks of --chunk-rows journals to
+--procs worker processes. Each worker loads the model once
+(EMOTION_BACKEND / EMOTION_MODEL_DIR, as the app runs it) with its share of
+the cores. It classifies a chunk the way /api/submit does: negation
+overrides first, then emotion.classify_batch (length-bucketed forward
+passes, long journals windowed). Results are written in input order, one
+line per input row, as JSONL or CSV (by the --out extension).
+
+At most --procs x 4 chunks are in flight, so memory stays flat however big
+the archive is. Every --checkpoint-s seconds the output is fsynced and
+<out>.ckpt records how many rows and output bytes are done. A killed run
+started again with the same arguments truncates the output to the
+checkpoint and carries on from the next row. --restart starts over.
+
+    python scripts/reanalyze_journals.py archive.jsonl.gz --out relabelled.jsonl --procs 4
+    python scripts/reanalyze_journals.py archive.csv --text-field journal --id-field checkin_id \\
+        --out relabelled.csv --json reanalyze-report.json
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emotion import MODEL_ID, negation_override  # noqa: E402
+from inference_pool import init_inference_process  # noqa: E402
+
+FIELDS = ("row", "id", "emotion", "confidence", "source")
+IN_FLIGHT_PER_PROC = 4
+
+
+def data_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise SystemExit(f"{path}: expected .jsonl, .ndjson or .csv (optionally .gz)")
+
+
+def read_rows(path, text_field, id_field, skip=0):
+    """(row, id, text) for every input row after the first `skip`, read lazily; text None if unreadable."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as fh:
+        if data_format(path) == "csv":
+            for i, row in enumerate(csv.DictReader(fh)):
+                if i >= skip:
+                    yield i, row.get(id_field), row.get(text_field) or ""
+            return
+        i = 0
+        for line in fh:
+            if not line.strip():
+                continue
+            if i >= skip:  # skipped rows aren't parsed
+                try:
+                    row = json.loads(line)
+                    yield i, row.get(id_field), row.get(text_field) or ""
+                except (ValueError, AttributeError):
+                    yield i, None, None
+            i += 1
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def relabel_chunk(chunk):
+    """Worker: one output record per (row, id, text), in order."""
+    import emotion
+    records, todo = [], []
+    for row, row_id, text in chunk:
+        text = text.strip() if isinstance(text, str) else None
+        record = {"row": row, "id": row_id, "emotion": None, "confidence": None,
+                  "source": "invalid" if text is None else "empty"}
+        if text:
+            override = negation_override(text)
+            if override:
+                record.update(override, source="override")
+            else:
+                todo.append((record, text))
+        records.append(record)
+    if todo:
+        for (record, _), result in zip(todo, emotion.classify_batch([text for _, text in todo])):
+            record.update(result, source="model")
+    return records
+
+
+def encode(records, fmt):
+    if fmt == "jsonl":
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode()
+    buf = io.StringIO()
+    csv.writer(buf).writerows([r[name] for name in FIELDS] for r in records)
+    return buf.getvalue().encode()
+
+
+def fingerprint(args):
+    """What a checkpoint is only valid for."""
+    stat = os.stat(args.input)
+    return {"input": os.path.abspath(args.input), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "text_field": args.text_field, "id_field": args.id_field, "model": MODEL_ID}
+
+
+def load_checkpoint(path, expected):
+    if not os.path.exists(path):
+        return None
+    with open(path) as fh:
+        state = json.load(fh)
+    if state.get("fingerprint") != expected:
+        raise SystemExit(f"{path} belongs to a different input, field or model; pass --restart to start over")
+    return state
+
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(state, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help=".jsonl/.ndjson/.csv, optionally .gz")
+    parser.add_argument("--out", required=True, help=".jsonl or .csv, written incrementally")
+    parser.add_argument("--text-field", default="journal")
+    parser.add_argument("--id-field", default="id", help="copied to the output to join results back")
+    parser.add_argument("--procs", type=int, default=os.cpu_count() or 1, help="worker processes, one model each")
+    parser.add_argument("--threads", type=int, help="intra-op threads per worker (default: cores / procs)")
+    parser.add_argument("--chunk-rows", type=int, default=256, help="journals per task sent to a worker")
+    parser.add_argument("--checkpoint-s", type=float, default=5.0)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--json", help="write a run report here")
+    args = parser.parse_args()
+
+    data_format(args.input)
+    out_format = data_format(args.out)
+    ckpt_path = args.out + ".ckpt"
+    expected = fingerprint(args)
+    state = None if args.restart else load_checkpoint(ckpt_path, expected)
+    state = state or {"fingerprint": expected, "rows": 0, "bytes": 0, "sources": {}, "complete": False}
+    if state["complete"]:
+        print(f"{args.out} is already complete ({state['rows']} rows); pass --restart to redo it")
+        return
+    procs = max(1, args.procs)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // procs)
+    sources = Counter(state["sources"])
+
+    out = open(args.out, "r+b" if state["bytes"] and os.path.exists(args.out) else "wb")
+    out.truncate(state["bytes"])  # drop anything written after the last checkpoint
+    out.seek(state["bytes"])
+    if state["bytes"] == 0 and out_format == "csv":
+        out.write((",".join(FIELDS) + "\r\n").encode())
+    if state["rows"]:
+        print(f"resuming {args.out} after row {state['rows']}")
+    print(f"{MODEL_ID}: {procs} worker(s) x {threads} thread(s), {args.chunk_rows} rows per chunk", flush=True)
+
+    def checkpoint(complete=False):
+        out.flush()
+        os.fsync(out.fileno())
+        state.update(bytes=out.tell(), sources=dict(sources), complete=complete)
+        save_checkpoint(ckpt_path, state)
+
+    start = time.perf_counter()
+    first_row, last_checkpoint = state["rows"], start
+    rows = read_rows(args.input, args.text_field, args.id_field, skip=state["rows"])
+    with ProcessPoolExecutor(procs, mp_context=mp.get_context("spawn"),
+                             initializer=init_inference_process, initargs=(threads,)) as pool:
+        pending = deque()
+        chunks = chunked(rows, max(1, args.chunk_rows))
+        while True:
+            for chunk in chunks:
+                pending.append(pool.submit(relabel_chunk, chunk))
+                if len(pending) >= procs * IN_FLIGHT_PER_PROC:
+                    break
+            if not pending:
+                break
+            records = pending.popleft().result()
+            out.write(encode(records, out_format))
+            state["rows"] += len(records)
+            sources.update(r["source"] for r in records)
+            now = time.perf_counter()
+            if now - last_checkpoint >= args.checkpoint_s:
+                checkpoint()
+                last_checkpoint = now
+                done = state["rows"] - first_row
+                print(f"  {state['rows']} rows, {done / (now - start):.0f} rows/s", flush=True)
+    checkpoint(complete=True)
+    out.close()
+
+    elapsed = time.perf_counter() - start
+    done = state["rows"] - first_row
+    rate = done / elapsed if elapsed else 0.0
+    print(f"{done} rows in {elapsed:.1f} s ({rate:.0f} rows/s) -> {args.out}; "
+          f"{', '.join(f'{k} {v}' for k, v in sorted(sources.items()))}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"model": MODEL_ID, "procs": procs, "threads": threads, "chunk_rows": args.chunk_rows,
+                       "rows": done, "resumed_after": first_row, "seconds": round(elapsed, 3),
+                       "rows_per_sec": round(rate, 1), "sources": dict(sources)}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
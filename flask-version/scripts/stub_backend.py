@@ -0,0 +1,98 @@
+"""
+Model-free stand-in for the emotion classifier, for offline benchmarks, load
+tests and fault injection. Not part of the app: it registers itself as
+EMOTION_BACKEND=stub when imported, and a server or inference pool started
+with STUB_ENV imports it through EMOTION_BACKEND_PLUGIN.
+
+    EMOTION_BACKEND=stub EMOTION_BACKEND_PLUGIN=scripts/stub_backend.py python app.py
+"""
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emotion_backends import register_backend  # noqa: E402
+
+PLUGIN = os.path.abspath(__file__)
+# Environment for a subprocess (server, pool, CLI) that should load the stub.
+STUB_ENV = {"EMOTION_BACKEND": "stub", "EMOTION_BACKEND_PLUGIN": PLUGIN}
+
+LABELS = ("sadness", "joy", "love", "anger", "fear", "surprise")
+# Cue words the stub keys its labels on, so offline runs have a teacher whose
+# labels follow the text (scripts/distill_emotion_cascade.py needs that).
+STUB_LEXICON = {
+    "sadness": ("sad", "lonely", "homesick", "miss", "cry", "down", "tired", "hopeless", "failing"),
+    "joy": ("happy", "great", "excited", "fun", "proud", "good", "hopeful", "relaxed"),
+    "love": ("love", "grateful", "friends", "family", "care", "thankful"),
+    "anger": ("angry", "annoyed", "unfair", "furious", "frustrated", "hate"),
+    "fear": ("worried", "anxious", "scared", "nervous", "panic", "stressed", "overwhelmed", "afraid"),
+    "surprise": ("surprised", "unexpected", "suddenly", "shocked", "wow"),
+}
+
+
+class StubClassifier:
+    """
+    Model-free stand-in: sleeps `batch_ms` per call plus `per_text_ms` per
+    text, plus `per_token_us` per padded token (batch size x longest text in
+    whitespace words, as a padded forward pass costs). The sleep releases the
+    GIL like a real forward pass. The label is
+    the STUB_LEXICON emotion with the most cue words in the text (a CRC of
+    the text breaks ties and picks for texts with no cues), and the score is
+    derived from the CRC, so both are stable per text. With `cpu=True`
+    (EMOTION_STUB_CPU=1) it spins for that long instead, occupying one core
+    the way a single-threaded forward pass does — used to measure how the
+    inference pool scales with cores. For fault injection, while the file
+    named by EMOTION_STUB_FAULT_FILE exists, each call first sleeps for the
+    number of milliseconds written in it, or raises if it says `error`.
+    """
+
+    def __init__(self, batch_ms=None, per_text_ms=None, cpu=None, per_token_us=None):
+        self.batch_ms = float(os.getenv("EMOTION_STUB_BATCH_MS", "40") if batch_ms is None else batch_ms)
+        self.per_text_ms = float(os.getenv("EMOTION_STUB_PER_TEXT_MS", "5") if per_text_ms is None else per_text_ms)
+        self.per_token_us = float(os.getenv("EMOTION_STUB_PER_TOKEN_US", "0") if per_token_us is None
+                                  else per_token_us)
+        self.cpu = os.getenv("EMOTION_STUB_CPU", "0") in ("1", "true", "True") if cpu is None else cpu
+        self.fault_file = os.getenv("EMOTION_STUB_FAULT_FILE", "")
+
+    def _inject_fault(self):
+        try:
+            with open(self.fault_file) as fh:
+                fault = fh.read().strip()
+        except OSError:
+            return
+        if fault == "error":
+            raise RuntimeError("injected stub model fault")
+        time.sleep(float(fault or 0) / 1000.0)
+
+    def __call__(self, texts, batch_size=None, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        if self.fault_file:
+            self._inject_fault()
+        seconds = (self.batch_ms + self.per_text_ms * len(texts)) / 1000.0
+        if self.per_token_us and texts:
+            seconds += self.per_token_us * len(texts) * max(len(t.split()) for t in texts) / 1e6
+        if self.cpu:
+            end = time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                pass
+        else:
+            time.sleep(seconds)
+        out = []
+        for text in texts:
+            h = zlib.crc32(text.encode())
+            words = text.lower().split()
+            hits = [sum(w.strip(".,!?'\"") in cues for w in words) for cues in STUB_LEXICON.values()]
+            best = max(hits)
+            top = [i for i, n in enumerate(hits) if n == best][h % hits.count(best)] if best else h % len(LABELS)
+            conf = (0.7 if best else 0.35) + (h >> 8) % 30 / 100.0
+            rest = (1.0 - conf) / (len(LABELS) - 1)
+            out.append([{"label": label, "score": conf if i == top else rest}
+                        for i, label in enumerate(LABELS)])
+        return out
+
+
+register_backend("stub", lambda model: StubClassifier())
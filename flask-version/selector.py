@@ -0,0 +1,64 @@
+"""
+Deterministic text selection for feedback variety.
+
+Picks must be stable across gunicorn workers and restarts, so Python's
+randomized `hash()` is out. Day-scoped picks ("priority", "combo1", ...) are
+hashed once per day and memoized; payload-scoped picks use CRC32 instead of
+an MD5 hexdigest round-trip.
+
+FEEDBACK_SELECTOR=md5 reproduces the original MD5-based selections exactly.
+"""
+import hashlib
+import os
+import threading
+import zlib
+from datetime import date
+
+SELECTOR_MODE = os.getenv("FEEDBACK_SELECTOR", "fast")
+
+
+def md5_hash(key):
+    return int(hashlib.md5(key.encode()).hexdigest(), 16)
+
+
+def crc32_hash(key):
+    return zlib.crc32(key.encode())
+
+
+class Selector:
+    """Chooses one item from a list, per day or per payload seed."""
+
+    def __init__(self, mode=SELECTOR_MODE):
+        if mode not in ("fast", "md5"):
+            raise ValueError(f"unknown FEEDBACK_SELECTOR {mode!r}; use 'fast' or 'md5'")
+        self.mode = mode
+        self._hash = crc32_hash if mode == "fast" else md5_hash
+        self._lock = threading.Lock()
+        self._day = None
+        self._daily = {}
+
+    def pick(self, items, seed_key):
+        """Payload-scoped pick: same seed → same item, in every process."""
+        if not items:
+            return ""
+        return items[self._hash(seed_key) % len(items)]
+
+    def daily(self, items, scope, today=None):
+        """Day-scoped pick, memoized until the date changes."""
+        if not items:
+            return ""
+        today = today or date.today()
+        if today != self._day:
+            with self._lock:
+                if today != self._day:
+                    self._daily = {}
+                    self._day = today
+        slot = (scope, len(items))
+        seed = self._daily.get(slot)
+        if seed is None:
+            # Same key format as the original f"{date.today()}-{scope}" seeds.
+            seed = self._daily[slot] = self._hash(f"{today}-{scope}")
+        return items[seed % len(items)]
+
+
+SELECTOR = Selector()
@@ -30,6 +30,7 @@ class MindGuardApp {
             
             // Initialize form handling
             this.initializeForm();
+            this.initializeHistoryOptIn();
             
             // Set initial state with animations
             await this.updateAllSliders();
@@ -393,25 +394,37 @@ class MindGuardApp {
             const controller = new AbortController();
             const timeoutId = setTimeout(() => controller.abort(), 30000); // 30 second timeout
             
+            const body = JSON.stringify(formData);
             const response = await fetch('/api/submit', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    // Score and resources arrive first, the journal's emotion after
+                    'Accept': 'application/x-ndjson, application/json',
+                    'Idempotency-Key': this.getSubmitKey(body),
                 },
-                body: JSON.stringify(formData),
+                body,
                 signal: controller.signal
             });
             
-            clearTimeout(timeoutId);
-            const result = await response.json();
-            
-            if (!response.ok) {
-                throw new Error(result.error || 'An error occurred while processing your request.');
+            try {
+                const contentType = response.headers.get('Content-Type') || '';
+                if (response.ok && contentType.includes('application/x-ndjson') && response.body) {
+                    await this.readResultStream(response);
+                } else {
+                    const result = await response.json();
+                    
+                    if (!response.ok) {
+                        throw new Error(result.error || 'An error occurred while processing your request.');
+                    }
+                    
+                    // Display results with enhanced animations
+                    await this.displayResults(result);
+                }
+            } finally {
+                clearTimeout(timeoutId);
             }
             
-            // Display results with enhanced animations
-            await this.displayResults(result);
-            
         } catch (error) {
             if (error.name === 'AbortError') {
                 this.showError('Request timed out. Please check your connection and try again.');
@@ -429,10 +442,53 @@ class MindGuardApp {
         
         return {
             ...this.sliderValues,
-            journal: journal.trim()
+            journal: journal.trim(),
+            anon_id: this.getAnonId()
         };
     }
 
+    getSubmitKey(body) {
+        // Same key when the same check-in is sent again (retry after a timeout or
+        // flaky Wi-Fi), so the server replays its answer instead of recomputing it
+        if (body !== this.lastSubmitBody) {
+            this.lastSubmitBody = body;
+            this.lastSubmitKey = crypto.randomUUID ? crypto.randomUUID() : String(Date.now()) + Math.random().toString(16).slice(2);
+        }
+        return this.lastSubmitKey;
+    }
+
+    initializeHistoryOptIn() {
+        // Only rendered when the server keeps history; the id is created on opt-in
+        // and forgotten on opt-out
+        const box = document.getElementById('keep-history');
+        if (!box) return;
+        try {
+            box.checked = Boolean(localStorage.getItem('mindguard_anon_id'));
+            box.addEventListener('change', () => {
+                if (!box.checked) localStorage.removeItem('mindguard_anon_id');
+            });
+        } catch (e) {
+            box.disabled = true;
+        }
+    }
+
+    getAnonId() {
+        // Random per-browser id so the server can keep a pseudonymous trend history,
+        // sent only once the student has ticked the opt-in box
+        const box = document.getElementById('keep-history');
+        if (!box || !box.checked) return undefined;
+        try {
+            let id = localStorage.getItem('mindguard_anon_id');
+            if (!id) {
+                id = (crypto.randomUUID ? crypto.randomUUID() : String(Date.now()) + Math.random().toString(16).slice(2));
+                localStorage.setItem('mindguard_anon_id', id);
+            }
+            return id;
+        } catch (e) {
+            return undefined;
+        }
+    }
+
     validateFormData(formData) {
         const sliderFields = ['mood', 'stress', 'focus', 'sleep', 'motivation', 'anxiety', 'appetite', 'food_security'];
         
@@ -562,6 +618,57 @@ class MindGuardApp {
         });
     }
 
+    async readResultStream(response) {
+        // One JSON object per line: the result, then (with a journal) its emotion
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        for (;;) {
+            const { value, done } = await reader.read();
+            buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+            let newline;
+            while ((newline = buffered.indexOf('\n')) >= 0) {
+                const line = buffered.slice(0, newline).trim();
+                buffered = buffered.slice(newline + 1);
+                if (line) {
+                    await this.handleResultEvent(JSON.parse(line));
+                }
+            }
+            if (done) {
+                return;
+            }
+        }
+    }
+
+    async handleResultEvent(event) {
+        const emotionAnalysis = document.getElementById('emotion-analysis');
+        if (event.event === 'error') {
+            if (emotionAnalysis.dataset.pending) {
+                delete emotionAnalysis.dataset.pending;
+                emotionAnalysis.style.display = 'none';
+            }
+            throw new Error(event.error || 'An error occurred while processing your request.');
+        }
+        if (event.event === 'result') {
+            await this.displayResults(event);
+            if (event.emotion_pending) {
+                emotionAnalysis.dataset.pending = '1';
+                emotionAnalysis.innerHTML = '<p class="caption">Reading your reflection…</p>';
+                emotionAnalysis.style.display = 'block';
+            }
+        } else if (event.event === 'emotion') {
+            delete emotionAnalysis.dataset.pending;
+            const feedback = document.getElementById('feedback');
+            const feedbackContent = feedback.querySelector('.stAlert-content') || feedback;
+            feedbackContent.innerHTML = event.feedback;
+            if (event.emotion_analysis) {
+                this.displayEmotionAnalysis(emotionAnalysis, event.emotion_analysis);
+            } else {
+                emotionAnalysis.style.display = 'none';
+            }
+        }
+    }
+
     displayBurnoutResult(container, result) {
         const level = result.burnout_level.toLowerCase();
         const score = result.wellness_score;
@@ -0,0 +1,157 @@
+"""
+Pre-serialized responses for content that only changes on deploy: the page
+shell (index.html), /api/emojis and the files under static/.
+
+Each body is serialized once at startup and compressed once per encoding
+(gzip, plus brotli when the `brotli` package is installed); encodings that
+don't save bytes are dropped. Requests pick an encoding from Accept-Encoding,
+get a strong ETag for that representation and a 304 with no body when
+If-None-Match already holds it.
+
+Static files are also served under a content-fingerprinted name
+(css/style.3f9c2a61b0.css) with a year-long `immutable` Cache-Control, and
+url_for('static', ...) hands out that name, so a returning browser doesn't
+ask for them at all. The page shell is `no-cache`: it is revalidated on every
+load (a 304 when nothing changed), which is how a new deploy's fingerprints
+reach the browser. Restart the server after editing a static file.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+STATIC_CACHE = os.getenv("STATIC_CACHE", "1") in ("1", "true", "True")
+# Non-fingerprinted URLs (/api/emojis) are cached by browsers for this long.
+API_MAX_AGE_S = int(os.getenv("STATIC_API_MAX_AGE_S", "3600"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COMPRESS_MIN_BYTES = 256
+FINGERPRINT_LEN = 10
+
+TEXT_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+def _compress(body):
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=11)
+    return encoded
+
+
+def _accepted(accept_encoding):
+    """Encodings the client accepts (q > 0), lower-cased."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = params.strip().lower()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name)
+    return accepted
+
+
+class Prebuilt:
+    """One immutable response body with its compressed variants and ETags."""
+
+    PREFERENCE = ("br", "gzip")
+
+    def __init__(self, body, content_type, cache_control=REVALIDATE):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.bodies = {"identity": body}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            for encoding, data in _compress(body).items():
+                if len(data) < len(body):
+                    self.bodies[encoding] = data
+        # Strong ETags differ per representation; any of them matches If-None-Match.
+        self.etags = {encoding: f'"{self.digest[:20]}"' if encoding == "identity" else f'"{self.digest[:20]}-{encoding}"'
+                      for encoding in self.bodies}
+        self._etag_values = set(self.etags.values())
+
+    def encoding_for(self, accept_encoding):
+        accepted = _accepted(accept_encoding)
+        for encoding in self.PREFERENCE:
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def not_modified(self, if_none_match):
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]  # If-None-Match uses the weak comparison
+            if tag in self._etag_values:
+                return True
+        return False
+
+    def respond(self, accept_encoding=None, if_none_match=None, cache_control=None):
+        """(status, headers, body) for a GET with these request headers."""
+        encoding = self.encoding_for(accept_encoding)
+        headers = [("ETag", self.etags[encoding]),
+                   ("Cache-Control", cache_control or self.cache_control),
+                   ("Vary", "Accept-Encoding")]
+        if self.not_modified(if_none_match):
+            return 304, headers, b""
+        body = self.bodies[encoding]
+        headers.append(("Content-Type", self.content_type))
+        if encoding != "identity":
+            headers.append(("Content-Encoding", encoding))
+        return 200, headers, body
+
+    def sizes(self):
+        return {encoding: len(body) for encoding, body in self.bodies.items()}
+
+
+class StaticAssets:
+    """Every file under a static folder, prebuilt, under its plain and fingerprinted names."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.entries = {}  # URL filename -> (Prebuilt, Cache-Control)
+        self.fingerprinted = {}  # plain filename -> fingerprinted filename
+        for root, _, files in os.walk(folder):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, folder).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    body = f.read()
+                content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if content_type.startswith(TEXT_TYPES):
+                    content_type += "; charset=utf-8"
+                entry = Prebuilt(body, content_type)
+                stem, ext = os.path.splitext(filename)
+                versioned = f"{stem}.{entry.digest[:FINGERPRINT_LEN]}{ext}"
+                self.entries[filename] = (entry, REVALIDATE)
+                self.entries[versioned] = (entry, IMMUTABLE)
+                self.fingerprinted[filename] = versioned
+
+    def url_name(self, filename):
+        """The fingerprinted name for url_for('static', filename=...), or the name itself if unknown."""
+        return self.fingerprinted.get(filename, filename)
+
+    def get(self, filename):
+        return self.entries.get(filename)
+
+    def stats(self):
+        totals = {}
+        for filename in self.fingerprinted:
+            for encoding, size in self.entries[filename][0].sizes().items():
+                totals[encoding] = totals.get(encoding, 0) + size
+        return {"files": len(self.fingerprinted), "bytes": totals, "brotli": brotli is not None}
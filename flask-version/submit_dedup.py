@@ -0,0 +1,140 @@
+"""
+Single-flight coalescing and short-lived replay of /api/submit results.
+
+Double-clicks and Wi-Fi retries send the same check-in several times. A
+submit is keyed on the client's `Idempotency-Key` header (with the anon_id)
+when it sends one, else on a hash of the canonical JSON payload when that
+carries an anon_id. Without either it isn't deduplicated at all: two
+students can send identical sliders and journal, and each must get their own
+check-in recorded. A key sent again with a different payload is refused
+(KeyReused) rather than answered with the first result. The first request
+for a key computes the response. Identical requests that arrive while it runs wait for that result
+("coalesced"). Repeats within SUBMIT_DEDUP_TTL_S get the stored response
+("replayed"). Neither re-runs the model or records the check-in a second
+time in history or cohort stats.
+
+Results live in a bounded per-worker table. Every entry has the same TTL, so
+insertion order is also expiry order and expired entries are dropped from
+the front. Failed computations are never stored. Degraded ones (emotion
+skipped under load) are only shared with the requests already waiting. The
+waiters are concurrent.futures Futures, so the ASGI mode can await the same
+computation (asyncio.wrap_future).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class KeyReused(ValueError):
+    """An Idempotency-Key sent again with a different check-in."""
+
+SUBMIT_DEDUP = os.getenv("SUBMIT_DEDUP", "1") in ("1", "true", "True")
+DEDUP_TTL_S = float(os.getenv("SUBMIT_DEDUP_TTL_S", "30"))
+DEDUP_MAX_ITEMS = int(os.getenv("SUBMIT_DEDUP_MAX_ITEMS", "4096"))
+# How long a duplicate waits for the in-flight original before giving up (503).
+DEDUP_WAIT_S = float(os.getenv("SUBMIT_DEDUP_WAIT_S", "30"))
+IDEMPOTENCY_KEY_MAX_LEN = 255
+
+
+def _digest(material):
+    return hashlib.blake2b(material.encode(), digest_size=16).digest()
+
+
+def submit_key(data, idempotency_key=None):
+    """
+    (coalescing key, payload digest): the client's idempotency key if given,
+    else the payload itself if it names an anon_id; None when neither.
+    """
+    digest = _digest("body\0" + json.dumps(data, sort_keys=True, separators=(",", ":"), default=str))
+    if idempotency_key:
+        return _digest(f"key\0{data.get('anon_id', '')}\0{idempotency_key[:IDEMPOTENCY_KEY_MAX_LEN]}"), digest
+    if data.get("anon_id"):
+        return digest, digest
+    return None
+
+
+class SingleFlight:
+    """Per-process in-flight table plus a TTL'd, size-bounded table of finished results."""
+
+    def __init__(self, ttl_s=DEDUP_TTL_S, max_items=DEDUP_MAX_ITEMS):
+        self.ttl_s = ttl_s
+        self.max_items = max(0, max_items)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._done = OrderedDict()
+        self.computed = 0
+        self.coalesced = 0
+        self.replayed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def claim(self, key):
+        """
+        ("replayed", result) for a stored result, ("coalesced", future) to
+        wait on an in-flight one, or ("leader", future) when the caller must
+        compute it and then call settle(key, future, ...). `key` is a
+        submit_key pair; raises KeyReused if its payload digest differs from
+        the one stored or in flight.
+        """
+        key, digest = key
+        now = time.monotonic()
+        with self._lock:
+            hit = self._done.get(key)
+            if hit is not None:
+                if hit[0] > now:
+                    if hit[1] != digest:
+                        self.rejected += 1
+                        raise KeyReused("Idempotency-Key already used for a different check-in")
+                    self.replayed += 1
+                    return "replayed", hit[2]
+                del self._done[key]
+            flight = self._inflight.get(key)
+            if flight is not None:
+                if flight[0] != digest:
+                    self.rejected += 1
+                    raise KeyReused("Idempotency-Key already used for a different check-in")
+                self.coalesced += 1
+                return "coalesced", flight[1]
+            future = Future()
+            self._inflight[key] = (digest, future)
+            future.set_running_or_notify_cancel()  # a waiter giving up can't cancel it for the rest
+            self.computed += 1
+            return "leader", future
+
+    def settle(self, key, future, result=None, error=None, store=True):
+        """Hand the leader's outcome to waiters; keep successful results for replay."""
+        key, digest = key
+        now = time.monotonic()
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is not None:
+                self.failed += 1
+            elif store and self.max_items:
+                self._done[key] = (now + self.ttl_s, digest, result)
+                while self._done:
+                    oldest_key, (expires, _, _) = next(iter(self._done.items()))
+                    if expires > now and len(self._done) <= self.max_items:
+                        break
+                    del self._done[oldest_key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ttl_s": self.ttl_s,
+                "max_items": self.max_items,
+                "stored": len(self._done),
+                "in_flight": len(self._inflight),
+                "computed": self.computed,
+                "coalesced": self.coalesced,
+                "replayed": self.replayed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
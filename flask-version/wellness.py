@@ -0,0 +1,151 @@
+"""
+Wellness scoring, burnout levels, campus resources and feedback text.
+
+Pure functions over the eight 1..5 sliders, kept free of Flask so the
+scoring engine can be imported by scripts and batch jobs. The feedback and
+resource rules themselves live in feedback_rules.json (see feedback_rules.py).
+"""
+from collections import namedtuple
+from datetime import date
+from operator import itemgetter
+
+from feedback_rules import RULES, SLIDERS
+from journal_matcher import scan
+from selector import SELECTOR
+
+# ---------- Constants
+VANDAL_LINKS = {
+    "athletics": "https://govandals.com",
+    "swim": "https://www.uidaho.edu/recreation/swim-center",
+    "rec": "https://www.uidaho.edu/recreation/rec-center",
+}
+
+# Emoji mappings for different wellness metrics
+EMOJIS = {
+    "mood": {1: "😞", 2: "🙁", 3: "😐", 4: "🙂", 5: "😄"},
+    "stress": {1: "😌", 2: "😕", 3: "😟", 4: "😣", 5: "😫"},
+    "focus": {1: "😵", 2: "😕", 3: "😐", 4: "🙂", 5: "😎"},
+    "sleep": {1: "😴", 2: "🥱", 3: "😐", 4: "🙂", 5: "😌"},
+    "motivation": {1: "🥀", 2: "😕", 3: "😐", 4: "🙂", 5: "🚀"},
+    "anxiety": {1: "😌", 2: "😯", 3: "😬", 4: "😰", 5: "😱"},
+    "appetite": {1: "🥄", 2: "🍽️", 3: "😐", 4: "🥗", 5: "🍱"},
+    "food_security": {1: "🍽️", 2: "🥪", 3: "🙂", 4: "🧺", 5: "💳"},
+}
+
+# ---------- Helpers for varied text
+def _pick(items, seed_key):
+    """Deterministic picker for variety (stable per day + payload)."""
+    return SELECTOR.pick(items, seed_key)
+
+
+# ---------- Scoring
+def calculate_wellness_score(data):
+    """Calculate overall wellness score from user inputs (average of 8 metrics)."""
+    mood = data['mood']
+    stress = data['stress']
+    focus = data['focus']
+    sleep = data['sleep']
+    motivation = data['motivation']
+    anxiety = data['anxiety']
+    appetite = data['appetite']
+    food_security = data.get('food_security', 3)
+
+    # Reverse scoring for negative metrics
+    stress_score = 6 - stress
+    anxiety_score = 6 - anxiety
+    # Appetite: center at 3 is best → 0..3 scale
+    appetite_score = 3 - abs(appetite - 3)
+
+    wellness_score = (
+        mood + stress_score + focus + sleep +
+        motivation + anxiety_score + appetite_score + food_security
+    ) / 8
+
+    return wellness_score
+
+def get_burnout_level(wellness_score):
+    """Determine burnout risk level based on wellness score."""
+    if wellness_score >= 4.0:
+        return "Low"
+    elif wellness_score >= 2.5:
+        return "Moderate"
+    else:
+        return "High"
+
+# ---------- Resources
+# Sliders in feedback_rules order; food_security may be missing (3), and for
+# resources any slider may be.
+_REQUIRED = itemgetter(*SLIDERS[:-1])
+_NEUTRAL = (3,) * len(SLIDERS)
+
+def get_resources(burnout_level, data=None, rules=None):
+    """Campus resources for a burnout level (tiers and slider add-ons in feedback_rules.json), at most 4."""
+    values = tuple(map(data.get, SLIDERS, _NEUTRAL)) if data else None
+    return (rules or RULES.current()).resources(burnout_level, values)
+
+
+# ---------- Feedback
+# Slider-only pieces of the feedback; `key` is the packed slider string used
+# to seed the per-payload picks.
+FeedbackParts = namedtuple("FeedbackParts", "key priority combo singles campus food farmers")
+
+def slider_feedback(data, today=None, rules=None):
+    """
+    Journal-independent part of the feedback: lead priority and combo lines,
+    candidate single-slider tips, campus/food lines and the Farmers Market
+    add-on, from the rules in feedback_rules.json. Deterministic for a given
+    day, ruleset and slider values.
+    """
+    today = today or date.today()
+    values = _REQUIRED(data) + (data.get('food_security', 3),)
+    level = get_burnout_level(calculate_wellness_score(data))
+    return FeedbackParts("".join(map(str, values)),
+                         *(rules or RULES.current()).slider_sections(values, level, today))
+
+def journal_feedback(journal, emotion=None, rules=None):
+    """Journal keyword nudges plus the emotion tone softener."""
+    topics = scan(journal).topics if journal else ()
+    return (rules or RULES.current()).journal_lines(topics, emotion)
+
+def assemble_feedback(parts, journal="", journal_lines=(), today=None, rules=None):
+    """Join slider parts and journal lines into the final 2–4 sentences."""
+    today = today or date.today()
+    # Assemble final 2–4 sentences (priority → one combo → one single → maybe journal → maybe campus → maybe food)
+    seed_key = f"{today}-{parts.key}-{journal[:40]}"
+    lines = []
+    if parts.priority:
+        lines.append(parts.priority)
+    if parts.combo:
+        lines.append(parts.combo)
+    if parts.singles:
+        lines.append(_pick(parts.singles, seed_key))
+    if journal_lines:
+        lines.append(_pick(journal_lines, seed_key))
+    if parts.campus:
+        lines.append(parts.campus)
+    if parts.food:
+        lines.append(parts.food)
+
+    # De-dupe, trim
+    seen = set(); final = []
+    for s in lines:
+        if s and s not in seen:
+            final.append(s); seen.add(s)
+    final = final[:4]
+    if not final:
+        final = [(rules or RULES.current()).default]
+    if parts.farmers:
+        final.append(parts.farmers)
+
+    return " ".join(final)
+
+def generate_advanced_feedback(data, emotion=None):
+    """
+    Build short, varied, targeted feedback based on slider signals + journal.
+    Returns 2–4 sentences, plus Farmers Market suggestion when appetite is low.
+    """
+    journal = (data.get('journal') or "").strip()
+    today = date.today()
+    rules = RULES.current()
+    return assemble_feedback(slider_feedback(data, today, rules), journal,
+                             journal_feedback(journal, emotion, rules), today, rules)
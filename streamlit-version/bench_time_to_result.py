@@ -0,0 +1,121 @@
+"""
+Time-to-result of the Streamlit app, measured headlessly with AppTest.
+
+Each simulated check-in moves three sliders, optionally types a journal and
+submits; the time is everything the server spends on that check-in (every
+script rerun it triggers, up to the rendered result). The first check-in pays
+for the model load, so it is reported apart from the 2nd..Nth.
+
+Pass --app to time another revision of the app, e.g. the pre-form version:
+
+    git show <rev>:streamlit-version/app.py > /tmp/app_before.py
+    python streamlit-version/bench_time_to_result.py --app /tmp/app_before.py
+    python streamlit-version/bench_time_to_result.py --json after.json
+
+Defaults to the offline stub emotion backend (EMOTION_BACKEND=stub, loaded
+from flask-version/scripts/stub_backend.py) so the numbers are the app's own
+cost; set EMOTION_BACKEND=torch to include the model. A check-in that shows a
+warning (e.g. emotion analysis unavailable) fails the run instead of being
+timed.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENGINE_DIR = os.path.join(os.path.dirname(HERE), "flask-version")
+sys.path.insert(0, os.path.join(ENGINE_DIR, "bench"))
+
+os.environ.setdefault("EMOTION_BACKEND", "stub")
+os.environ.setdefault("EMOTION_BACKEND_PLUGIN", os.path.join(ENGINE_DIR, "scripts", "stub_backend.py"))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchlib import environment, summarize, write_report  # noqa: E402
+
+MOVED = ("mood", "stress", "sleep")
+JOURNALS = (
+    "Midterms next week and I keep falling behind on the reading.",
+    "Had a good day with friends, feeling hopeful about the semester.",
+    "Rent is due and I'm worried about groceries this month.",
+    "Missing home a lot lately, the dorm feels lonely.",
+)
+
+
+def widget(at, key):
+    """The app's slider for `key` (st.slider before the form, st.select_slider after)."""
+    for kind in (at.select_slider, at.slider):
+        try:
+            return kind(key=key)
+        except KeyError:
+            continue
+    raise KeyError(key)
+
+
+def in_form(at):
+    return any(getattr(b, "form_id", "") for b in at.button)
+
+
+def checkin(at, rng, with_journal):
+    """Run one check-in like a user would; returns (seconds, reruns)."""
+    form = in_form(at)
+    reruns = 0
+    start = time.perf_counter()
+    for key in MOVED:
+        widget(at, key).set_value(rng.choice((1, 2, 4, 5)))
+        if not form:  # every slider drag reruns the whole script
+            at.run()
+            reruns += 1
+    if with_journal:
+        at.text_area[0].input(rng.choice(JOURNALS))
+        if not form:
+            at.run()
+            reruns += 1
+    at.button[0].click().run()
+    reruns += 1
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    if at.warning:
+        raise RuntimeError(f"check-in showed a warning: {at.warning[0].value}")
+    if not any("Burnout Risk Level" in m.value for m in at.markdown):
+        raise RuntimeError("no result rendered")
+    return elapsed, reruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--app", default=os.path.join(HERE, "app.py"))
+    parser.add_argument("--checkins", type=int, default=30)
+    parser.add_argument("--no-journal", action="store_true", help="slider-only check-ins")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-run timeout (model download)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the report here")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    at = AppTest.from_file(args.app, default_timeout=args.timeout)
+    at.run()
+    timings, reruns = [], 0
+    for _ in range(args.checkins):
+        seconds, n = checkin(at, rng, not args.no_journal)
+        timings.append(seconds)
+        reruns = n
+    first, rest = timings[0], timings[1:]
+    results = {
+        "first_checkin": {"ms": round(first * 1e3, 3)},
+        "later_checkins": {**summarize(rest, unit="ms"), "reruns_per_checkin": reruns},
+    }
+    print(f"{args.app}: first check-in {first * 1e3:.1f} ms; 2nd..{args.checkins}th "
+          f"p50 {results['later_checkins'].get('p50_ms')} ms, p95 {results['later_checkins'].get('p95_ms')} ms "
+          f"({reruns} script run(s) per check-in)")
+    if args.json:
+        write_report({"suite": "streamlit", "environment": {**environment(), "app": args.app,
+                                                            "backend": os.environ["EMOTION_BACKEND"]},
+                      "results": results}, args.json)
+
+
+if __name__ == "__main__":
+    main()